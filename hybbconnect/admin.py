@@ -1,6 +1,7 @@
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth.admin import UserAdmin
-from django.urls import path
+from django.urls import path, reverse
 from django.shortcuts import render, redirect
 from django import forms
 
@@ -19,6 +20,10 @@ from .models import (
 
 from django.contrib.auth import get_user_model
 from django.utils.html import format_html
+from .search import search
+from .ingest import READERS
+from .jobs import import_report, request_import
+from .models import ImportJob, RoutingRule, RoutingRuleCandidate
 import csv
 from django.shortcuts import render, redirect
 from django.urls import path
@@ -44,6 +49,26 @@ from .forms import UserBulkUploadForm
 User = get_user_model()
 
 
+# =====================================================================
+# ⏳ Bulk uploads run as ImportJobs (see jobs.py / run_import_worker)
+# =====================================================================
+
+def queue_import(request, kind, file, options=None):
+    """Queue ``file`` for the import worker; None (with a message) if its type is unsupported."""
+    if not file.name.lower().endswith(tuple(READERS)):
+        messages.error(request, "❌ Upload only .csv or .xlsx files!")
+        return None
+    return request_import(kind, file, user=request.user, options=options)
+
+
+def import_job_context(request, kind):
+    """Template context for the job named by ?job=: the job, plus its report once done."""
+    job_id = request.GET.get("job", "")
+    job = ImportJob.objects.filter(id=job_id, kind=kind).first() if job_id.isdigit() else None
+    report = import_report(job) if job and job.status == "done" else None
+    return {"job": job, "report": report}
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
 
@@ -88,124 +113,36 @@ class CustomUserAdmin(UserAdmin):
             form = UserBulkUploadForm(request.POST, request.FILES)
 
             if form.is_valid():
-                file = request.FILES["file"]
-                filename = file.name.lower()
-
-                users = []
-
                 # --------------------------------
-                # CSV Upload
+                # Validate + create in the background (see importers.py)
                 # --------------------------------
-                if filename.endswith(".csv"):
-                    decoded = file.read().decode("utf-8-sig").splitlines()
-                    reader = csv.DictReader(decoded)
+                job = queue_import(request, "users", request.FILES["file"])
+                if job:
+                    return redirect(f"{request.path}?job={job.id}")
 
-                    # Normalize CSV headers
-                    reader.fieldnames = [
-                        h.strip().lower().replace(" ", "_").replace("\ufeff", "")
-                        for h in reader.fieldnames
-                    ]
-
-                    for row in reader:
-                        users.append(row)
-
-                # --------------------------------
-                # Excel Upload
-                # --------------------------------
-                elif filename.endswith(".xlsx"):
-                    df = pd.read_excel(file)
-
-                    # Normalize Excel headers
-                    df.columns = (
-                        df.columns.str.strip()
-                        .str.lower()
-                        .str.replace(" ", "_")
-                        .str.replace("\ufeff", "")
-                    )
-
-                    users = df.to_dict(orient="records")
-
-                else:
-                    messages.error(request, "Upload only .csv or .xlsx files!")
-                    return redirect("..")
+        else:
+            form = UserBulkUploadForm()
 
-                # --------------------------------
-                # Required Columns
-                # --------------------------------
-                required = ["employee_id", "username",
-                            "role", "location", "password"]
-
-                created_count = 0
-                skipped_count = 0
-
-                for row in users:
-
-                    # Missing required fields
-                    for field in required:
-                        if field not in row or row[field] in [None, ""]:
-                            messages.error(request, f"Missing or empty field: {field}")
-                            return redirect("..")
-
-                    # --------------------------------
-                    # Skip duplicates
-                    # --------------------------------
-                    if CustomUser.objects.filter(username=row["username"]).exists():
-                        skipped_count += 1
-                        messages.warning(request, f"Skipped (username exists): {row['username']}")
-                        continue
-
-                    if CustomUser.objects.filter(employee_id=row["employee_id"]).exists():
-                        skipped_count += 1
-                        messages.warning(
-                            request, f"Skipped (employee ID exists): {row['employee_id']}"
-                        )
-                        continue
-
-                    # --------------------------------
-                    # Get Location object
-                    # --------------------------------
-                    location_value = row["location"].strip()
-
-                    try:
-                        location_obj = Location.objects.get(code=location_value)
-                    except Location.DoesNotExist:
-                        messages.error(
-                            request, f"❌ Location not found: {location_value}"
-                        )
-                        return redirect("..")
-
-                    # --------------------------------
-                    # Create new user
-                    # --------------------------------
-                    CustomUser.objects.create(
-                        employee_id=row["employee_id"],
-                        username=row["username"],
-                        email=row.get("email", ""),
-                        role=row["role"],
-                        location=location_obj,
-                        password=make_password(row["password"]),
-                        is_active=True,   # 👌 Active
-                        is_staff=True,    # 👌 Staff status ON
-                    )
-
-                    created_count += 1
+        return render(request, "bulk_upload.html", {
+            "form": form,
+            **import_job_context(request, "users"),
+        })
 
-                # --------------------------------
-                # Final messages
-                # --------------------------------
-                messages.success(
-                    request,
-                    f"Upload complete! Created: {created_count}, Skipped: {skipped_count}",
-                )
-                return redirect("..")
 
-        else:
-            form = UserBulkUploadForm()
 
-        return render(request, "bulk_upload.html", {"form": form})
 
 
+# =====================================================================
+# ✅ Ranked search (Ticket / Kitchen Log admins)
+# =====================================================================
+class RankedSearchMixin:
+    """Matches the search box through ``search_document`` (search.py), best
+    match first unless a column header is clicked."""
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ranking re-orders the list, which is already ordered by now
+        ranked = ORDER_VAR not in request.GET
+        return search(queryset, search_term, ranked=ranked), False
 
 
 # =====================================================================
@@ -217,7 +154,7 @@ from .models import Ticket
 
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(RankedSearchMixin, admin.ModelAdmin):
 
     # -------------------------------------------------------------
     # SHOW COLUMNS IN ADMIN TABLE
@@ -261,6 +198,9 @@ class TicketAdmin(admin.ModelAdmin):
         "concern",
     )
 
+    # The columns above are matched through Ticket.search_document
+    # (RankedSearchMixin)
+
     # -------------------------------------------------------------
     # READ ONLY FIELDS
     # (Auto-generated fields should NOT be editable)
@@ -307,66 +247,22 @@ class StaffPerformanceAdmin(admin.ModelAdmin):
         if request.method == "POST":
             form = BulkUploadForm(request.POST, request.FILES)
             if form.is_valid():
-                file = request.FILES["file"]
-
-                try:
-                    df = (
-                        pd.read_csv(file)
-                        if file.name.endswith(".csv")
-                        else pd.read_excel(file)
-                    )
-                except Exception as e:
-                    self.message_user(request, f"❌ Error reading file: {e}", level=messages.ERROR)
-                    return redirect("..")
-
-                required_columns = [
-                    "employee_id", "month", "bau_status", "rating", "incentive",
-                    "ot_sacoff_amount", "referral_bonus", "dsat_deduction",
-                    "wrong_order_deduction", "mrd_deduction_staff",
-                    "other_deduction", "earning_total", "deduction_total"
-                ]
-
-                missing = [c for c in required_columns if c not in df.columns]
-                if missing:
-                    self.message_user(request, f"❌ Missing columns: {', '.join(missing)}",
-                                      level=messages.ERROR)
-                    return redirect("..")
-
-                created_count = 0
-
-                for _, row in df.iterrows():
-                    try:
-                        user = CustomUser.objects.get(employee_id=row["employee_id"])
-                        StaffPerformance.objects.update_or_create(
-                            employee=user,
-                            month=row["month"],
-                            defaults={
-                                "bau_status": row["bau_status"],
-                                "rating": row["rating"],
-                                "incentive": row["incentive"],
-                                "ot_sacoff_amount": row["ot_sacoff_amount"],
-                                "referral_bonus": row["referral_bonus"],
-                                "dsat_deduction": row["dsat_deduction"],
-                                "wrong_order_deduction": row["wrong_order_deduction"],
-                                "mrd_deduction_staff": row["mrd_deduction_staff"],
-                                "other_deduction": row["other_deduction"],
-                                "earning_total": row["earning_total"],
-                                "deduction_total": row["deduction_total"],
-                            },
-                        )
-                        created_count += 1
-                    except CustomUser.DoesNotExist:
-                        continue
-
-                self.message_user(request, f"✅ Uploaded {created_count} records successfully.",
-                                  level=messages.SUCCESS)
-                return redirect("..")
+                # --------------------------------
+                # Validate + upsert in the background (see importers.py)
+                # --------------------------------
+                job = queue_import(request, "staff_performance", request.FILES["file"])
+                if job:
+                    return redirect(f"{request.path}?job={job.id}")
 
         else:
             form = BulkUploadForm()
 
-        return render(request, "bulk_upload_form.html",
-                      {"form": form, "title": "Bulk Upload Staff Performance", "opts": self.model._meta})
+        return render(request, "bulk_upload_form.html", {
+            "form": form,
+            "title": "Bulk Upload Staff Performance",
+            "opts": self.model._meta,
+            **import_job_context(request, "staff_performance"),
+        })
 
 
 # =====================================================================
@@ -374,7 +270,7 @@ class StaffPerformanceAdmin(admin.ModelAdmin):
 # =====================================================================
 
 @admin.register(KitchenLog)
-class KitchenLogAdmin(admin.ModelAdmin):
+class KitchenLogAdmin(RankedSearchMixin, admin.ModelAdmin):
     list_display = ("emp_id", "emp_name", "location", "category", "created_at")
     search_fields = ("emp_id", "emp_name", "category")
     list_filter = ("location", "category", "created_at")
@@ -432,66 +328,45 @@ class SalarySlipAdmin(admin.ModelAdmin):
         return custom + urls
 
     def upload_salary(self, request):
+        # --------------------------------
+        # Step 2: apply a finished preview, reusing its file
+        # --------------------------------
+        if request.method == "POST" and "confirm" in request.POST:
+            preview = ImportJob.objects.filter(
+                id=request.POST.get("job"), kind="salary", status="done", options={}
+            ).exclude(file="").first()
+            if preview is None:
+                messages.error(request, "❌ Upload expired, please upload the file again.")
+                return redirect(".")
+
+            job = request_import(
+                "salary", user=request.user, options={"apply": True}, source=preview
+            )
+            return redirect(f"{request.path}?job={job.id}")
+
+        # --------------------------------
+        # Step 1: validate + diff in the background, nothing written yet
+        # --------------------------------
         if request.method == "POST":
             form = UploadFileForm(request.POST, request.FILES)
             if form.is_valid():
-                file = form.cleaned_data['file']
-
-                try:
-                    df = pd.read_excel(file) if file.name.endswith(('.xls', '.xlsx')) else pd.read_csv(file)
-                except Exception as e:
-                    messages.error(request, f"❌ Error reading file: {e}")
-                    return redirect("..")
-
-                required_columns = [
-                    'employee_id', 'month', 'year', 'present_days', 'lop_days',
-                    'sac_off_ot', 'rating_incentive', 'km_mrd_incentive', 'arrears',
-                    'referral_bonus', 'mrd_deduction', 'km_mrd_deduction',
-                    'photo_deduction', 'missing_item_deduction', 'net_pay'
-                ]
-
-                missing_cols = [c for c in required_columns if c not in df.columns]
-                if missing_cols:
-                    messages.error(request, f"❌ Missing: {', '.join(missing_cols)}")
-                    return redirect("..")
-
-                created, skipped = 0, []
-
-                for _, row in df.iterrows():
-                    emp_id = str(row['employee_id']).strip()
-                    user = User.objects.filter(employee_id=emp_id).first()
-
-                    if not user:
-                        skipped.append(emp_id)
-                        continue
-
-                    SalarySlip.objects.create(
-                        employee=user,
-                        month=row['month'],
-                        year=row['year'],
-                        present_days=row.get('present_days', 0) or 0,
-                        lop_days=row.get('lop_days', 0) or 0,
-                        sac_off_ot=row.get('sac_off_ot', 0) or 0,
-                        rating_incentive=row.get('rating_incentive', 0) or 0,
-                        km_mrd_incentive=row.get('km_mrd_incentive', 0) or 0,
-                        arrears=row.get('arrears', 0) or 0,
-                        referral_bonus=row.get('referral_bonus', 0) or 0,
-                        mrd_deduction=row.get('mrd_deduction', 0) or 0,
-                        km_mrd_deduction=row.get('km_mrd_deduction', 0) or 0,
-                        photo_deduction=row.get('photo_deduction', 0) or 0,
-                        missing_item_deduction=row.get('missing_item_deduction', 0) or 0,
-                        net_pay=row.get('net_pay', 0) or 0,
-                    )
-                    created += 1
-
-                msg = f"✅ {created} salary slips uploaded."
-                if skipped:
-                    msg += f" ⚠️ Skipped {len(skipped)} invalid employee IDs: {', '.join(skipped)}"
-
-                messages.success(request, msg)
-                return redirect("..")
-
-        return render(request, 'upload_salary.html', {"form": UploadFileForm(), "title": "Upload Salary Slips"})
+                job = queue_import(request, "salary", form.cleaned_data['file'])
+                if job:
+                    return redirect(f"{request.path}?job={job.id}")
+        else:
+            form = UploadFileForm()
+
+        context = import_job_context(request, "salary")
+        report = context["report"]
+        if report and not context["job"].options.get("apply"):
+            context["changed_rows"] = report.with_status("changed")[:200]
+            context["pending"] = context["job"].report.get("pending", 0)
+
+        return render(request, 'upload_salary.html', {
+            "form": form,
+            "title": "Upload Salary Slips",
+            **context,
+        })
 
 
 # =====================================================================
@@ -503,9 +378,17 @@ class OrderPhotoAdmin(admin.ModelAdmin):
     list_display = ("order_id", "uploaded_by", "location", "uploaded_at")
     search_fields = ("order_id", "uploaded_by__username")
     list_filter = ("location", "uploaded_at")
-    readonly_fields = ("image_preview",)
+    readonly_fields = ("image_preview", "width", "height", "archive")
 
     def image_preview(self, obj):
+        # The thumbnail is ~300px already; the full photo (live or archived)
+        # is one click away
+        if obj.thumbnail:
+            return format_html(
+                '<a href="{}" target="_blank"><img src="{}" style="max-width:300px;border-radius:6px;"></a>',
+                reverse("order_photo_original", args=[obj.pk]),
+                obj.thumbnail.url,
+            )
         if obj.photo:
             return format_html(
                 '<img src="{}" style="max-width:300px;border-radius:6px;">', obj.photo.url
@@ -515,3 +398,62 @@ class OrderPhotoAdmin(admin.ModelAdmin):
     image_preview.short_description = "Photo Preview"
 
 
+
+
+# =====================================================================
+# ✅ Import Job Admin (background bulk uploads)
+# =====================================================================
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "original_name", "status", "rows_processed",
+                    "rows_total", "rows_failed", "rows_per_second", "requested_by", "created_at")
+    list_filter = ("kind", "status")
+    readonly_fields = [field.name for field in ImportJob._meta.fields]
+    actions = ["resume_jobs"]
+
+    @admin.action(description="Resume selected failed imports")
+    def resume_jobs(self, request, queryset):
+        # run_import_worker picks them up after their last committed chunk;
+        # stalled "running" jobs are requeued by the worker itself
+        resumed = queryset.filter(status="failed").exclude(file="").update(
+            status="queued", error=""
+        )
+        self.message_user(request, f"✅ {resumed} import(s) queued to resume.",
+                          level=messages.SUCCESS)
+
+    def has_add_permission(self, request):
+        return False
+
+
+# =====================================================================
+# ✅ Routing Rule Admin (ticket → owner assignment, see routing.py)
+# =====================================================================
+
+class RoutingRuleCandidateInline(admin.TabularInline):
+    model = RoutingRuleCandidate
+    extra = 1
+    autocomplete_fields = ("owner",)
+
+
+@admin.register(RoutingRule)
+class RoutingRuleAdmin(admin.ModelAdmin):
+    list_display = ("category", "location", "priority", "is_active", "candidate_list")
+    list_filter = ("is_active", "location")
+    search_fields = ("category",)
+    inlines = [RoutingRuleCandidateInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("location").prefetch_related(
+            "candidates__owner"
+        )
+
+    def candidate_list(self, obj):
+        candidates = ", ".join(str(candidate) for candidate in obj.candidates.all())
+        if obj.seed_owner_employee_id:
+            # Linked automatically once that owner is created
+            waiting = f"waiting for owner {obj.seed_owner_employee_id}"
+            candidates = f"{candidates}, {waiting}" if candidates else waiting
+        return candidates or "—"
+
+    candidate_list.short_description = "Candidates"
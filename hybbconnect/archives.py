@@ -0,0 +1,374 @@
+# archives.py — archive tier for old order photos + ZIP downloads
+#
+# Originals older than PHOTO_ARCHIVE_AFTER_DAYS are packed, a whole month at
+# a time, into one ZIP per location under PHOTO_ARCHIVE_DIR:
+#
+#   photo_archives/<location code>/2026-03.zip     (+ manifest.csv inside)
+#
+# Members are stored, not deflated: the photos are already WebP / JPEG, and
+# stored bytes can be read straight from the file. Each photo keeps its
+# member name, data offset and size, so viewing one is a single seek + read
+# of the archive. The photo's `photo` field is emptied and its storage
+# reference released, so `manage.py gc_photo_storage` reclaims the original;
+# thumbnails stay in the photo storage for the gallery.
+#
+# stream_photo_zip() builds a ZIP of any set of photos (live or archived)
+# while it is being downloaded. Nothing is spooled to disk.
+
+import csv
+import io
+import mimetypes
+import os
+import re
+import struct
+import zipfile
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .blobs import PHOTO_STORAGE, move_refs
+from .jobs import bump_export_version
+from .models import OrderPhoto, PhotoArchive
+
+COPY_BUFFER_BYTES = 64 * 1024
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_HEADER = ["Photo ID", "Order ID", "Uploaded By", "Location", "Uploaded At", "File"]
+
+# ZIP local file header: 30 fixed bytes, then the name and extra field whose
+# lengths are the two little-endian shorts at the end
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_LENGTHS = struct.Struct("<HH")
+
+UNSAFE_NAME_RE = re.compile(r"[^\w\-]+")
+
+
+def archive_root():
+    return getattr(
+        settings, "PHOTO_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "photo_archives")
+    )
+
+
+def archive_path(archive):
+    return os.path.join(archive_root(), archive.name)
+
+
+def archive_cutoff(days=None):
+    """Start of the newest month whose photos are all old enough to archive."""
+    if days is None:
+        days = getattr(settings, "PHOTO_ARCHIVE_AFTER_DAYS", 180)
+    oldest_kept = timezone.localdate() - timedelta(days=days)
+    return oldest_kept.replace(day=1)
+
+
+def _month_bounds(month):
+    following = (month + timedelta(days=32)).replace(day=1)
+    return (
+        timezone.make_aware(datetime.combine(month, datetime.min.time())),
+        timezone.make_aware(datetime.combine(following, datetime.min.time())),
+    )
+
+
+# -----------------------------------------
+# Reading originals (live or archived)
+# -----------------------------------------
+class _ArchiveSlice:
+    """Read-only view of ``size`` bytes at ``offset`` of an archive file."""
+
+    def __init__(self, path, offset, size):
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._left = size
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._left:
+            size = self._left
+        data = self._file.read(size)
+        self._left -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def has_original(photo):
+    return bool(photo.photo) or photo.archive_id is not None
+
+
+def original_name(photo):
+    """File name of the original, e.g. for a download."""
+    if photo.photo:
+        return os.path.basename(photo.photo.name)
+    return photo.archive_member
+
+
+def original_size(photo):
+    if photo.photo:
+        return PHOTO_STORAGE.size(photo.photo.name)
+    return photo.archive_size
+
+
+def open_original(photo):
+    """File-like object over the original bytes; raises OSError if missing."""
+    if photo.photo:
+        return PHOTO_STORAGE.open(photo.photo.name, "rb")
+    if photo.archive_id is None:
+        raise FileNotFoundError(f"Photo {photo.pk} has no original")
+    return _ArchiveSlice(archive_path(photo.archive), photo.archive_offset, photo.archive_size)
+
+
+def iter_original(source):
+    """Chunks of an open original, closing it at the end."""
+    with source:
+        while True:
+            chunk = source.read(COPY_BUFFER_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def content_type(name):
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+# -----------------------------------------
+# ZIP building
+# -----------------------------------------
+def member_name(photo, extension):
+    order = UNSAFE_NAME_RE.sub("_", photo.order_id).strip("_") or "photo"
+    return f"{order}_{photo.pk}{extension}"
+
+
+def _member_info(name, uploaded_at, size):
+    info = zipfile.ZipInfo(name, timezone.localtime(uploaded_at).timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    info.file_size = size
+    return info
+
+
+def _manifest_row(photo, name):
+    user = photo.uploaded_by
+    return [
+        photo.pk,
+        photo.order_id,
+        user.username if user else "",
+        photo.location.name if photo.location else "",
+        timezone.localtime(photo.uploaded_at).strftime("%Y-%m-%d %H:%M"),
+        name,
+    ]
+
+
+def _manifest_bytes(rows):
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(MANIFEST_HEADER)
+    writer.writerows(rows)
+    return text.getvalue().encode("utf-8")
+
+
+def _add_photo(zf, photo, name, source, size):
+    with zf.open(_member_info(name, photo.uploaded_at, size), "w") as member:
+        for chunk in iter_original(source):
+            member.write(chunk)
+            yield
+
+
+class _ZipSink:
+    """Write-only, non-seekable target for ZipFile; the bytes written since
+    the last take() are handed to the response."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_photo_zip(photos):
+    """Yield a ZIP of ``photos`` (with uploader, location and archive loaded)
+    chunk by chunk, ending with a manifest.csv of what it contains."""
+    sink = _ZipSink()
+    rows = []
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for photo in photos:
+            if not has_original(photo):
+                continue
+            name = member_name(photo, os.path.splitext(original_name(photo))[1])
+            try:
+                size = original_size(photo)
+                source = open_original(photo)
+            except OSError:
+                rows.append(_manifest_row(photo, "(missing)"))
+                continue
+
+            for _ in _add_photo(zf, photo, name, source, size):
+                data = sink.take()
+                if data:
+                    yield data
+            rows.append(_manifest_row(photo, name))
+
+        zf.writestr(MANIFEST_NAME, _manifest_bytes(rows))
+    yield sink.take()
+
+
+# -----------------------------------------
+# Archiving
+# -----------------------------------------
+def archivable_photos(cutoff):
+    return (
+        OrderPhoto.objects.filter(uploaded_at__lt=_month_bounds(cutoff)[0], archive__isnull=True)
+        .exclude(photo="")
+        .exclude(photo__isnull=True)
+    )
+
+
+def archive_months(cutoff):
+    """``(location_id, month, photo count)`` of every month due for archiving."""
+    months = (
+        archivable_photos(cutoff)
+        .annotate(month=TruncMonth("uploaded_at"))
+        .values_list("location_id", "month")
+        .annotate(n=Count("id"))
+        .order_by("month", "location_id")
+    )
+    # TruncMonth gives local midnight on the 1st
+    return [(location_id, month.date(), n) for location_id, month, n in months]
+
+
+def _archive_name(location, month):
+    folder = UNSAFE_NAME_RE.sub("_", location.code) if location else "unassigned"
+    base = f"{folder}/{month:%Y-%m}"
+    name = f"{base}.zip"
+    part = 1
+    # A month archived earlier gets a second file for late arrivals
+    while PhotoArchive.objects.filter(name=name).exists() or os.path.exists(
+        os.path.join(archive_root(), name)
+    ):
+        part += 1
+        name = f"{base}-{part}.zip"
+    return name
+
+
+def _data_offsets(path):
+    """Member name -> (data offset, size), from the finished archive."""
+    offsets = {}
+    with open(path, "rb") as raw, zipfile.ZipFile(raw) as zf:
+        for info in zf.infolist():
+            raw.seek(info.header_offset + LOCAL_HEADER_SIZE - LOCAL_HEADER_LENGTHS.size)
+            name_length, extra_length = LOCAL_HEADER_LENGTHS.unpack(
+                raw.read(LOCAL_HEADER_LENGTHS.size)
+            )
+            offsets[info.filename] = (
+                info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length,
+                info.file_size,
+            )
+    return offsets
+
+
+def archive_month(location_id, month, cutoff):
+    """Move one location-month of originals into a new archive file.
+
+    Returns ``(archive or None, photos whose original could not be read)``.
+    """
+    start, end = _month_bounds(month)
+    photos = list(
+        archivable_photos(cutoff)
+        .filter(location_id=location_id, uploaded_at__gte=start, uploaded_at__lt=end)
+        .select_related("uploaded_by", "location")
+        .order_by("uploaded_at", "id")
+    )
+    if not photos:
+        return None, []
+
+    location = photos[0].location
+    name = _archive_name(location, month)
+    path = os.path.join(archive_root(), name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    archived, missing, rows = [], [], []
+    with open(f"{path}.part", "wb") as target:
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for photo in photos:
+                member = member_name(photo, os.path.splitext(photo.photo.name)[1])
+                try:
+                    size = PHOTO_STORAGE.size(photo.photo.name)
+                    source = PHOTO_STORAGE.open(photo.photo.name, "rb")
+                except OSError:
+                    missing.append(photo)
+                    continue
+                for _ in _add_photo(zf, photo, member, source, size):
+                    pass
+                photo.archive_member = member
+                archived.append(photo)
+                rows.append(_manifest_row(photo, member))
+            zf.writestr(MANIFEST_NAME, _manifest_bytes(rows))
+        target.flush()
+        os.fsync(target.fileno())
+
+    if not archived:
+        os.remove(f"{path}.part")
+        return None, missing
+
+    os.replace(f"{path}.part", path)
+    offsets = _data_offsets(path)
+
+    try:
+        with transaction.atomic():
+            archive = PhotoArchive.objects.create(
+                location=location,
+                month=month,
+                name=name,
+                size=os.path.getsize(path),
+                photo_count=len(archived),
+            )
+            released = []
+            for photo in archived:
+                released.append(photo.photo.name)
+                photo.archive = archive
+                photo.archive_offset, photo.archive_size = offsets[photo.archive_member]
+                photo.photo = ""
+            OrderPhoto.objects.bulk_update(
+                archived,
+                ["photo", "archive", "archive_member", "archive_offset", "archive_size"],
+                batch_size=500,
+            )
+            # bulk_update sends no post_save; gc_photo_storage deletes the
+            # originals once their grace period is over
+            move_refs(released, ())
+            bump_export_version("order_photos")
+    except Exception:
+        os.remove(path)
+        raise
+
+    return archive, missing
+
+
+def archive_old_photos(days=None):
+    """Archive every month older than the cutoff; yields archive_month() results."""
+    cutoff = archive_cutoff(days)
+    for location_id, month, _ in archive_months(cutoff):
+        yield archive_month(location_id, month, cutoff)
@@ -0,0 +1,111 @@
+# blobs.py — reference counts for files in the photo storage
+#
+# Each non-empty OrderPhoto.photo / .thumbnail is one reference to the
+# StoredBlob of that name. signals.py moves references when a photo row is
+# saved or deleted. A file whose count reaches zero stays on disk for
+# BLOB_GRACE, since an upload of the same bytes may be about to reuse it
+# (storage.py returns the existing name). After that, `manage.py
+# gc_photo_storage` deletes it. rebuild_blob_refs() recounts everything
+# from the photo rows.
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import OrderPhoto, StoredBlob
+
+PHOTO_FILE_FIELDS = ("photo", "thumbnail")
+PHOTO_STORAGE = OrderPhoto._meta.get_field("photo").storage
+
+BLOB_GRACE = timedelta(hours=24)
+
+
+# -----------------------------------------
+# Names referenced by a photo row
+# -----------------------------------------
+def photo_file_names(photo):
+    """Storage names ``photo`` refers to, or None if a file field is deferred."""
+    if photo.get_deferred_fields() & set(PHOTO_FILE_FIELDS):
+        return None
+    return tuple(getattr(photo, field).name or "" for field in PHOTO_FILE_FIELDS)
+
+
+def stored_photo_file_names(photo_id):
+    """Names of the row as currently stored in the database."""
+    row = OrderPhoto.objects.filter(pk=photo_id).values_list(*PHOTO_FILE_FIELDS).first()
+    return tuple(name or "" for name in row) if row else ()
+
+
+# -----------------------------------------
+# Counters
+# -----------------------------------------
+def _size(name):
+    try:
+        return PHOTO_STORAGE.size(name)
+    except OSError:
+        return None
+
+
+def add_refs(name, delta):
+    if not name or not delta:
+        return
+    changes = {"refs": F("refs") + delta, "updated_at": timezone.now()}
+    if StoredBlob.objects.filter(name=name).update(**changes) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            StoredBlob.objects.create(name=name, refs=delta, size=_size(name))
+    except IntegrityError:
+        # Another writer created the row first
+        StoredBlob.objects.filter(name=name).update(**changes)
+
+
+def move_refs(old_names, new_names):
+    deltas = Counter(new_names or ())
+    deltas.subtract(Counter(old_names or ()))
+    for name, delta in deltas.items():
+        add_refs(name, delta)
+
+
+def rebuild_blob_refs():
+    """Recount every blob's references from the photo rows.
+
+    Returns ``(blobs whose count changed, blobs created)``.
+    """
+    counts = Counter()
+    for field in PHOTO_FILE_FIELDS:
+        rows = (
+            OrderPhoto.objects.exclude(**{field: ""})
+            .exclude(**{f"{field}__isnull": True})
+            .values(field)
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in rows.iterator():
+            counts[row[field]] += row["n"]
+
+    now = timezone.now()
+    with transaction.atomic():
+        changed = []
+        for blob in StoredBlob.objects.only("id", "name", "refs").iterator():
+            refs = counts.pop(blob.name, 0)
+            if refs != blob.refs:
+                blob.refs = refs
+                blob.updated_at = now
+                changed.append(blob)
+        StoredBlob.objects.bulk_update(changed, ["refs", "updated_at"], batch_size=1000)
+
+        StoredBlob.objects.bulk_create(
+            [StoredBlob(name=name, refs=refs, size=_size(name)) for name, refs in counts.items()],
+            batch_size=1000,
+        )
+
+    return len(changed), len(counts)
+
+
+def unreferenced_blobs(grace=BLOB_GRACE):
+    """Blobs with no references for at least ``grace``."""
+    return StoredBlob.objects.filter(refs__lte=0, updated_at__lt=timezone.now() - grace)
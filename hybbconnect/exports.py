@@ -0,0 +1,238 @@
+# exports.py — streaming CSV / XLSX exports
+#
+# Row builders read flat tuples with ``values_list(...).iterator()`` so joined
+# columns arrive in the same query and no model instances are built. Writers
+# take any iterable of rows, so the same rows feed a download or a file on disk.
+
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from openpyxl import Workbook
+
+from .models import OrderPhoto
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+
+# -----------------------------------------
+# Writers
+# -----------------------------------------
+class _Echo:
+    """File-like object whose write() hands the line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(fileobj, header, rows):
+    """Write rows to a text-mode file object."""
+    writer = csv.writer(fileobj)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+
+def write_xlsx(fileobj, header, rows, title="Export"):
+    """Write rows to a binary file object using openpyxl's write-only mode."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def export_response(fmt, basename, header, rows):
+    """Return a download response for ``rows`` in ``fmt`` ("csv" or "xlsx").
+
+    CSV is streamed row by row. XLSX is a zip container and cannot be sent
+    before it is complete, so it is spooled to an anonymous temp file (rows
+    still flow through in constant memory) and then streamed from disk.
+    """
+    if fmt == "xlsx":
+        tmp = tempfile.TemporaryFile()
+        write_xlsx(tmp, header, rows)
+        tmp.seek(0)
+        return FileResponse(
+            tmp,
+            as_attachment=True,
+            filename=f"{basename}.xlsx",
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{basename}.csv"'
+    return response
+
+
+# -----------------------------------------
+# Tickets
+# -----------------------------------------
+TICKET_EXPORT_HEADER = [
+    "Raised Date",
+    "Ticket Number",
+    "Employee",
+    "Employee Code",
+    "Location",
+    "Concern",
+    "Category",
+    "Status",
+    "Assigned Owner",
+    "Description",
+
+    "Closed Date & Time",
+    "Pending Days",
+    "Staff Confirmation Date",
+    "Staff Confirmation Pending Days",
+    "Employee Remarks",
+    "Owner Remarks",
+    "Rejection Remarks",
+    "Reassigned Info",
+    "Time Taken To Resolve",
+    "SLA Breach",
+]
+
+
+def ticket_export_rows(report_queryset):
+    """Rows for a queryset from ``reports.ticket_report_queryset``."""
+    values = report_queryset.values_list(
+        "created_at",
+        "ticket_number",
+        "employee__username",
+        "employee__employee_id",
+        "location__name",
+        "concern",
+        "concern_category",
+        "status",
+        "assigned_owner__username",
+        "description",
+        "closed_at",
+        "pending_duration",
+        "staff_confirmed_at",
+        "confirm_duration",
+        "reassigned_info",
+        "time_to_resolve",
+        "sla_breach",
+    )
+
+    for (
+        created_at, ticket_number, employee, employee_code, location, concern,
+        category, status, owner, description, closed_at, pending, confirmed_at,
+        confirm_pending, reassigned_info, time_to_resolve, sla_breach,
+    ) in values.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            created_at.strftime("%d-%m-%Y"),
+            ticket_number,
+            employee or "",
+            employee_code or "",
+            location or "",
+            concern or "",
+            category or "",
+            status or "",
+            owner or "",
+            description or "",
+
+            closed_at.strftime("%d-%m-%Y %H:%M") if closed_at else "",
+            pending.days,
+            confirmed_at.strftime("%d-%m-%Y %H:%M") if confirmed_at else "",
+            confirm_pending.days if confirm_pending is not None else "",
+            "",
+            "",
+            "",
+            reassigned_info,
+            str(time_to_resolve) if time_to_resolve is not None else "",
+            "YES" if sla_breach else "NO",
+        ]
+
+
+# -----------------------------------------
+# Order photos
+# -----------------------------------------
+PHOTO_EXPORT_HEADER = ["Order ID", "Uploaded By", "Location", "Uploaded At", "Image URL"]
+
+
+def photo_export_rows(photos_queryset, build_absolute_uri):
+    storage = OrderPhoto._meta.get_field("photo").storage
+    values = photos_queryset.values_list(
+        "id", "order_id", "uploaded_by__username", "location__name", "uploaded_at", "photo",
+        "archive",
+    )
+
+    for photo_id, order_id, username, location, uploaded_at, photo, archive in values.iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        if photo:
+            url = build_absolute_uri(storage.url(photo))
+        elif archive:
+            # Archived originals are served by the app (see archives.py)
+            url = build_absolute_uri(reverse("order_photo_original", args=[photo_id]))
+        else:
+            url = ""
+        yield [
+            order_id,
+            username or "",
+            location or "",
+            uploaded_at.strftime("%Y-%m-%d %H:%M"),
+            url,
+        ]
+
+
+# -----------------------------------------
+# OT / SAC OFF updates
+# -----------------------------------------
+STAFF_UPDATE_EXPORT_HEADER = [
+    "Employee ID",
+    "Employee Name",
+    "Location",
+    "Type",
+    "OT Hours",
+    "OT Date",
+    "SAC OFF Date",
+    "Remarks",
+    "Updated At",
+]
+
+
+def staff_update_export_rows(updates_queryset):
+    values = updates_queryset.values_list(
+        "staff__employee_id",
+        "staff__first_name",
+        "staff__last_name",
+        "staff__location__code",
+        "staff__location__name",
+        "update_type",
+        "ot_hours",
+        "ot_date",
+        "sac_off_date",
+        "remarks",
+        "updated_at",
+    )
+
+    for (
+        employee_id, first_name, last_name, location_code, location_name,
+        update_type, ot_hours, ot_date, sac_off_date, remarks, updated_at,
+    ) in values.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        is_to = update_type == "TO"
+        yield [
+            employee_id,
+            f"{first_name} {last_name}".strip(),
+            f"{location_code} - {location_name}" if location_code else "",
+            update_type,
+            ot_hours if is_to else "",
+            ot_date if is_to else "",
+            sac_off_date if update_type == "SAC_OFF" else "",
+            remarks,
+            str(updated_at),
+        ]
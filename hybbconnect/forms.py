@@ -3,6 +3,7 @@ from .models import (
     Location, Ticket, KitchenLog, StaffPerformance,
     CustomUser, OrderPhoto
 )
+from .scope import get_scope
 
 
 from django import forms
@@ -75,20 +76,9 @@ class KitchenLogForm(forms.ModelForm):
 
         self.fields["staff"].queryset = CustomUser.objects.none()
 
-        if user and user.role == "kitchen_manager" and user.location:
-            # KM sees only staff in their location
-            self.fields["staff"].queryset = CustomUser.objects.filter(
-                role="kitchen_staff",
-                location=user.location
-            )
-
-        elif user and user.role == "cluster_manager" and hasattr(user, "cluster_manager_profile"):
-            # CM sees all staff from assigned locations
-            assigned_locations = user.cluster_manager_profile.locations.all()
-            self.fields["staff"].queryset = CustomUser.objects.filter(
-                role="kitchen_staff",
-                location__in=assigned_locations
-            )
+        if user and user.role in ("kitchen_manager", "cluster_manager"):
+            # KM sees staff in their location, CM staff from assigned locations
+            self.fields["staff"].queryset = get_scope(user).staff()
 
         self.fields["staff"].empty_label = "Select staff member"
 
@@ -213,10 +203,8 @@ class OrderPhotoForm(forms.ModelForm):
             self.fields["location"].widget = forms.HiddenInput()
 
         # Cluster Manager → limit to assigned locations
-        elif user.role == "cluster_manager" and hasattr(user, "cluster_manager_profile"):
-            self.fields["location"].queryset = (
-                user.cluster_manager_profile.locations.all()
-            )
+        elif user.role == "cluster_manager":
+            self.fields["location"].queryset = get_scope(user).locations()
 
         else:
             # Safety fallback
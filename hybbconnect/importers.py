@@ -0,0 +1,530 @@
+# importers.py — bulk imports behind the admin upload screens
+#
+# An import never stops at the first bad row: every row is counted in an
+# ImportReport as created / skipped / error (with a reason for the latter).
+# Each importer takes the file chunk by chunk from ingest.ingest() and writes
+# every chunk in batches.
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import pandas as pd
+from django.contrib.auth.hashers import make_password
+
+from .metrics import invalidate_admin_metrics
+from .models import CustomUser, Location, SalarySlip, StaffPerformance
+from .routing import link_seeded_owners
+from .staff_data import invalidate_staff_data, link_legacy_logs
+
+# Below this many passwords a process pool costs more than it saves
+PARALLEL_HASH_THRESHOLD = 50
+
+
+class ImportReport:
+    # Only counted; every other status keeps the row details for display
+    ROUTINE_STATUSES = ("created", "updated", "new", "unchanged")
+    DETAIL_LIMIT = 1000
+
+    def __init__(self):
+        self.rows = []
+        self.counts = {}
+        self.omitted = 0
+
+    def add(self, line, status, key, message=""):
+        self.counts[status] = self.counts.get(status, 0) + 1
+        if status in self.ROUTINE_STATUSES:
+            return
+        if len(self.rows) >= self.DETAIL_LIMIT:
+            self.omitted += 1
+            return
+        self.rows.append({"line": line, "status": status, "key": key, "message": message})
+
+    def retract(self, line, status):
+        """Take back the row added earlier for ``line`` with ``status``."""
+        self.counts[status] -= 1
+        if not self.counts[status]:
+            del self.counts[status]
+        self.rows = [row for row in self.rows if row["line"] != line]
+
+    def with_status(self, *statuses):
+        return [row for row in self.rows if row["status"] in statuses]
+
+    @property
+    def problems(self):
+        return self.with_status("skipped", "error")
+
+    def summary(self):
+        if not self.counts:
+            return "No rows found."
+        return ", ".join(f"{status.title()}: {count}" for status, count in self.counts.items())
+
+    def finish(self):
+        self.rows.sort(key=lambda row: row["line"])
+        return self
+
+    # Saved on ImportJob.report so a resumed job keeps its earlier rows
+    def to_dict(self):
+        return {"counts": self.counts, "rows": self.rows, "omitted": self.omitted}
+
+    @classmethod
+    def from_dict(cls, data):
+        report = cls()
+        report.counts = dict(data.get("counts", {}))
+        report.rows = list(data.get("rows", []))
+        report.omitted = data.get("omitted", 0)
+        return report
+
+
+# -----------------------------------------
+# Cell cleanup
+# -----------------------------------------
+def text_column(series):
+    """Vectorised clean(): strings, stripped, "" for blanks, 1001.0 -> "1001"."""
+    return (
+        series.astype("string")
+        .str.strip()
+        .str.replace(r"\.0$", "", regex=True)
+        .fillna("")
+    )
+
+
+def decimal_columns(df, columns, required=(), limits=None):
+    """Coerce ``columns`` to 2dp floats in one pass per column.
+
+    Blank cells become 0 unless the column is in ``required``. Returns the
+    coerced frame and a Series of per-row error messages ("" when valid).
+    """
+    limits = limits or {}
+    values = df[columns].apply(pd.to_numeric, errors="coerce").round(2)
+    errors = pd.Series("", index=df.index)
+
+    for column in columns:
+        blank = text_column(df[column]) == ""
+        invalid = values[column].isna() & ~blank
+        too_large = values[column].abs() >= limits.get(column, 10**8)
+
+        errors = errors.where(~invalid, errors + f"{column} is not a number; ")
+        errors = errors.where(~too_large, errors + f"{column} is out of range; ")
+        if column in required:
+            errors = errors.where(~blank, errors + f"{column} is empty; ")
+
+    return values.fillna(0), errors.str.rstrip("; ")
+
+
+def decimal_records(numbers, rows, columns):
+    """``{column: Decimal}`` per row of ``rows``, formatted one column at a time."""
+    text = numbers.loc[rows, columns].apply(lambda column: column.map("{:.2f}".format))
+    return [
+        dict(zip(columns, map(Decimal, values)))
+        for values in text.itertuples(index=False, name=None)
+    ]
+
+
+def clean(value):
+    """Cell value as a stripped string ("" for blanks / NaN, 1001.0 -> "1001")."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return str(value).strip()
+
+
+# -----------------------------------------
+# Password hashing
+# -----------------------------------------
+def _init_hash_worker(settings_module):
+    # Needed when the pool spawns instead of forking (macOS / Windows)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """make_password() for each password, spread over a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(p) for p in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_hash_worker,
+        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "iconnect.settings"),),
+    ) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+# -----------------------------------------
+# Users
+# -----------------------------------------
+USER_REQUIRED_COLUMNS = ["employee_id", "username", "role", "location", "password"]
+USER_ROLES = {code for code, _ in CustomUser._meta.get_field("role").choices}
+
+
+class UserImport:
+    """Create CustomUsers. Existing usernames / employee ids and the location
+    code map are loaded once, so validation costs no queries per row.
+    """
+
+    required_columns = USER_REQUIRED_COLUMNS
+
+    def __init__(self, batch_size=500, workers=None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.report = ImportReport()
+
+        self.usernames = set(CustomUser.objects.values_list("username", flat=True))
+        self.employee_ids = set(CustomUser.objects.values_list("employee_id", flat=True))
+        self.locations = dict(Location.objects.values_list("code", "id"))
+
+    def write(self, frame):
+        report = self.report
+        pending = []  # (line, user, raw password)
+
+        for index, raw in zip(frame.index, frame.to_dict(orient="records")):
+            line = index + 2
+            row = {key: clean(value) for key, value in raw.items()}
+            key = row.get("username") or row.get("employee_id") or "-"
+
+            missing = [field for field in USER_REQUIRED_COLUMNS if not row.get(field)]
+            if missing:
+                report.add(line, "error", key, f"Missing or empty field: {', '.join(missing)}")
+                continue
+
+            if row["username"] in self.usernames:
+                report.add(line, "skipped", key, "Username exists")
+                continue
+
+            if row["employee_id"] in self.employee_ids:
+                report.add(line, "skipped", key, f"Employee ID exists: {row['employee_id']}")
+                continue
+
+            if row["role"] not in USER_ROLES:
+                report.add(line, "error", key, f"Unknown role: {row['role']}")
+                continue
+
+            location_id = self.locations.get(row["location"])
+            if location_id is None:
+                report.add(line, "error", key, f"Location not found: {row['location']}")
+                continue
+
+            # Later duplicates inside the same file are skipped too
+            self.usernames.add(row["username"])
+            self.employee_ids.add(row["employee_id"])
+
+            user = CustomUser(
+                employee_id=row["employee_id"],
+                username=row["username"],
+                email=row.get("email", ""),
+                role=row["role"],
+                location_id=location_id,
+                is_active=True,
+                is_staff=True,
+            )
+            pending.append((line, user, row["password"]))
+
+        hashes = hash_passwords([password for _, _, password in pending], self.workers)
+        for (_, user, _), hashed in zip(pending, hashes):
+            user.password = hashed
+
+        CustomUser.objects.bulk_create([user for _, user, _ in pending], batch_size=self.batch_size)
+        for line, user, _ in pending:
+            report.add(line, "created", user.username)
+
+        # bulk_create sends no post_save, which would link the users' old logs
+        # and the routing rules seeded for them
+        link_legacy_logs([user.employee_id for _, user, _ in pending])
+        link_seeded_owners([user.employee_id for _, user, _ in pending if user.role == "owner"])
+
+    def finish(self):
+        # bulk_create sends no post_save
+        if self.report.counts.get("created"):
+            invalidate_admin_metrics()
+        return self.report.finish()
+
+
+# -----------------------------------------
+# Staff performance
+# -----------------------------------------
+STAFF_PERFORMANCE_NUMBERS = [
+    "rating", "incentive", "ot_sacoff_amount", "referral_bonus", "dsat_deduction",
+    "wrong_order_deduction", "mrd_deduction_staff", "other_deduction",
+    "earning_total", "deduction_total",
+]
+STAFF_PERFORMANCE_COLUMNS = ["employee_id", "month", "bau_status"] + STAFF_PERFORMANCE_NUMBERS
+
+
+def _employee_map(employee_ids):
+    return dict(
+        CustomUser.objects.filter(employee_id__in=set(employee_ids) - {""})
+        .values_list("employee_id", "id")
+    )
+
+
+def _replace_earlier(report, seen, key, employee_id):
+    """Report the row an earlier chunk kept for ``key`` as skipped, now that
+    the file repeats it; returns what was saved in ``seen`` for that row."""
+    earlier = seen.get(key)
+    if earlier is not None:
+        report.retract(earlier[0], earlier[1])
+        report.add(earlier[0], "skipped", employee_id, "Repeated later in the file")
+    return earlier
+
+
+def _report_rejects(report, lines, employee_ids, errors, known, duplicate):
+    for i in errors.index[errors != ""]:
+        report.add(int(lines[i]), "error", employee_ids[i] or "-", errors[i])
+    for i in errors.index[(errors == "") & ~known]:
+        report.add(int(lines[i]), "skipped", employee_ids[i], "Unknown employee ID")
+    for i in errors.index[(errors == "") & known & duplicate]:
+        report.add(int(lines[i]), "skipped", employee_ids[i], "Repeated later in the file")
+
+
+class StaffPerformanceImport:
+    """Upsert StaffPerformance rows on (employee, month).
+
+    Columns are validated and coerced vectorised per chunk; employees are
+    resolved with one query per chunk.
+    """
+
+    required_columns = STAFF_PERFORMANCE_COLUMNS
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        # "employee_id|month" -> [line, status] of the row that wins so far,
+        # so a repeat in a later chunk replaces it
+        self.seen = {}
+
+    def write(self, df):
+        lines = pd.Series(df.index + 2, index=df.index)
+
+        employee_ids = text_column(df["employee_id"])
+        months = text_column(df["month"])
+        statuses = text_column(df["bau_status"])
+        numbers, errors = decimal_columns(
+            df, STAFF_PERFORMANCE_NUMBERS, required=("rating",), limits={"rating": 100}
+        )
+
+        errors = errors.where(employee_ids != "", "employee_id is empty")
+        errors = errors.where(months != "", "month is empty")
+
+        employees = _employee_map(employee_ids)
+        known = employee_ids.isin(employees.keys())
+
+        # Later valid rows for the same employee + month win
+        keys = pd.Series(list(zip(employee_ids, months)), index=df.index)
+        duplicate = keys.where(errors == "").duplicated(keep="last") & (errors == "")
+
+        _report_rejects(self.report, lines, employee_ids, errors, known, duplicate)
+        valid = df.index[(errors == "") & known & ~duplicate]
+
+        existing = set(
+            StaffPerformance.objects.filter(
+                employee_id__in=[employees[employee_ids[i]] for i in valid],
+                month__in=set(months[valid]),
+            ).values_list("employee_id", "month")
+        )
+
+        objects = []
+        records = decimal_records(numbers, valid, STAFF_PERFORMANCE_NUMBERS)
+        for i, values in zip(valid, records):
+            employee = employees[employee_ids[i]]
+            objects.append(
+                StaffPerformance(
+                    employee_id=employee,
+                    month=months[i],
+                    bau_status=statuses[i],
+                    **values,
+                )
+            )
+            line = int(lines[i])
+            key = f"{employee_ids[i]}|{months[i]}"
+            # A row written by an earlier chunk is no reason to say "updated"
+            earlier = _replace_earlier(self.report, self.seen, key, employee_ids[i])
+            if earlier is not None:
+                status = earlier[1]
+            else:
+                status = "updated" if (employee, months[i]) in existing else "created"
+            self.report.add(line, status, employee_ids[i])
+            self.seen[key] = [line, status]
+
+        StaffPerformance.objects.bulk_create(
+            objects,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["employee", "month"],
+            update_fields=["bau_status"] + STAFF_PERFORMANCE_NUMBERS,
+        )
+        invalidate_staff_data(*(obj.employee_id for obj in objects))
+
+    def finish(self):
+        return self.report.finish()
+
+
+# -----------------------------------------
+# Salary slips
+# -----------------------------------------
+SALARY_EARNINGS = ["sac_off_ot", "rating_incentive", "km_mrd_incentive", "arrears", "referral_bonus"]
+SALARY_DEDUCTIONS = ["mrd_deduction", "km_mrd_deduction", "photo_deduction", "missing_item_deduction"]
+SALARY_DAYS = ["present_days", "lop_days"]
+SALARY_FIELDS = SALARY_DAYS + SALARY_EARNINGS + SALARY_DEDUCTIONS + ["net_pay"]
+SALARY_COLUMNS = ["employee_id", "month", "year"] + SALARY_FIELDS
+SALARY_WRITTEN_STATUSES = ("new", "changed")
+
+
+def _saved_values(values):
+    """Slip values as JSON-safe strings, for SalaryImport.seen."""
+    if values is None:
+        return None
+    return {
+        column: None if values[column] is None else str(values[column])
+        for column in SALARY_FIELDS
+    }
+
+
+def _salary_values(saved):
+    """_saved_values() typed again."""
+    if saved is None:
+        return None
+    return {
+        column: value if value is None else int(value) if column in SALARY_DAYS else Decimal(value)
+        for column, value in saved.items()
+    }
+
+
+class SalaryImport:
+    """Validate a salary sheet and diff it against the stored slips.
+
+    Every row is reported as new / changed / unchanged / skipped / error
+    (changed rows say which fields differ). With ``apply=False`` nothing is
+    written, which is the preview; with ``apply=True`` new and changed slips
+    are upserted on (employee, month, year).
+    """
+
+    required_columns = SALARY_COLUMNS
+
+    def __init__(self, apply=False, batch_size=1000):
+        self.apply = apply
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.pending = 0
+        # "employee_id|month|year" -> [line, status, stored values] of the row
+        # that wins so far, so a repeat in a later chunk replaces it and is
+        # still compared with the slip as it was before this import
+        self.seen = {}
+
+    def write(self, df):
+        report = self.report
+        lines = pd.Series(df.index + 2, index=df.index)
+
+        employee_ids = text_column(df["employee_id"])
+        months = text_column(df["month"])
+        numbers, errors = decimal_columns(
+            df, ["year"] + SALARY_FIELDS, required=("year", "net_pay")
+        )
+
+        # Days and year must be whole numbers
+        for column in ["year"] + SALARY_DAYS:
+            fractional = numbers[column] % 1 != 0
+            errors = errors.where(~fractional, errors + f"; {column} must be a whole number")
+        errors = errors.str.lstrip("; ")
+
+        # net_pay is base pay + earnings - deductions. The sheet has no base pay
+        # column, so the check is that the implied base pay is not negative.
+        components = numbers[SALARY_EARNINGS].sum(axis=1) - numbers[SALARY_DEDUCTIONS].sum(axis=1)
+        implied_base = (numbers["net_pay"] - components).round(2)
+        errors = errors.where(
+            (implied_base >= 0) | (errors != ""),
+            "net_pay " + numbers["net_pay"].map("{:.2f}".format)
+            + " is below earnings - deductions " + components.map("{:.2f}".format),
+        )
+
+        errors = errors.where(employee_ids != "", "employee_id is empty")
+        errors = errors.where(months != "", "month is empty")
+
+        employees = _employee_map(employee_ids)
+        known = employee_ids.isin(employees.keys())
+        years = numbers["year"].astype(int)
+
+        keys = pd.Series(list(zip(employee_ids, months, years)), index=df.index)
+        duplicate = keys.where(errors == "").duplicated(keep="last") & (errors == "")
+
+        _report_rejects(report, lines, employee_ids, errors, known, duplicate)
+        valid = df.index[(errors == "") & known & ~duplicate]
+
+        # Stored slips for the same employees and years, in one query
+        stored = {
+            (slip["employee_id"], slip["month"], slip["year"]): slip
+            for slip in SalarySlip.objects.filter(
+                employee_id__in=[employees[employee_ids[i]] for i in valid],
+                year__in=set(years[valid]),
+            ).values("employee_id", "month", "year", *SALARY_FIELDS)
+        }
+
+        slips = []
+        for i, values in zip(valid, decimal_records(numbers, valid, SALARY_FIELDS)):
+            for column in SALARY_DAYS:
+                values[column] = int(values[column])
+
+            employee = employees[employee_ids[i]]
+            key = (employee, months[i], int(years[i]))
+            line = int(lines[i])
+            seen_key = f"{employee_ids[i]}|{months[i]}|{key[2]}"
+
+            earlier = _replace_earlier(report, self.seen, seen_key, employee_ids[i])
+            if earlier is not None:
+                old = _salary_values(earlier[2])
+                # An earlier chunk may have written its values already
+                rewrite = earlier[1] in SALARY_WRITTEN_STATUSES
+                if rewrite:
+                    self.pending -= 1
+            else:
+                old = stored.get(key)
+                rewrite = False
+
+            if old is None:
+                status, message = "new", ""
+            else:
+                changes = [
+                    f"{column}: {old[column]} → {values[column]}"
+                    for column in SALARY_FIELDS
+                    if old[column] != values[column]
+                ]
+                status = "changed" if changes else "unchanged"
+                message = "; ".join(changes)
+
+            report.add(line, status, employee_ids[i], message)
+            self.seen[seen_key] = [line, status, _saved_values(old)]
+
+            if status in SALARY_WRITTEN_STATUSES:
+                self.pending += 1
+            elif not rewrite:
+                continue
+            slips.append(SalarySlip(employee_id=employee, month=key[1], year=key[2], **values))
+
+        if self.apply:
+            SalarySlip.objects.bulk_create(
+                slips,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=["employee", "month", "year"],
+                update_fields=SALARY_FIELDS,
+            )
+
+    def finish(self):
+        return self.report.finish()
+
+
+# Upload kind -> importer, for callers that pick one by name
+IMPORTERS = {
+    "users": UserImport,
+    "staff_performance": StaffPerformanceImport,
+    "salary": SalaryImport,
+}
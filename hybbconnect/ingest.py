@@ -0,0 +1,157 @@
+# ingest.py — streaming reader shared by the admin importers
+#
+# Uploads are read in fixed-size chunks (pandas chunksize for CSV, openpyxl
+# read-only rows for XLSX) and each chunk is handed to an importer's write(),
+# so memory stays bounded by the chunk size, not the file size. Headers are
+# normalised once; every chunk keeps a running index (line = index + 2).
+
+from contextlib import nullcontext
+from itertools import chain, islice
+
+import pandas as pd
+from django.db import transaction
+from openpyxl import load_workbook
+
+CHUNK_ROWS = 5000
+
+
+def normalize_header(header):
+    return str(header).strip().lower().replace(" ", "_").replace("\ufeff", "")
+
+
+# -----------------------------------------
+# Readers: (columns, iterator of DataFrames)
+# -----------------------------------------
+def _csv_frames(file, chunk_rows):
+    # dtype=str keeps ids like "0012" intact; importers coerce numbers
+    reader = pd.read_csv(file, dtype=str, encoding="utf-8-sig", chunksize=chunk_rows)
+    try:
+        first = next(reader)
+    except StopIteration:
+        return [], iter(())
+
+    columns = [normalize_header(c) for c in first.columns]
+
+    def frames():
+        for frame in chain([first], reader):
+            frame.columns = columns
+            yield frame
+
+    return columns, frames()
+
+
+def _xlsx_frames(file, chunk_rows):
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        workbook.close()
+        return [], iter(())
+
+    columns = [normalize_header(c) for c in header]
+
+    def frames():
+        offset = 0
+        try:
+            while True:
+                batch = list(islice(rows, chunk_rows))
+                if not batch:
+                    break
+                yield pd.DataFrame(
+                    batch,
+                    columns=columns,
+                    index=pd.RangeIndex(offset, offset + len(batch)),
+                )
+                offset += len(batch)
+        finally:
+            workbook.close()
+
+    return columns, frames()
+
+
+def _xls_frames(file, chunk_rows):
+    # Legacy .xls has no streaming reader; it is loaded whole and then chunked
+    df = pd.read_excel(file)
+    df.columns = [normalize_header(c) for c in df.columns]
+    return list(df.columns), (df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows))
+
+
+READERS = {
+    ".csv": _csv_frames,
+    ".xlsx": _xlsx_frames,
+    ".xls": _xls_frames,
+}
+
+
+def open_frames(file, chunk_rows=CHUNK_ROWS):
+    name = file.name.lower()
+    for extension, reader in READERS.items():
+        if name.endswith(extension):
+            return reader(file, chunk_rows)
+    raise ValueError("Upload only .csv or .xlsx files!")
+
+
+def count_rows(file):
+    """Data rows in ``file`` (header excluded), or None if unknown up front.
+
+    CSV counts newlines, so quoted multi-line cells over-count slightly.
+    """
+    name = file.name.lower()
+
+    if name.endswith(".csv"):
+        lines = 0
+        last = b"\n"
+        for block in iter(lambda: file.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        file.seek(0)
+        return max(lines - 1, 0)
+
+    if name.endswith(".xlsx"):
+        workbook = load_workbook(file, read_only=True)
+        max_row = workbook.active.max_row
+        workbook.close()
+        file.seek(0)
+        return max(max_row - 1, 0) if max_row else None
+
+    return None
+
+
+# -----------------------------------------
+# Driver
+# -----------------------------------------
+def ingest(file, importer, chunk_rows=CHUNK_ROWS, progress=None, start_row=0,
+           commit_every_chunk=False):
+    """Feed ``file`` chunk by chunk to ``importer``; returns its report.
+
+    ``importer`` has ``required_columns``, ``write(frame)`` and ``finish()``.
+    ``progress(rows_done)`` is called after every chunk. By default the whole
+    file is imported in one transaction; with ``commit_every_chunk`` each
+    chunk commits on its own, together with the ``progress`` call, so an
+    interrupted import can be resumed with ``start_row=rows_done``. Rows
+    before ``start_row`` are read but not written. Raises ValueError for
+    unreadable files or missing columns.
+    """
+    columns, frames = open_frames(file, chunk_rows)
+
+    missing = [c for c in importer.required_columns if c not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    done = start_row
+    with nullcontext() if commit_every_chunk else transaction.atomic():
+        for frame in frames:
+            # A header-only CSV reads as one empty frame
+            if frame.empty or frame.index[-1] < start_row:
+                continue
+            frame = frame.loc[start_row:]
+
+            with transaction.atomic():
+                importer.write(frame)
+                done = int(frame.index[-1]) + 1
+                if progress:
+                    progress(done)
+
+    return importer.finish()
@@ -0,0 +1,437 @@
+# jobs.py — DB-backed background export jobs
+#
+# Views enqueue an ExportJob row; `python manage.py run_export_worker` claims
+# queued rows and writes the file into PRIVATE_MEDIA_ROOT/exports/ under a
+# random name (see storage.PrivateStorage); it is only handed out by
+# views.export_job_download, to the requester. A finished file is
+# reused by any later request with the same filters while the underlying data
+# is unchanged, until it expires.
+#
+# Admin bulk uploads work the same way: the upload view saves the file on an
+# ImportJob and `python manage.py run_import_worker` feeds it to the importer,
+# committing and recording progress after every chunk. A job whose worker died
+# is requeued and resumes after its last committed chunk. The uploaded file is
+# deleted as soon as the job finishes, except a salary preview's, which the
+# confirmed import reads again.
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, connection
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .exports import (
+    PHOTO_EXPORT_HEADER,
+    STAFF_UPDATE_EXPORT_HEADER,
+    TICKET_EXPORT_HEADER,
+    photo_export_rows,
+    staff_update_export_rows,
+    ticket_export_rows,
+    write_csv,
+    write_xlsx,
+)
+from .importers import IMPORTERS, ImportReport
+from .ingest import CHUNK_ROWS, count_rows, ingest
+from .models import ExportJob, ImportJob, NumberSequence, OrderPhoto, StaffTimeUpdate, Ticket
+from .reports import order_photo_queryset, ticket_report_queryset
+from .sequences import next_value
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+# -----------------------------------------
+# Generic queue helpers
+# -----------------------------------------
+def claim_next_job(model):
+    """Atomically move the oldest queued row of ``model`` to running.
+
+    The conditional UPDATE means two workers can never claim the same row.
+    Returns the claimed instance, or None when the queue is empty.
+    """
+    while True:
+        job_id = (
+            model.objects.filter(status="queued")
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        claimed = model.objects.filter(id=job_id, status="queued").update(
+            status="running", started_at=timezone.now()
+        )
+        if claimed:
+            return model.objects.get(id=job_id)
+
+
+# -----------------------------------------
+# Export definitions
+# -----------------------------------------
+def _ticket_source(params):
+    tickets = ticket_report_queryset(
+        status=params.get("status"),
+        assigned_to=params.get("assigned_to"),
+        location=params.get("location"),
+    )
+    return TICKET_EXPORT_HEADER, ticket_export_rows(tickets)
+
+
+def _photo_source(params):
+    photos = order_photo_queryset(params.get("location_ids", []), params)
+    base_url = params.get("base_url", "/")
+    rows = photo_export_rows(photos, lambda path: urljoin(base_url, path))
+    return PHOTO_EXPORT_HEADER, rows
+
+
+def _staff_update_source(params):
+    updates = StaffTimeUpdate.objects.order_by("-updated_at")
+    return STAFF_UPDATE_EXPORT_HEADER, staff_update_export_rows(updates)
+
+
+EXPORT_SOURCES = {
+    "tickets": _ticket_source,
+    "order_photos": _photo_source,
+    "staff_time_updates": _staff_update_source,
+}
+
+
+# Tables without a reliable updated_at count their edits in a NumberSequence
+# row instead (bumped by signals.py and by bulk writers such as archives.py)
+EXPORT_VERSION_SEQUENCES = {
+    "order_photos": "export-version:order_photos",
+    "staff_time_updates": "export-version:staff_time_updates",
+}
+
+
+def bump_export_version(kind):
+    next_value(EXPORT_VERSION_SEQUENCES[kind])
+
+
+def export_data_version(kind):
+    """Cheap fingerprint that changes whenever the exported table changes."""
+    if kind == "tickets":
+        stats = Ticket.objects.aggregate(n=Count("id"), last=Max("updated_at"))
+        return f"{stats['n']}:{stats['last']}"
+
+    model = OrderPhoto if kind == "order_photos" else StaffTimeUpdate
+    stats = model.objects.aggregate(n=Count("id"), last=Max("id"))
+    edits = (
+        NumberSequence.objects.filter(name=EXPORT_VERSION_SEQUENCES[kind])
+        .values_list("last_value", flat=True)
+        .first()
+    )
+    return f"{stats['n']}:{stats['last']}:{edits or 0}"
+
+
+def export_cache_key(kind, file_format, params):
+    payload = json.dumps(
+        [kind, file_format, params, export_data_version(kind)],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# -----------------------------------------
+# Public API
+# -----------------------------------------
+def request_export(kind, file_format, params, user=None):
+    """Return a job for this export, reusing a pending or cached one if possible."""
+    cache_key = export_cache_key(kind, file_format, params)
+
+    # Only the requester may fetch a job (see views.get_export_job_for), so
+    # only their own jobs are reused
+    existing = (
+        ExportJob.objects.filter(cache_key=cache_key, requested_by=user)
+        .exclude(status="failed")
+        .order_by("-created_at")
+        .first()
+    )
+    if existing and existing.status in ACTIVE_STATUSES:
+        return existing
+    if existing and existing.expires_at and existing.expires_at > timezone.now():
+        if existing.file and existing.file.storage.exists(existing.file.name):
+            return existing
+
+    return ExportJob.objects.create(
+        kind=kind,
+        file_format=file_format,
+        params=params,
+        cache_key=cache_key,
+        requested_by=user,
+    )
+
+
+def _counted(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def run_export_job(job):
+    """Generate the file for a claimed job and mark it done or failed."""
+    ttl = getattr(settings, "EXPORT_ARTIFACT_TTL_SECONDS", 6 * 60 * 60)
+
+    try:
+        header, rows = EXPORT_SOURCES[job.kind](job.params)
+        counter = [0]
+        rows = _counted(rows, counter)
+
+        with tempfile.TemporaryFile() as tmp:
+            if job.file_format == "xlsx":
+                write_xlsx(tmp, header, rows)
+            else:
+                text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+                write_csv(text, header, rows)
+                text.flush()
+                text.detach()
+
+            tmp.seek(0)
+            # upload_to replaces the name with a random one
+            job.file.save(f"{job.kind}.{job.file_format}", File(tmp), save=False)
+
+        job.row_count = counter[0]
+        job.status = "done"
+        job.error = ""
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + timedelta(seconds=ttl)
+    job.save()
+    return job
+
+
+def requeue_stale_exports(now=None):
+    """Put "running" exports whose worker died back in the queue.
+
+    Exports write their file in one go without progress updates, so a job
+    counts as stale once it has run longer than any export should.
+    """
+    stale = getattr(settings, "EXPORT_JOB_STALE_SECONDS", 60 * 60)
+    cutoff = (now or timezone.now()) - timedelta(seconds=stale)
+    return ExportJob.objects.filter(status="running", started_at__lt=cutoff).update(
+        status="queued"
+    )
+
+
+def evict_expired_exports(now=None):
+    """Delete expired export jobs together with their files."""
+    now = now or timezone.now()
+    expired = ExportJob.objects.filter(expires_at__lt=now)
+
+    count = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+# -----------------------------------------
+# Import jobs
+# -----------------------------------------
+IMPORT_FAILED_STATUSES = ("skipped", "error")
+
+
+def request_import(kind, file=None, user=None, options=None, source=None):
+    """Queue an import of an uploaded ``file``, or of the stored file of the
+    ``source`` job (a confirmed salary preview), and return the job.
+    """
+    job = ImportJob(
+        kind=kind,
+        options=options or {},
+        chunk_rows=CHUNK_ROWS,
+        requested_by=user,
+    )
+    if source is not None:
+        job.file.name = source.file.name
+        job.original_name = source.original_name
+    else:
+        job.original_name = os.path.basename(file.name)
+        job.file.save(job.original_name, file, save=False)
+    job.save()
+    return job
+
+
+def import_report(job):
+    return ImportReport.from_dict(job.report)
+
+
+# Importer attributes carried across chunks, saved with the report so a
+# resumed job picks them up again
+IMPORT_STATE_ATTRIBUTES = ("pending", "seen")
+
+
+def _import_state(importer):
+    state = importer.report.to_dict()
+    for name in IMPORT_STATE_ATTRIBUTES:
+        if hasattr(importer, name):
+            state[name] = getattr(importer, name)
+    return state
+
+
+@contextmanager
+def import_heartbeat(job):
+    """Touch the running job's ``updated_at`` every IMPORT_HEARTBEAT_SECONDS
+    from a side thread, so requeue_stale_imports() leaves it alone while a
+    long count or chunk is in progress.
+
+    The thread has its own connection: a chunk's own writes only become
+    visible when the chunk commits.
+    """
+    interval = getattr(settings, "IMPORT_HEARTBEAT_SECONDS", 60)
+    stopped = threading.Event()
+
+    def beat():
+        # The first beat goes out right away: claiming a job does not touch
+        # updated_at, which may still date from when it was queued
+        try:
+            while True:
+                try:
+                    ImportJob.objects.filter(pk=job.pk, status="running").update(
+                        updated_at=timezone.now()
+                    )
+                except DatabaseError:
+                    pass  # e.g. SQLite locked by the chunk; try next beat
+                if stopped.wait(interval):
+                    return
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"import-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def is_salary_preview(job):
+    return job.kind == "salary" and not job.options.get("apply")
+
+
+def release_import_file(job):
+    """Delete the uploaded file of a finished job (and clear it on every job
+    sharing it), unless a job still needs it: a finished salary preview keeps
+    it for the confirmed import, which deletes it in turn."""
+    name = job.file.name
+    if not name:
+        return
+    if is_salary_preview(job) and job.status == "done":
+        return
+    if (
+        ImportJob.objects.filter(file=name, status__in=ACTIVE_STATUSES)
+        .exclude(pk=job.pk)
+        .exists()
+    ):
+        return
+    job.file.storage.delete(name)
+    ImportJob.objects.filter(file=name).update(file="")
+    job.file.name = ""
+
+
+def run_import_job(job):
+    """Import the file of a claimed job and mark it done or failed.
+
+    Each chunk commits together with the job's progress, so a rerun of the
+    same job continues after ``rows_committed`` with the saved report.
+    """
+    importer = IMPORTERS[job.kind](**job.options)
+    resumed_from = job.rows_committed
+    if resumed_from:
+        importer.report = ImportReport.from_dict(job.report)
+        for name in IMPORT_STATE_ATTRIBUTES:
+            if hasattr(importer, name):
+                setattr(importer, name, job.report.get(name, getattr(importer, name)))
+
+    started = time.monotonic()
+
+    def progress(done):
+        job.rows_processed = job.rows_committed = done
+        job.rows_failed = sum(importer.report.counts.get(s, 0) for s in IMPORT_FAILED_STATUSES)
+        job.rows_per_second = (done - resumed_from) / max(time.monotonic() - started, 1e-6)
+        job.report = _import_state(importer)
+        job.save(update_fields=[
+            "rows_processed", "rows_committed", "rows_failed", "rows_per_second",
+            "report", "updated_at",
+        ])
+
+    try:
+        with import_heartbeat(job), job.file.open("rb") as file:
+            if job.rows_total is None:
+                job.rows_total = count_rows(file)
+                job.save(update_fields=["rows_total", "updated_at"])
+
+            ingest(
+                file,
+                importer,
+                chunk_rows=job.chunk_rows,
+                progress=progress,
+                start_row=resumed_from,
+                commit_every_chunk=True,
+            )
+
+        job.report = _import_state(importer)
+        job.report.pop("seen", None)  # only needed while the job runs
+        job.rows_total = job.rows_processed
+        job.status = "done"
+        job.error = ""
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    release_import_file(job)
+    job.save()
+    return job
+
+
+def requeue_stale_imports(now=None):
+    """Put "running" jobs whose worker stopped sending heartbeats back in the
+    queue; they resume from their last committed chunk.
+    """
+    stale = getattr(settings, "IMPORT_JOB_STALE_SECONDS", 10 * 60)
+    cutoff = (now or timezone.now()) - timedelta(seconds=stale)
+    return ImportJob.objects.filter(status="running", updated_at__lt=cutoff).update(
+        status="queued"
+    )
+
+
+def evict_old_import_files(now=None):
+    """Delete uploaded files of import jobs finished longer than the TTL ago,
+    i.e. salary previews that were never confirmed.
+
+    A preview and its confirmed salary import share one file; it goes once
+    the last job using it is old enough.
+    """
+    ttl = getattr(settings, "IMPORT_FILE_TTL_SECONDS", 24 * 60 * 60)
+    cutoff = (now or timezone.now()) - timedelta(seconds=ttl)
+
+    old = ImportJob.objects.filter(finished_at__lt=cutoff).exclude(file="")
+    recent = set(
+        ImportJob.objects.exclude(finished_at__lt=cutoff)
+        .exclude(file="")
+        .values_list("file", flat=True)
+    )
+
+    names = set(old.values_list("file", flat=True)) - recent
+    for name in names:
+        ImportJob.file.field.storage.delete(name)
+    old.update(file="")
+    return len(names)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from hybbconnect.archives import archive_cutoff, archive_months, archive_old_photos
+
+
+class Command(BaseCommand):
+    help = (
+        "Move order photo originals older than PHOTO_ARCHIVE_AFTER_DAYS (whole "
+        "months only) into one ZIP per location and month. The originals are "
+        "left for gc_photo_storage; thumbnails stay where they are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, help="Overrides PHOTO_ARCHIVE_AFTER_DAYS."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="List the months that would be archived."
+        )
+
+    def handle(self, *args, **options):
+        days = options["older_than_days"]
+
+        if options["dry_run"]:
+            cutoff = archive_cutoff(days)
+            self.stdout.write(f"Photos before {cutoff:%Y-%m-%d}:")
+            for location_id, month, count in archive_months(cutoff):
+                self.stdout.write(f"  location {location_id}, {month:%Y-%m}: {count} photo(s)")
+            return
+
+        archives = photos = 0
+        for archive, missing in archive_old_photos(days):
+            for photo in missing:
+                self.stderr.write(f"Photo {photo.id}: original not found ({photo.photo.name})")
+            if archive is None:
+                continue
+            archives += 1
+            photos += archive.photo_count
+            self.stdout.write(
+                f"  {archive.name}: {archive.photo_count} photo(s), "
+                f"{archive.size / 1024 / 1024:.1f} MB"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {photos} photo(s) into {archives} file(s).")
+        )
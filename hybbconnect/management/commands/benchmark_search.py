@@ -0,0 +1,124 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from hybbconnect.models import CustomUser, KitchenLog
+from hybbconnect.search import kitchen_log_document, search
+
+FIRST_NAMES = ["Arun", "Priya", "Ravi", "Sneha", "Kiran", "Divya", "Manoj", "Lakshmi", "Suresh", "Anita"]
+LAST_NAMES = ["Kumar", "Reddy", "Sharma", "Nair", "Rao", "Iyer", "Das", "Singh", "Patel", "Menon"]
+LOCATIONS = ["HSR", "KORAMANGALA", "INDIRANAGAR", "WHITEFIELD", "JAYANAGAR"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old icontains kitchen log filter with search.py on synthetic rows. "
+        "Everything is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--staff", type=int, default=2_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, rows, staff, repeat, **options):
+        with transaction.atomic():
+            self._populate(rows, staff)
+            self._run(repeat)
+            transaction.set_rollback(True)
+
+    # -----------------------------------------
+    # Synthetic data
+    # -----------------------------------------
+    def _populate(self, rows, staff_count):
+        rng = random.Random(42)
+        started = time.perf_counter()
+
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    username=f"bench_{i}",
+                    employee_id=f"BEN{i:05d}",
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    role="kitchen_staff",
+                    password="!",
+                )
+                for i in range(staff_count)
+            ],
+            batch_size=1000,
+        )
+
+        categories = [value for value, _ in KitchenLog.CATEGORY_CHOICES]
+        batch = []
+        for i in range(rows):
+            # A third of the rows are old logs with only emp_id / emp_name
+            if i % 3:
+                log = KitchenLog(staff=rng.choice(users))
+            else:
+                log = KitchenLog(
+                    emp_id=f"OLD{i:07d}",
+                    emp_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                )
+            log.location = rng.choice(LOCATIONS)
+            log.category = rng.choice(categories)
+            log.search_document = kitchen_log_document(log)
+            batch.append(log)
+
+            if len(batch) >= 5000:
+                KitchenLog.objects.bulk_create(batch)
+                batch = []
+        KitchenLog.objects.bulk_create(batch)
+
+        self.stdout.write(
+            f"Inserted {rows} log(s) for {staff_count} staff in {time.perf_counter() - started:.1f}s"
+        )
+
+    # -----------------------------------------
+    # Timing
+    # -----------------------------------------
+    def _time(self, build, repeat):
+        first_page, counts = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build().order_by("-created_at", "-id")[:50])
+            first_page.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            build().count()
+            counts.append(time.perf_counter() - started)
+        return statistics.median(first_page) * 1000, statistics.median(counts) * 1000
+
+    def _run(self, repeat):
+        logs = KitchenLog.objects.select_related("staff")
+
+        def old_name(term):
+            return logs.filter(
+                Q(staff__first_name__icontains=term)
+                | Q(staff__last_name__icontains=term)
+                | Q(staff__username__icontains=term)
+                | Q(emp_name__icontains=term)
+            )
+
+        def old_id(term):
+            return logs.filter(Q(staff__employee_id__icontains=term) | Q(emp_id__icontains=term))
+
+        cases = [
+            ("name", "Priya", old_name),
+            ("name, rare", "bench_1234", old_name),
+            ("employee id", "BEN01234", old_id),
+            ("no match", "zzzz", old_name),
+        ]
+
+        self.stdout.write(f"{'query':<14}{'term':<12}{'path':<10}{'page 1 ms':>12}{'count ms':>12}")
+        for label, term, old in cases:
+            for path, build in (
+                ("icontains", lambda: old(term)),
+                ("search", lambda: search(logs, term)),
+            ):
+                page_ms, count_ms = self._time(build, repeat)
+                self.stdout.write(f"{label:<14}{term:<12}{path:<10}{page_ms:>12.1f}{count_ms:>12.1f}")
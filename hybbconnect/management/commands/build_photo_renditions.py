@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from hybbconnect.models import OrderPhoto
+from hybbconnect.renditions import RENDITION_ERRORS, render_image, store_renditions
+
+PHOTO_STORAGE = OrderPhoto._meta.get_field("photo").storage
+
+
+def _init_render_worker(settings_module):
+    # Needed when the pool spawns instead of forking (macOS / Windows)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+def _render_stored(name):
+    """Rendition of the stored file ``name``, or the error it failed with."""
+    try:
+        with PHOTO_STORAGE.open(name, "rb") as source:
+            return render_image(source), None
+    except RENDITION_ERRORS as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encode stored order photos (upright, no EXIF, capped size) and "
+        "generate their thumbnails. Image work runs in a process pool; the "
+        "replaced originals are left for gc_photo_storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also redo photos that already have a thumbnail.",
+        )
+
+    def handle(self, *args, **options):
+        photos = OrderPhoto.objects.exclude(Q(photo="") | Q(photo__isnull=True))
+        if not options["all"]:
+            photos = photos.filter(thumbnail="")
+
+        ids = list(photos.order_by("id").values_list("id", flat=True))
+        self.stdout.write(f"{len(ids)} photo(s) to process")
+
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        done = failed = 0
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_render_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "iconnect.settings"),),
+            )
+
+        try:
+            for start in range(0, len(ids), batch_size):
+                batch = list(OrderPhoto.objects.filter(id__in=ids[start:start + batch_size]))
+                names = [photo.photo.name for photo in batch]
+                results = pool.map(_render_stored, names) if pool else map(_render_stored, names)
+
+                for photo, (rendition, error) in zip(batch, results):
+                    if error:
+                        failed += 1
+                        self.stderr.write(f"Photo {photo.id} ({photo.photo.name}): {error}")
+                        continue
+
+                    store_renditions(photo, *rendition)
+                    photo.save(update_fields=["photo", "thumbnail", "width", "height"])
+                    done += 1
+
+                self.stdout.write(f"  {done + failed} / {len(ids)}")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {done} photo(s), {failed} failed."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hybbconnect.uploads import expire_upload_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete resumable photo upload sessions (and their part files) idle past the TTL."
+
+    def handle(self, *args, **options):
+        deleted = expire_upload_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} upload session(s)."))
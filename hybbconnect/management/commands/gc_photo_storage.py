@@ -0,0 +1,156 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hybbconnect.blobs import (
+    BLOB_GRACE,
+    PHOTO_FILE_FIELDS,
+    PHOTO_STORAGE,
+    rebuild_blob_refs,
+    unreferenced_blobs,
+)
+from hybbconnect.models import OrderPhoto, StoredBlob
+from hybbconnect.storage import file_digest, name_digest
+
+SHARD_RE = re.compile(r"[0-9a-f]{2}")
+DELETE_BATCH = 500
+
+
+def _walk(path):
+    dirs, files = PHOTO_STORAGE.listdir(path)
+    names = [f"{path}/{name}" for name in files]
+    for directory in dirs:
+        names.extend(_walk(f"{path}/{directory}"))
+    return names
+
+
+def _plan(path):
+    """Split the tree under ``path`` into units of work: every shard directory
+    is walked as one unit, loose files of a directory form another."""
+    dirs, files = PHOTO_STORAGE.listdir(path)
+    units = [[f"{path}/{name}" for name in files]] if files else []
+    for directory in dirs:
+        sub = f"{path}/{directory}"
+        if SHARD_RE.fullmatch(directory):
+            units.append(sub)
+        else:
+            units.extend(_plan(sub))
+    return units
+
+
+def _scan(unit, verify):
+    """``(name, size, modified, digest matches)`` for each file in ``unit``."""
+    names = _walk(unit) if isinstance(unit, str) else unit
+    found = []
+    for name in names:
+        intact = None
+        expected = name_digest(name)
+        if verify and expected:
+            with PHOTO_STORAGE.open(name, "rb") as content:
+                intact = file_digest(content) == expected
+        found.append(
+            (name, PHOTO_STORAGE.size(name), PHOTO_STORAGE.get_modified_time(name), intact)
+        )
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount photo file references, then scan the photo storage in parallel "
+        "for orphaned, missing and (with --verify) corrupt files. Nothing is "
+        "deleted without --delete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--verify", action="store_true", help="Re-hash every content-addressed file."
+        )
+        parser.add_argument(
+            "--delete", action="store_true", help="Delete orphaned files and their blob rows."
+        )
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=BLOB_GRACE.total_seconds() / 3600,
+            help="Leave files unreferenced for less than this long alone.",
+        )
+
+    def handle(self, *args, **options):
+        grace = timedelta(hours=options["grace_hours"])
+        cutoff = timezone.now() - grace
+
+        changed, created = rebuild_blob_refs()
+        self.stdout.write(f"Reference counts: {changed} corrected, {created} blob(s) added")
+
+        roots = {
+            os.path.normpath(OrderPhoto._meta.get_field(field).upload_to).split(os.sep)[0]
+            for field in PHOTO_FILE_FIELDS
+        }
+        units = [unit for root in roots if PHOTO_STORAGE.exists(root) for unit in _plan(root)]
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            scanned = [
+                row
+                for rows in pool.map(lambda unit: _scan(unit, options["verify"]), units)
+                for row in rows
+            ]
+
+        referenced = set(StoredBlob.objects.filter(refs__gt=0).values_list("name", flat=True))
+        on_disk = {name for name, _, _, _ in scanned}
+
+        orphans = [
+            (name, size) for name, size, modified, _ in scanned
+            if name not in referenced and modified < cutoff
+        ]
+        corrupt = [name for name, _, _, intact in scanned if intact is False]
+        missing = sorted(referenced - on_disk)
+
+        self.stdout.write(f"Scanned {len(scanned)} file(s) in {len(units)} unit(s)")
+        for name in corrupt:
+            self.stderr.write(f"Corrupt (content does not match name): {name}")
+        for name in missing:
+            self.stderr.write(f"Missing (referenced, not in storage): {name}")
+
+        orphan_bytes = sum(size for _, size in orphans)
+        self.stdout.write(
+            f"{len(orphans)} orphaned file(s), {orphan_bytes / 1024 / 1024:.1f} MB"
+        )
+
+        if not options["delete"]:
+            if orphans:
+                self.stdout.write("Run with --delete to remove them.")
+            return
+
+        deleted = 0
+        names = [name for name, _ in orphans]
+        for start in range(0, len(names), DELETE_BATCH):
+            batch = names[start:start + DELETE_BATCH]
+            # A new upload may have re-used one of these files since the scan
+            reused = set(
+                StoredBlob.objects.filter(name__in=batch)
+                .exclude(refs__lte=0, updated_at__lt=cutoff)
+                .values_list("name", flat=True)
+            )
+            for name in batch:
+                if name not in reused:
+                    PHOTO_STORAGE.delete(name)
+                    deleted += 1
+            StoredBlob.objects.filter(name__in=set(batch) - reused, refs__lte=0).delete()
+
+        # Rows for files that were already gone
+        gone = [
+            blob_id
+            for blob_id, name in unreferenced_blobs(grace).values_list("id", "name").iterator()
+            if name not in on_disk
+        ]
+        stale = 0
+        for start in range(0, len(gone), DELETE_BATCH):
+            stale += StoredBlob.objects.filter(id__in=gone[start:start + DELETE_BATCH]).delete()[0]
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} file(s) and {stale} stale blob row(s).")
+        )
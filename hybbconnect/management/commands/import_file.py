@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hybbconnect.importers import IMPORTERS, SalaryImport
+from hybbconnect.ingest import CHUNK_ROWS, ingest
+
+
+class Command(BaseCommand):
+    help = "Import a large users / staff performance / salary CSV or XLSX file in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Salary only: report the diff without saving."
+        )
+
+    def handle(self, *args, kind, path, chunk_rows, dry_run, **options):
+        if kind == "salary":
+            importer = SalaryImport(apply=not dry_run)
+        elif dry_run:
+            raise CommandError("--dry-run is only supported for salary imports.")
+        else:
+            importer = IMPORTERS[kind]()
+
+        def progress(rows):
+            self.stdout.write(f"  {rows} row(s) read")
+
+        try:
+            with open(path, "rb") as file:
+                report = ingest(file, importer, chunk_rows=chunk_rows, progress=progress)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        for row in report.rows:
+            self.stdout.write(f"  line {row['line']}: {row['status']} {row['key']} {row['message']}")
+        if report.omitted:
+            self.stdout.write(f"  ...and {report.omitted} more")
+        self.stdout.write(self.style.SUCCESS(report.summary()))
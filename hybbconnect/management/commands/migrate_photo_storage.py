@@ -0,0 +1,79 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from hybbconnect.blobs import PHOTO_FILE_FIELDS, PHOTO_STORAGE
+from hybbconnect.models import OrderPhoto
+from hybbconnect.storage import name_digest
+
+
+def _legacy_fields(photo):
+    """File fields of ``photo`` still stored under a pre-hashing (flat) name."""
+    return [
+        field for field in PHOTO_FILE_FIELDS
+        if getattr(photo, field).name and name_digest(getattr(photo, field).name) is None
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Move order photos stored under their upload names (order_photos/IMG_1234.jpg) "
+        "to content-addressed names, so identical files are stored once and counted "
+        "in the blob references. The bytes are not re-encoded. The flat originals "
+        "are left for gc_photo_storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count the photos that would be moved."
+        )
+
+    def handle(self, *args, **options):
+        has_file = Q()
+        for field in PHOTO_FILE_FIELDS:
+            has_file |= ~Q(**{field: ""}) & Q(**{f"{field}__isnull": False})
+
+        ids = [
+            photo_id
+            for photo_id, *names in OrderPhoto.objects.filter(has_file)
+            .order_by("id")
+            .values_list("id", *PHOTO_FILE_FIELDS)
+            .iterator()
+            if any(name and name_digest(name) is None for name in names)
+        ]
+        self.stdout.write(f"{len(ids)} photo(s) with flat file names")
+        if options["dry_run"]:
+            return
+
+        batch_size = options["batch_size"]
+        moved = missing = 0
+        for start in range(0, len(ids), batch_size):
+            for photo in OrderPhoto.objects.filter(id__in=ids[start:start + batch_size]):
+                fields = []
+                for field in _legacy_fields(photo):
+                    file = getattr(photo, field)
+                    name = file.name
+                    try:
+                        with PHOTO_STORAGE.open(name, "rb") as content:
+                            # The storage names the copy by its hash, or returns
+                            # the existing file with the same bytes
+                            file.save(os.path.basename(name), File(content), save=False)
+                    except FileNotFoundError:
+                        missing += 1
+                        self.stderr.write(f"Photo {photo.id}: {field} not found ({name})")
+                        continue
+                    fields.append(field)
+
+                if fields:
+                    # Signals move the blob references to the new names
+                    photo.save(update_fields=fields)
+                    moved += len(fields)
+
+            self.stdout.write(f"  {min(start + batch_size, len(ids))} / {len(ids)}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved {moved} file(s), {missing} missing.")
+        )
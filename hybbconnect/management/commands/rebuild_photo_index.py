@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hybbconnect.photo_index import rebuild_photo_index
+
+
+class Command(BaseCommand):
+    help = "Recompute the OrderPhotoIndex row of every order photo (gallery filters)."
+
+    def handle(self, *args, **options):
+        indexed = rebuild_photo_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} photo(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from hybbconnect.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Recompute search documents and rebuild the kitchen log / ticket search index."
+
+    def handle(self, *args, **options):
+        written = rebuild_search_index()
+        for label, count in written.items():
+            self.stdout.write(f"{label}: {count} document(s) updated")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
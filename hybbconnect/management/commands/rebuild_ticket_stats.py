@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hybbconnect.rollups import rebuild_ticket_stats
+from hybbconnect.routing import rebuild_owner_workload
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TicketStatsRollup table and owner open-ticket counts from scratch."
+
+    def handle(self, *args, **options):
+        buckets = rebuild_ticket_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ticket stats: {buckets} bucket(s)."))
+        owners = rebuild_owner_workload()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt owner workload: {owners} owner(s)."))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hybbconnect.jobs import (
+    claim_next_job,
+    evict_expired_exports,
+    requeue_stale_exports,
+    run_export_job,
+)
+from hybbconnect.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Process queued export jobs, requeue stalled ones and evict expired export files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll", type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_exports()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stalled export(s).")
+            evicted = evict_expired_exports()
+            if evicted:
+                self.stdout.write(f"Evicted {evicted} expired export(s).")
+
+            job = claim_next_job(ExportJob)
+            while job is not None:
+                job = run_export_job(job)
+                self.stdout.write(f"{job}: {job.row_count} rows {job.error}".rstrip())
+                job = claim_next_job(ExportJob)
+
+            if options["once"]:
+                return
+            time.sleep(options["poll"])
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hybbconnect.jobs import (
+    claim_next_job,
+    evict_old_import_files,
+    requeue_stale_imports,
+    run_import_job,
+)
+from hybbconnect.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = "Process queued admin upload imports; resume imports whose worker died."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll", type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_imports()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stalled import(s).")
+            evicted = evict_old_import_files()
+            if evicted:
+                self.stdout.write(f"Deleted {evicted} old upload file(s).")
+
+            job = claim_next_job(ImportJob)
+            while job is not None:
+                job = run_import_job(job)
+                self.stdout.write(
+                    f"{job}: {job.rows_processed} rows, {job.rows_failed} failed, "
+                    f"{job.rows_per_second:.0f} rows/s {job.error}".rstrip()
+                )
+                job = claim_next_job(ImportJob)
+
+            if options["once"]:
+                return
+            time.sleep(options["poll"])
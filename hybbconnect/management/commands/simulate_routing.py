@@ -0,0 +1,135 @@
+import heapq
+import statistics
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hybbconnect.metrics import CLOSED_STATUSES
+from hybbconnect.models import Ticket
+from hybbconnect.routing import RoutingTable
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay historical tickets through the current routing rules and compare each "
+        "owner's open-ticket queue with what actually happened. Nothing is written. "
+        "Queues start empty, so tickets raised before the window are not counted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None,
+            help="Only replay tickets raised in the last N days (default: all).",
+        )
+
+    def handle(self, *args, days, **options):
+        tickets = Ticket.objects.order_by("created_at", "id")
+        if days:
+            tickets = tickets.filter(created_at__gte=timezone.now() - timedelta(days=days))
+
+        events = [
+            (
+                created_at,
+                concern_category or concern,
+                location_id,
+                owner_id,
+                closed_at or (updated_at if status in CLOSED_STATUSES else None),
+            )
+            for created_at, concern_category, concern, location_id, owner_id, status, closed_at, updated_at
+            in tickets.values_list(
+                "created_at", "concern_category", "concern", "location_id",
+                "assigned_owner_id", "status", "closed_at", "updated_at",
+            ).iterator(chunk_size=5000)
+        ]
+        if not events:
+            self.stdout.write("No tickets to replay.")
+            return
+
+        table = RoutingTable()
+
+        actual = self._replay(events, lambda event, open_counts: event[3])
+
+        def by_rules(event, open_counts):
+            owner_id = table.route(event[1], event[2], open_counts)
+            if owner_id is None and table.owners:
+                # Same fallback as route_ticket(): fewest open, then lowest id
+                owner_id = min(table.owners, key=lambda o: (open_counts.get(o, 0), o))
+            return owner_id
+
+        started = time.perf_counter()
+        simulated = self._replay(events, by_rules)
+        elapsed = time.perf_counter() - started
+
+        self._report(table, len(events), actual, simulated)
+        self.stdout.write(
+            f"Routed {len(events)} tickets in {elapsed:.2f}s "
+            f"({len(events) / max(elapsed, 1e-9):,.0f} tickets/s)."
+        )
+
+    # -----------------------------------------
+    # Replay
+    # -----------------------------------------
+    def _replay(self, events, choose):
+        """Per-owner stats for one assignment policy.
+
+        Each owner's queue is sampled when a ticket arrives for them: mean
+        and peak are the open tickets they already had at that moment.
+        """
+        open_counts = defaultdict(int)
+        closing = []  # heap of (closed_at, owner_id)
+        stats = defaultdict(lambda: {"tickets": 0, "samples": []})
+
+        for event in events:
+            created_at = event[0]
+            while closing and closing[0][0] <= created_at:
+                _, owner_id = heapq.heappop(closing)
+                open_counts[owner_id] -= 1
+
+            owner_id = choose(event, open_counts)
+            if owner_id is None:
+                continue
+
+            stats[owner_id]["tickets"] += 1
+            stats[owner_id]["samples"].append(open_counts[owner_id])
+            open_counts[owner_id] += 1
+            if event[4] is not None:
+                heapq.heappush(closing, (event[4], owner_id))
+
+        return stats
+
+    def _report(self, table, total, actual, simulated):
+        names = {owner_id: owner.username for owner_id, owner in table.owners.items()}
+        header = f"{'owner':<20} {'tickets':>15} {'mean queue':>15} {'peak queue':>15}"
+        self.stdout.write(f"{total} tickets replayed; columns are historical → simulated.")
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        def cell(stats, owner_id, key):
+            entry = stats.get(owner_id)
+            if entry is None:
+                return "0"
+            samples = entry["samples"]
+            if key == "tickets":
+                return str(entry["tickets"])
+            if key == "mean":
+                return f"{statistics.fmean(samples):.1f}"
+            return str(max(samples))
+
+        for owner_id in sorted(set(actual) | set(simulated)):
+            name = names.get(owner_id, f"#{owner_id}")
+            row = [
+                f"{cell(actual, owner_id, key)} → {cell(simulated, owner_id, key)}"
+                for key in ("tickets", "mean", "peak")
+            ]
+            self.stdout.write(f"{name:<20} {row[0]:>15} {row[1]:>15} {row[2]:>15}")
+
+        for label, stats in (("historical", actual), ("simulated", simulated)):
+            peaks = [max(entry["samples"]) for entry in stats.values()]
+            if peaks:
+                self.stdout.write(
+                    f"{label}: worst peak queue {max(peaks)}, "
+                    f"peak spread (stdev) {statistics.pstdev(peaks):.1f}"
+                )
@@ -0,0 +1,94 @@
+# metrics.py — cached dashboard counters
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import CustomUser, Ticket, TicketStatsRollup
+from .rollups import ticket_trend
+
+ADMIN_METRICS_CACHE_KEY = "hybbconnect:admin_dashboard_metrics"
+
+ADMIN_METRICS_TTL = 5 * 60
+
+CLOSED_STATUSES = ("Resolved", "Closed", "Confirmed", "Rejected")
+
+
+def _status_key(status):
+    return "status_" + status.lower().replace(" ", "_")
+
+
+def compute_admin_metrics():
+    """All admin dashboard counters: one aggregate per table plus breakdowns.
+
+    User counts come from CustomUser; ticket counts from the stats rollup.
+    """
+    users = CustomUser.objects.aggregate(
+        total_users=Count("id"),
+        active_users=Count("id", filter=Q(is_active=True)),
+        inactive_users=Count("id", filter=Q(is_active=False)),
+    )
+
+    # Ticket side reads the pre-aggregated rollup (see rollups.py)
+    rollup = TicketStatsRollup.objects.all()
+    is_open = ~Q(status__in=CLOSED_STATUSES)
+
+    ticket_counts = rollup.aggregate(
+        total_tickets=Coalesce(Sum("count"), 0),
+        open_tickets=Coalesce(Sum("count", filter=is_open), 0),
+        sla_breached=Coalesce(Sum("sla_breached"), 0),
+        **{
+            _status_key(status): Coalesce(Sum("count", filter=Q(status=status)), 0)
+            for status, _ in Ticket.STATUS_CHOICES
+        },
+    )
+
+    by_status = [
+        {"status": label, "count": ticket_counts[_status_key(status)]}
+        for status, label in Ticket.STATUS_CHOICES
+    ]
+
+    by_location = list(
+        rollup.values("location_id", "location__name")
+        .annotate(total=Sum("count"), open=Coalesce(Sum("count", filter=is_open), 0))
+        .filter(total__gt=0)
+        .order_by("-total")
+    )
+
+    by_owner = list(
+        rollup.values("assigned_owner_id", "assigned_owner__username")
+        .annotate(total=Sum("count"), open=Coalesce(Sum("count", filter=is_open), 0))
+        .filter(total__gt=0)
+        .order_by("-total")
+    )
+
+    categories = list(
+        Ticket.objects.order_by("concern").values_list("concern", flat=True).distinct()
+    )
+
+    return {
+        **users,
+        "total_tickets": ticket_counts["total_tickets"],
+        "open_tickets": ticket_counts["open_tickets"],
+        "sla_breached": ticket_counts["sla_breached"],
+        "pending_tickets": ticket_counts[_status_key("Pending")],
+        "resolved_tickets": ticket_counts[_status_key("Resolved")],
+        "tickets_by_status": by_status,
+        "tickets_by_location": by_location,
+        "tickets_by_owner": by_owner,
+        "locations": [row["location_id"] for row in by_location],
+        "categories": categories,
+        "ticket_trend": ticket_trend(14),
+    }
+
+
+def get_admin_metrics():
+    metrics = cache.get(ADMIN_METRICS_CACHE_KEY)
+    if metrics is None:
+        metrics = compute_admin_metrics()
+        cache.set(ADMIN_METRICS_CACHE_KEY, metrics, ADMIN_METRICS_TTL)
+    return metrics
+
+
+def invalidate_admin_metrics():
+    cache.delete(ADMIN_METRICS_CACHE_KEY)
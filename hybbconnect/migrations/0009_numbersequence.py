@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+def seed_ticket_sequence(apps, schema_editor):
+    # Continue from the highest TIK-NNNNN already issued
+    Ticket = apps.get_model("hybbconnect", "Ticket")
+    NumberSequence = apps.get_model("hybbconnect", "NumberSequence")
+
+    last_value = 0
+    numbers = Ticket.objects.filter(ticket_number__startswith="TIK-").values_list(
+        "ticket_number", flat=True
+    )
+    for number in numbers.iterator():
+        suffix = number.split("-", 1)[1]
+        if suffix.isdigit():
+            last_value = max(last_value, int(suffix))
+
+    NumberSequence.objects.update_or_create(
+        name="ticket", defaults={"last_value": last_value}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0008_stafftimeupdate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NumberSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_ticket_sequence, migrations.RunPython.noop),
+    ]
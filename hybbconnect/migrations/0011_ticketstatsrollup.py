@@ -0,0 +1,116 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+
+
+def build_rollup(apps, schema_editor):
+    Ticket = apps.get_model("hybbconnect", "Ticket")
+    TicketStatsRollup = apps.get_model("hybbconnect", "TicketStatsRollup")
+
+    breached = Q(closed_at__gt=F("created_at") + timedelta(hours=48))
+    rows = (
+        Ticket.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "location_id", "concern_category", "assigned_owner_id", "status")
+        .annotate(n=Count("id"), n_breached=Count("id", filter=breached))
+        .order_by()
+    )
+
+    merged = {}
+    for row in rows.iterator():
+        key = (
+            row["day"],
+            row["location_id"],
+            row["concern_category"] or "",
+            row["assigned_owner_id"],
+            row["status"],
+        )
+        count, n_breached = merged.get(key, (0, 0))
+        merged[key] = (count + row["n"], n_breached + row["n_breached"])
+
+    TicketStatsRollup.objects.bulk_create(
+        [
+            TicketStatsRollup(
+                date=key[0],
+                location_id=key[1],
+                concern_category=key[2],
+                assigned_owner_id=key[3],
+                status=key[4],
+                count=count,
+                sla_breached=n_breached,
+            )
+            for key, (count, n_breached) in merged.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0010_exportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketStatsRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "concern_category",
+                    models.CharField(blank=True, default="", max_length=200),
+                ),
+                ("status", models.CharField(max_length=20)),
+                ("count", models.IntegerField(default=0)),
+                ("sla_breached", models.IntegerField(default=0)),
+                (
+                    "assigned_owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="hybbconnect.location",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "date",
+                            "location",
+                            "concern_category",
+                            "assigned_owner",
+                            "status",
+                        ),
+                        name="unique_ticket_stats_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
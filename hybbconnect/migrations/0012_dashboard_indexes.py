@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0011_ticketstatsrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kitchenlog",
+            index=models.Index(
+                fields=["location", "-created_at"], name="klog_location_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kitchenlog",
+            index=models.Index(fields=["emp_id"], name="klog_emp_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="orderphoto",
+            index=models.Index(
+                fields=["location", "-uploaded_at"], name="photo_location_uploaded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stafftimeupdate",
+            index=models.Index(
+                fields=["staff", "-updated_at"], name="stafftime_staff_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["assigned_owner", "-created_at"],
+                name="ticket_owner_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["employee", "-created_at"], name="ticket_employee_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["reassigned_to", "-created_at"],
+                name="ticket_reassign_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["location", "-created_at"], name="ticket_location_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="ticket_created_idx"
+            ),
+        ),
+    ]
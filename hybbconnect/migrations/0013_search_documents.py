@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+def _join(*parts):
+    return " ".join(str(part) for part in parts if part)
+
+
+def fill_search_documents(apps, schema_editor):
+    KitchenLog = apps.get_model("hybbconnect", "KitchenLog")
+    Ticket = apps.get_model("hybbconnect", "Ticket")
+
+    batch = []
+    for log in KitchenLog.objects.select_related("staff").iterator(chunk_size=1000):
+        staff = log.staff
+        log.search_document = _join(
+            log.emp_id,
+            log.emp_name,
+            staff and staff.employee_id,
+            staff and staff.username,
+            staff and staff.first_name,
+            staff and staff.last_name,
+            log.location,
+            log.category,
+        )
+        batch.append(log)
+        if len(batch) >= 1000:
+            KitchenLog.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    KitchenLog.objects.bulk_update(batch, ["search_document"])
+
+    batch = []
+    for ticket in Ticket.objects.select_related("employee", "location").iterator(
+        chunk_size=1000
+    ):
+        ticket.search_document = _join(
+            ticket.ticket_number,
+            ticket.employee_code,
+            ticket.name,
+            ticket.employee.username,
+            ticket.employee.employee_id,
+            ticket.location and ticket.location.name,
+            ticket.concern,
+        )
+        batch.append(ticket)
+        if len(batch) >= 1000:
+            Ticket.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    Ticket.objects.bulk_update(batch, ["search_document"])
+
+
+def create_search_index(apps, schema_editor):
+    from hybbconnect.search import install_search_index
+
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from hybbconnect.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0012_dashboard_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kitchenlog",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Conflicts listed in the error; the rest are counted
+MAX_LISTED = 50
+
+
+def check_duplicate_months(apps, schema_editor):
+    """Refuse to add the constraint while an (employee, month) has several rows.
+
+    Which row is right is an HR decision, so nothing is deleted here: the
+    conflicting rows are listed for an operator to merge or remove (admin or
+    shell) before running migrate again.
+    """
+    StaffPerformance = apps.get_model("hybbconnect", "StaffPerformance")
+
+    duplicates = list(
+        StaffPerformance.objects.values("employee_id", "month")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .order_by("employee_id", "month")
+    )
+    if not duplicates:
+        return
+
+    lines = []
+    for row in duplicates[:MAX_LISTED]:
+        ids = StaffPerformance.objects.filter(
+            employee_id=row["employee_id"], month=row["month"]
+        ).values_list("id", flat=True)
+        lines.append(
+            f"  employee {row['employee_id']}, month {row['month']!r}: "
+            f"StaffPerformance ids {sorted(ids)}"
+        )
+    if len(duplicates) > MAX_LISTED:
+        lines.append(f"  ... and {len(duplicates) - MAX_LISTED} more")
+
+    raise RuntimeError(
+        "Cannot add unique_staff_performance_month: "
+        f"{len(duplicates)} (employee, month) pairs have more than one "
+        "StaffPerformance row. Keep one row per pair, then run migrate again.\n"
+        + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0013_search_documents"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_months, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="staffperformance",
+            constraint=models.UniqueConstraint(
+                fields=("employee", "month"), name="unique_staff_performance_month"
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Conflicts listed in the error; the rest are counted
+MAX_LISTED = 50
+
+
+def check_duplicate_slips(apps, schema_editor):
+    """Refuse to add the constraint while an (employee, month, year) has several slips.
+
+    Which slip is right is a payroll decision, so nothing is deleted here: the
+    conflicting slips are listed for an operator to merge or remove (admin or
+    shell) before running migrate again.
+    """
+    SalarySlip = apps.get_model("hybbconnect", "SalarySlip")
+
+    duplicates = list(
+        SalarySlip.objects.values("employee_id", "month", "year")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .order_by("employee_id", "year", "month")
+    )
+    if not duplicates:
+        return
+
+    lines = []
+    for row in duplicates[:MAX_LISTED]:
+        ids = SalarySlip.objects.filter(
+            employee_id=row["employee_id"], month=row["month"], year=row["year"]
+        ).values_list("id", flat=True)
+        lines.append(
+            f"  employee {row['employee_id']}, {row['month']} {row['year']}: "
+            f"SalarySlip ids {sorted(ids)}"
+        )
+    if len(duplicates) > MAX_LISTED:
+        lines.append(f"  ... and {len(duplicates) - MAX_LISTED} more")
+
+    raise RuntimeError(
+        "Cannot add unique_salary_slip_period: "
+        f"{len(duplicates)} (employee, month, year) periods have more than one "
+        "SalarySlip. Keep one slip per period, then run migrate again.\n"
+        + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0014_staffperformance_unique_month"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_slips, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="salaryslip",
+            constraint=models.UniqueConstraint(
+                fields=("employee", "month", "year"), name="unique_salary_slip_period"
+            ),
+        ),
+    ]
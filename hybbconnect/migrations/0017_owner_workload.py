@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+CLOSED_STATUSES = ("Resolved", "Closed", "Rejected")
+
+
+def count_open_tickets(apps, schema_editor):
+    Ticket = apps.get_model("hybbconnect", "Ticket")
+    OwnerWorkload = apps.get_model("hybbconnect", "OwnerWorkload")
+
+    counts = (
+        Ticket.objects.filter(assigned_owner__isnull=False)
+        .exclude(status__in=CLOSED_STATUSES)
+        .values("assigned_owner_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    OwnerWorkload.objects.bulk_create(
+        [
+            OwnerWorkload(owner_id=row["assigned_owner_id"], open_tickets=row["n"])
+            for row in counts
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0016_import_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OwnerWorkload",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="workload",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("open_tickets", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_open_tickets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The hard-coded map routing.py used before rules were configurable
+CATEGORY_OWNER_MAP = {
+    "Training Related": "E010",
+    "Critical Intervention - Cletus": "E011",
+    "MIS Related": "E012",
+    "HR Related": "E013",
+    "Leave Request": "E013",
+    "PF Related Issue": "E013",
+    "Bank Account Issue": "E013",
+    "Request a call Back": "E013",
+    "Quality Related": "E014",
+    "Salary Message not received": "E013",
+    "Salary Not Received": "E013",
+    "Shift Manager / Kitchen Manager Issue": "E013",
+    "Accommodation Issue": "E013",
+    "Salary is incorrect": "E013",
+    "Request - Salary Advance": "E013",
+    "Co-Worker Issue": "E013",
+    "PF Related Issues": "E013",
+}
+
+
+def seed_rules(apps, schema_editor):
+    """One rule per mapped category; the owner becomes its candidate if present."""
+    CustomUser = apps.get_model("hybbconnect", "CustomUser")
+    RoutingRule = apps.get_model("hybbconnect", "RoutingRule")
+    RoutingRuleCandidate = apps.get_model("hybbconnect", "RoutingRuleCandidate")
+
+    owners = dict(
+        CustomUser.objects.filter(
+            role="owner", employee_id__in=set(CATEGORY_OWNER_MAP.values())
+        ).values_list("employee_id", "id")
+    )
+    for category, employee_id in CATEGORY_OWNER_MAP.items():
+        rule = RoutingRule.objects.create(category=category)
+        if employee_id in owners:
+            RoutingRuleCandidate.objects.create(rule=rule, owner_id=owners[employee_id])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0017_owner_workload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoutingRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("category", models.CharField(max_length=200)),
+                ("priority", models.IntegerField(default=0)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "location",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="hybbconnect.location",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["category", "-priority"],
+            },
+        ),
+        migrations.CreateModel(
+            name="RoutingRuleCandidate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("weight", models.PositiveIntegerField(default=1)),
+                (
+                    "max_open_tickets",
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        limit_choices_to={"role": "owner"},
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="routing_candidacies",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "rule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="candidates",
+                        to="hybbconnect.routingrule",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("rule", "owner"), name="unique_routing_candidate"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_rules, migrations.RunPython.noop),
+    ]
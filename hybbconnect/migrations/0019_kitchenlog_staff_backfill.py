@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def _join(*parts):
+    # Same document as search.kitchen_log_document
+    return " ".join(str(part) for part in parts if part)
+
+
+def link_legacy_logs(apps, schema_editor):
+    """Set KitchenLog.staff from emp_id where a user has that employee id."""
+    KitchenLog = apps.get_model("hybbconnect", "KitchenLog")
+    CustomUser = apps.get_model("hybbconnect", "CustomUser")
+
+    legacy = (
+        KitchenLog.objects.filter(staff__isnull=True)
+        .exclude(emp_id__isnull=True)
+        .exclude(emp_id="")
+    )
+    users = {
+        user.employee_id: user
+        for user in CustomUser.objects.filter(
+            employee_id__in=legacy.values("emp_id")
+        ).only("id", "employee_id", "username", "first_name", "last_name")
+    }
+
+    batch = []
+    for log in legacy.iterator(chunk_size=BATCH_SIZE):
+        staff = users.get(log.emp_id)
+        if staff is None:
+            continue
+        log.staff_id = staff.id
+        log.search_document = _join(
+            log.emp_id,
+            log.emp_name,
+            staff.employee_id,
+            staff.username,
+            staff.first_name,
+            staff.last_name,
+            log.location,
+            log.category,
+        )
+        batch.append(log)
+        if len(batch) >= BATCH_SIZE:
+            KitchenLog.objects.bulk_update(batch, ["staff", "search_document"])
+            batch = []
+
+    if batch:
+        KitchenLog.objects.bulk_update(batch, ["staff", "search_document"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0018_routing_rules"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kitchenlog",
+            index=models.Index(
+                fields=["staff", "-created_at"], name="klog_staff_created_idx"
+            ),
+        ),
+        migrations.RunPython(link_legacy_logs, migrations.RunPython.noop),
+    ]
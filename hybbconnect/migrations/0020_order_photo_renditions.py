@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0019_kitchenlog_staff_backfill"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderphoto",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderphoto",
+            name="thumbnail",
+            field=models.ImageField(
+                blank=True, editable=False, upload_to="order_photos/thumbs/"
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderphoto",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
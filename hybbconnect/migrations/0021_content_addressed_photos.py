@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:23
+
+import hybbconnect.storage
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+PHOTO_FILE_FIELDS = ("photo", "thumbnail")
+
+
+def count_photo_files(apps, schema_editor):
+    """One StoredBlob per file already referenced by an order photo."""
+    OrderPhoto = apps.get_model("hybbconnect", "OrderPhoto")
+    StoredBlob = apps.get_model("hybbconnect", "StoredBlob")
+
+    counts = Counter()
+    for field in PHOTO_FILE_FIELDS:
+        rows = (
+            OrderPhoto.objects.exclude(**{field: ""})
+            .exclude(**{f"{field}__isnull": True})
+            .values(field)
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            counts[row[field]] += row["n"]
+
+    StoredBlob.objects.bulk_create(
+        [StoredBlob(name=name, refs=refs) for name, refs in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0020_order_photo_renditions"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="orderphoto",
+            name="photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=hybbconnect.storage.photo_storage,
+                upload_to="order_photos/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="orderphoto",
+            name="thumbnail",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                storage=hybbconnect.storage.photo_storage,
+                upload_to="order_photos/thumbs/",
+            ),
+        ),
+        migrations.CreateModel(
+            name="StoredBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("refs", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["refs", "updated_at"], name="blob_refs_updated_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(count_photo_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:28
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+# Same normalisation as photo_index.normalize
+SEPARATORS_RE = re.compile(r"[\s\-_/#.]+")
+
+
+def _key(value, length):
+    return SEPARATORS_RE.sub("", str(value or "")).casefold()[:length]
+
+
+def index_existing_photos(apps, schema_editor):
+    OrderPhoto = apps.get_model("hybbconnect", "OrderPhoto")
+    OrderPhotoIndex = apps.get_model("hybbconnect", "OrderPhotoIndex")
+
+    photos = OrderPhoto.objects.select_related("uploaded_by", "location").order_by("pk")
+    batch = []
+    for photo in photos.iterator(chunk_size=BATCH_SIZE):
+        user = photo.uploaded_by
+        location = photo.location
+        batch.append(
+            OrderPhotoIndex(
+                photo_id=photo.pk,
+                uploaded_at=photo.uploaded_at,
+                uploaded_on=timezone.localdate(photo.uploaded_at),
+                location_id=photo.location_id,
+                order_key=_key(photo.order_id, 50),
+                username_key=_key(user and user.username, 150),
+                first_name_key=_key(user and user.first_name, 150),
+                last_name_key=_key(user and user.last_name, 150),
+                location_code_key=_key(location and location.code, 50),
+                location_name_key=_key(location and location.name, 100),
+                uploader_name=(
+                    f"{user.first_name} {user.last_name}".strip() if user else ""
+                ),
+                uploader_employee_id=user.employee_id if user else "",
+                location_name=location.name if location else "",
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            OrderPhotoIndex.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        OrderPhotoIndex.objects.bulk_create(batch)
+
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"ANALYZE {OrderPhotoIndex._meta.db_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0022_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderPhotoIndex",
+            fields=[
+                (
+                    "photo",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="index_entry",
+                        serialize=False,
+                        to="hybbconnect.orderphoto",
+                    ),
+                ),
+                ("uploaded_at", models.DateTimeField()),
+                ("uploaded_on", models.DateField()),
+                ("order_key", models.CharField(blank=True, max_length=50)),
+                ("username_key", models.CharField(blank=True, max_length=150)),
+                ("first_name_key", models.CharField(blank=True, max_length=150)),
+                ("last_name_key", models.CharField(blank=True, max_length=150)),
+                ("location_code_key", models.CharField(blank=True, max_length=50)),
+                ("location_name_key", models.CharField(blank=True, max_length=100)),
+                ("uploader_name", models.CharField(blank=True, max_length=301)),
+                ("uploader_employee_id", models.CharField(blank=True, max_length=20)),
+                ("location_name", models.CharField(blank=True, max_length=100)),
+                (
+                    "location",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="hybbconnect.location",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["location", "-uploaded_at", "-photo"],
+                        name="photoidx_loc_uploaded_idx",
+                    ),
+                    models.Index(
+                        fields=["-uploaded_at", "-photo"], name="photoidx_uploaded_idx"
+                    ),
+                    models.Index(
+                        fields=["location", "uploaded_on"], name="photoidx_loc_day_idx"
+                    ),
+                    models.Index(fields=["order_key"], name="photoidx_order_idx"),
+                    models.Index(fields=["username_key"], name="photoidx_username_idx"),
+                    models.Index(
+                        fields=["first_name_key"], name="photoidx_first_name_idx"
+                    ),
+                    models.Index(
+                        fields=["last_name_key"], name="photoidx_last_name_idx"
+                    ),
+                    models.Index(
+                        fields=["location_code_key"], name="photoidx_loc_code_idx"
+                    ),
+                    models.Index(
+                        fields=["location_name_key"], name="photoidx_loc_name_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(index_existing_photos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0023_order_photo_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderphoto",
+            name="archive_member",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="orderphoto",
+            name="archive_offset",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderphoto",
+            name="archive_size",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="PhotoArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("photo_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "location",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="hybbconnect.location",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="orderphoto",
+            name="archive",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="photos",
+                to="hybbconnect.photoarchive",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="photoarchive",
+            index=models.Index(
+                fields=["location", "month"], name="archive_location_month_idx"
+            ),
+        ),
+    ]
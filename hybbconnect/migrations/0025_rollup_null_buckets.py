@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:44
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+BUCKET_FIELDS = ["date", "location", "concern_category", "assigned_owner", "status"]
+
+
+def merge_null_buckets(apps, schema_editor):
+    """Fold buckets the old constraint let through twice (NULL location or
+    owner) into one row each."""
+    TicketStatsRollup = apps.get_model("hybbconnect", "TicketStatsRollup")
+
+    duplicates = (
+        TicketStatsRollup.objects.values(*BUCKET_FIELDS)
+        .annotate(
+            rows=Count("id"),
+            keep=Min("id"),
+            n=Sum("count"),
+            n_breached=Sum("sla_breached"),
+        )
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for bucket in duplicates:
+        rows = TicketStatsRollup.objects.filter(
+            **{field: bucket[field] for field in BUCKET_FIELDS}
+        )
+        rows.filter(pk=bucket["keep"]).update(
+            count=bucket["n"], sla_breached=bucket["n_breached"]
+        )
+        rows.exclude(pk=bucket["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0024_photo_archives"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="ticketstatsrollup",
+            name="unique_ticket_stats_bucket",
+        ),
+        migrations.RunPython(merge_null_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="ticketstatsrollup",
+            constraint=models.UniqueConstraint(
+                models.F("date"),
+                django.db.models.functions.comparison.Coalesce("location", 0),
+                models.F("concern_category"),
+                django.db.models.functions.comparison.Coalesce("assigned_owner", 0),
+                models.F("status"),
+                name="unique_ticket_stats_bucket",
+            ),
+        ),
+    ]
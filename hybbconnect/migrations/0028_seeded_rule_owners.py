@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+# Same map as 0018_routing_rules
+CATEGORY_OWNER_MAP = {
+    "Training Related": "E010",
+    "Critical Intervention - Cletus": "E011",
+    "MIS Related": "E012",
+    "HR Related": "E013",
+    "Leave Request": "E013",
+    "PF Related Issue": "E013",
+    "Bank Account Issue": "E013",
+    "Request a call Back": "E013",
+    "Quality Related": "E014",
+    "Salary Message not received": "E013",
+    "Salary Not Received": "E013",
+    "Shift Manager / Kitchen Manager Issue": "E013",
+    "Accommodation Issue": "E013",
+    "Salary is incorrect": "E013",
+    "Request - Salary Advance": "E013",
+    "Co-Worker Issue": "E013",
+    "PF Related Issues": "E013",
+}
+
+
+def remember_missing_owners(apps, schema_editor):
+    """Rules 0018 seeded without a candidate (their owner did not exist yet)
+    remember that owner's employee id; owners created since are linked now,
+    later ones by routing.link_seeded_owners()."""
+    CustomUser = apps.get_model("hybbconnect", "CustomUser")
+    RoutingRule = apps.get_model("hybbconnect", "RoutingRule")
+    RoutingRuleCandidate = apps.get_model("hybbconnect", "RoutingRuleCandidate")
+
+    owners = dict(
+        CustomUser.objects.filter(
+            role="owner", employee_id__in=set(CATEGORY_OWNER_MAP.values())
+        ).values_list("employee_id", "id")
+    )
+    rules = RoutingRule.objects.filter(
+        category__in=CATEGORY_OWNER_MAP, location__isnull=True, candidates__isnull=True
+    )
+    for rule in rules:
+        employee_id = CATEGORY_OWNER_MAP[rule.category]
+        if employee_id in owners:
+            RoutingRuleCandidate.objects.create(rule=rule, owner_id=owners[employee_id])
+        else:
+            rule.seed_owner_employee_id = employee_id
+            rule.save(update_fields=["seed_owner_employee_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0025_rollup_null_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="routingrule",
+            name="seed_owner_employee_id",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+        migrations.RunPython(remember_missing_owners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:00
+
+import os
+import shutil
+import uuid
+
+import hybbconnect.models
+import hybbconnect.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_job_files(apps, schema_editor):
+    """Move existing job files out of MEDIA_ROOT, under random names; a
+    preview and its confirmed salary import share one file."""
+    private_root = getattr(
+        settings, "PRIVATE_MEDIA_ROOT", os.path.join(settings.BASE_DIR, "private_media")
+    )
+    moved = {}
+    for model_name, directory in (("ExportJob", "exports"), ("ImportJob", "imports")):
+        model = apps.get_model("hybbconnect", model_name)
+        for job in model.objects.exclude(file="").exclude(file__isnull=True):
+            old = job.file.name
+            if old not in moved:
+                source = os.path.join(settings.MEDIA_ROOT, old)
+                if not os.path.exists(source):
+                    moved[old] = ""
+                else:
+                    new = os.path.join(
+                        directory, uuid.uuid4().hex + os.path.splitext(old)[1].lower()
+                    )
+                    target = os.path.join(private_root, new)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(source, target)
+                    moved[old] = new
+            model.objects.filter(pk=job.pk).update(file=moved[old])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0028_seeded_rule_owners"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=hybbconnect.storage.private_storage,
+                upload_to=hybbconnect.models.export_file_name,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="importjob",
+            name="file",
+            field=models.FileField(
+                storage=hybbconnect.storage.private_storage,
+                upload_to=hybbconnect.models.import_file_name,
+            ),
+        ),
+        migrations.RunPython(move_job_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hybbconnect", "0029_private_job_files"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticket",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("Pending", "Pending"),
+                    ("Assigned", "Assigned"),
+                    ("Reassigned", "Reassigned"),
+                    ("In Progress", "In Progress"),
+                    ("Resolved", "Resolved"),
+                    ("Closed", "Closed"),
+                    ("Confirmed", "Confirmed"),
+                    ("Rejected", "Rejected"),
+                ],
+                default="Pending",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -1,11 +1,16 @@
 # models.py — HybbConnect
 
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth import get_user_model
 
+from .storage import photo_storage, private_storage, random_file_name
+
 
 # ---------------------------------------------------------
 # 1️⃣ LOCATION MODEL
@@ -50,6 +55,7 @@ class Ticket(models.Model):
         ('In Progress', 'In Progress'),
         ('Resolved', 'Resolved'),
         ('Closed', 'Closed'),
+        ('Confirmed', 'Confirmed'),
         ('Rejected', 'Rejected'),
     ]
 
@@ -92,24 +98,33 @@ class Ticket(models.Model):
     staff_confirmed = models.BooleanField(default=False)
     staff_confirmed_at = models.DateTimeField(null=True, blank=True)
 
+    # Denormalised text for search.py, filled on save
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        # One index per dashboard access path (filter column, newest first)
+        indexes = [
+            models.Index(fields=["assigned_owner", "-created_at"], name="ticket_owner_created_idx"),
+            models.Index(fields=["employee", "-created_at"], name="ticket_employee_created_idx"),
+            models.Index(fields=["reassigned_to", "-created_at"], name="ticket_reassign_created_idx"),
+            models.Index(fields=["location", "-created_at"], name="ticket_location_created_idx"),
+            models.Index(fields=["-created_at", "-id"], name="ticket_created_idx"),
+        ]
 
     def __str__(self):
         return f"Ticket #{self.ticket_number}"
 
     # ⭐ AUTO-GENERATE TICKET NUMBER HERE
     def save(self, *args, **kwargs):
-        if not self.ticket_number:
-            last = Ticket.objects.order_by('-id').first()
+        if self.ticket_number:
+            return super().save(*args, **kwargs)
 
-            if last and last.ticket_number and last.ticket_number.startswith("TIK-"):
-                last_num = int(last.ticket_number.split("-")[1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
+        from .sequences import next_ticket_number
 
-            self.ticket_number = f"TIK-{new_num:05d}"
-
-        super().save(*args, **kwargs)
+        # Number and row commit together, so a failed insert never burns a number
+        with transaction.atomic():
+            self.ticket_number = next_ticket_number()
+            super().save(*args, **kwargs)
 
 
 
@@ -133,6 +148,12 @@ class StaffPerformance(models.Model):
     earning_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     deduction_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    class Meta:
+        constraints = [
+            # Bulk uploads upsert on this pair
+            models.UniqueConstraint(fields=["employee", "month"], name="unique_staff_performance_month"),
+        ]
+
     def __str__(self):
         return f"{self.employee.username} - {self.month}"
 
@@ -171,6 +192,16 @@ class KitchenLog(models.Model):
     is_acknowledged = models.BooleanField(default=False)
     acknowledged_at = models.DateTimeField(null=True, blank=True)
 
+    # Denormalised text for search.py, filled on save
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["location", "-created_at"], name="klog_location_created_idx"),
+            models.Index(fields=["emp_id"], name="klog_emp_id_idx"),
+            models.Index(fields=["staff", "-created_at"], name="klog_staff_created_idx"),
+        ]
+
     def __str__(self):
         if self.staff:
             return f"{self.staff.username} - {self.category}"
@@ -216,6 +247,12 @@ class SalarySlip(models.Model):
     net_pay = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Salary uploads upsert on this key
+            models.UniqueConstraint(fields=["employee", "month", "year"], name="unique_salary_slip_period"),
+        ]
+
     def __str__(self):
         return f"{self.employee.username} - {self.month}-{self.year}"
 
@@ -225,7 +262,16 @@ class SalarySlip(models.Model):
 # ---------------------------------------------------------
 class OrderPhoto(models.Model):
     order_id = models.CharField(max_length=50)
-    photo = models.ImageField(upload_to="order_photos/", null=True, blank=True)
+    photo = models.ImageField(
+        upload_to="order_photos/", storage=photo_storage, null=True, blank=True
+    )
+
+    # Filled by renditions.py when the photo is uploaded
+    thumbnail = models.ImageField(
+        upload_to="order_photos/thumbs/", storage=photo_storage, blank=True, editable=False
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -237,6 +283,24 @@ class OrderPhoto(models.Model):
 
     location = models.ForeignKey("Location", on_delete=models.SET_NULL, null=True, blank=True)
 
+    # Set when the original moves into a monthly archive (see archives.py);
+    # ``photo`` is then empty and the bytes sit at this offset of the archive
+    archive = models.ForeignKey(
+        "PhotoArchive",
+        on_delete=models.PROTECT,
+        null=True, blank=True,
+        editable=False,
+        related_name="photos",
+    )
+    archive_member = models.CharField(max_length=255, blank=True, editable=False)
+    archive_offset = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    archive_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["location", "-uploaded_at"], name="photo_location_uploaded_idx"),
+        ]
+
     def __str__(self):
         return f"{self.order_id} - {self.uploaded_by.username if self.uploaded_by else 'Unknown'}"
 
@@ -275,5 +339,347 @@ class StaffTimeUpdate(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="updated_time_entries")
     updated_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["staff", "-updated_at"], name="stafftime_staff_updated_idx"),
+        ]
+
     def __str__(self):
         return f"{self.staff} - {self.update_type}"
+
+
+# ---------------------------------------------------------
+# 9️⃣ NUMBER SEQUENCE (ticket numbers)
+# ---------------------------------------------------------
+class NumberSequence(models.Model):
+    """Named counter row; values are handed out by ``hybbconnect.sequences``."""
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_value}"
+
+
+# ---------------------------------------------------------
+# 🔟 EXPORT JOB (background report files)
+# ---------------------------------------------------------
+def export_file_name(instance, filename):
+    return random_file_name("exports", filename)
+
+
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ("tickets", "All Tickets"),
+        ("order_photos", "Order Photos"),
+        ("staff_time_updates", "OT / SAC OFF Updates"),
+    ]
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    file_format = models.CharField(max_length=10, default="csv")
+    params = models.JSONField(default=dict, blank=True)
+
+    # Hash of kind + format + params + data version; equal keys share one file
+    cache_key = models.CharField(max_length=64, db_index=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    file = models.FileField(
+        upload_to=export_file_name, storage=private_storage, null=True, blank=True
+    )
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+
+# ---------------------------------------------------------
+# 1️⃣1️⃣ TICKET STATS ROLLUP (maintained by signals.py)
+# ---------------------------------------------------------
+class TicketStatsRollup(models.Model):
+    """Ticket counts per (raised date, location, category, owner, status)."""
+    date = models.DateField()
+    location = models.ForeignKey("Location", on_delete=models.CASCADE, null=True, blank=True)
+    concern_category = models.CharField(max_length=200, blank=True, default="")
+    assigned_owner = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    status = models.CharField(max_length=20)
+
+    count = models.IntegerField(default=0)
+    sla_breached = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # NULL location / owner is a bucket of its own; a plain unique
+            # constraint would treat every NULL as distinct
+            models.UniqueConstraint(
+                "date",
+                Coalesce("location", 0),
+                "concern_category",
+                Coalesce("assigned_owner", 0),
+                "status",
+                name="unique_ticket_stats_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.count}"
+
+
+# ---------------------------------------------------------
+# 1️⃣2️⃣ IMPORT JOB (processed by run_import_worker)
+# ---------------------------------------------------------
+def import_file_name(instance, filename):
+    return random_file_name("imports", filename)
+
+
+class ImportJob(models.Model):
+    KIND_CHOICES = [
+        ("users", "Users"),
+        ("staff_performance", "Staff Performance"),
+        ("salary", "Salary Slips"),
+    ]
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    file = models.FileField(upload_to=import_file_name, storage=private_storage)
+    original_name = models.CharField(max_length=255, blank=True, default="")
+    # Importer arguments, e.g. {"apply": true} for a confirmed salary upload
+    options = models.JSONField(default=dict, blank=True)
+    chunk_rows = models.PositiveIntegerField(default=5000)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    # Rows whose chunk is committed; a requeued job resumes from here
+    rows_committed = models.PositiveIntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    # ImportReport state, saved with every committed chunk
+    report = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Heartbeat: bumped with every chunk, stale "running" jobs are requeued
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    @property
+    def percent(self):
+        if not self.rows_total:
+            return 100 if self.status == "done" else 0
+        return min(100, round(100 * self.rows_processed / self.rows_total))
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import #{self.pk} ({self.status})"
+
+
+# ---------------------------------------------------------
+# 1️⃣3️⃣ OWNER WORKLOAD (maintained by signals.py)
+# ---------------------------------------------------------
+class OwnerWorkload(models.Model):
+    """Open (not resolved / closed / confirmed / rejected) tickets assigned to an owner."""
+    owner = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="workload"
+    )
+    open_tickets = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.owner}: {self.open_tickets} open"
+
+
+# ---------------------------------------------------------
+# 1️⃣4️⃣ ROUTING RULES (compiled by routing.py)
+# ---------------------------------------------------------
+class RoutingRule(models.Model):
+    """Send tickets of ``category`` (optionally only from ``location``) to
+    the rule's candidate owners. Higher priority rules are tried first.
+    """
+    category = models.CharField(max_length=200)
+    location = models.ForeignKey("Location", on_delete=models.CASCADE, null=True, blank=True)
+    priority = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    # Employee id of the owner the old hard-coded map sent this category to,
+    # while no such owner exists; routing.link_seeded_owners() makes them the
+    # rule's candidate once they are created
+    seed_owner_employee_id = models.CharField(max_length=20, blank=True, default="")
+
+    class Meta:
+        ordering = ["category", "-priority"]
+
+    def __str__(self):
+        where = f" @ {self.location}" if self.location_id else ""
+        return f"{self.category}{where} (priority {self.priority})"
+
+
+class RoutingRuleCandidate(models.Model):
+    rule = models.ForeignKey(RoutingRule, on_delete=models.CASCADE, related_name="candidates")
+    owner = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        limit_choices_to={"role": "owner"},
+        related_name="routing_candidacies",
+    )
+    # Share of the rule's tickets, relative to the other candidates
+    weight = models.PositiveIntegerField(default=1)
+    # Skipped while this many tickets are open for the owner; blank = no limit
+    max_open_tickets = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["rule", "owner"], name="unique_routing_candidate"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner} ×{self.weight}"
+
+
+# ---------------------------------------------------------
+# 1️⃣5️⃣ STORED BLOB (photo files, counted by blobs.py)
+# ---------------------------------------------------------
+class StoredBlob(models.Model):
+    """A file in the photo storage and how many OrderPhoto fields point at it.
+
+    Files whose count drops to zero are deleted by gc_photo_storage.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    refs = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time refs changed; GC waits a grace period after it drops to zero
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["refs", "updated_at"], name="blob_refs_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} ref(s))"
+
+
+# ---------------------------------------------------------
+# 1️⃣6️⃣ UPLOAD SESSION (resumable photo uploads, see uploads.py)
+# ---------------------------------------------------------
+class UploadSession(models.Model):
+    """One photo being uploaded in chunks; becomes an OrderPhoto on finalize."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    order_id = models.CharField(max_length=50)
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    photo = models.OneToOneField(
+        OrderPhoto, on_delete=models.SET_NULL, null=True, blank=True, related_name="upload_session"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.received >= self.size
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+# ---------------------------------------------------------
+# 1️⃣7️⃣ ORDER PHOTO INDEX (gallery filters, see photo_index.py)
+# ---------------------------------------------------------
+class OrderPhotoIndex(models.Model):
+    """One denormalised row per OrderPhoto, kept in sync by signals.py.
+
+    The ``*_key`` columns hold normalised text (see photo_index.normalize) so
+    the gallery filters are index range scans instead of joins + icontains.
+    """
+    photo = models.OneToOneField(
+        OrderPhoto, on_delete=models.CASCADE, primary_key=True, related_name="index_entry"
+    )
+    uploaded_at = models.DateTimeField()
+    uploaded_on = models.DateField()
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True)
+
+    order_key = models.CharField(max_length=50, blank=True)
+    username_key = models.CharField(max_length=150, blank=True)
+    first_name_key = models.CharField(max_length=150, blank=True)
+    last_name_key = models.CharField(max_length=150, blank=True)
+    location_code_key = models.CharField(max_length=50, blank=True)
+    location_name_key = models.CharField(max_length=100, blank=True)
+
+    # Shown in the gallery table as-is
+    uploader_name = models.CharField(max_length=301, blank=True)
+    uploader_employee_id = models.CharField(max_length=20, blank=True)
+    location_name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["location", "-uploaded_at", "-photo"], name="photoidx_loc_uploaded_idx"
+            ),
+            models.Index(fields=["-uploaded_at", "-photo"], name="photoidx_uploaded_idx"),
+            models.Index(fields=["location", "uploaded_on"], name="photoidx_loc_day_idx"),
+            models.Index(fields=["order_key"], name="photoidx_order_idx"),
+            models.Index(fields=["username_key"], name="photoidx_username_idx"),
+            models.Index(fields=["first_name_key"], name="photoidx_first_name_idx"),
+            models.Index(fields=["last_name_key"], name="photoidx_last_name_idx"),
+            models.Index(fields=["location_code_key"], name="photoidx_loc_code_idx"),
+            models.Index(fields=["location_name_key"], name="photoidx_loc_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"Index of photo {self.photo_id}"
+
+
+# ---------------------------------------------------------
+# 1️⃣8️⃣ PHOTO ARCHIVE (monthly ZIPs of old originals, see archives.py)
+# ---------------------------------------------------------
+class PhotoArchive(models.Model):
+    """One archive file of a location's photos from one month."""
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True)
+    month = models.DateField()  # first day of the month
+    name = models.CharField(max_length=255, unique=True)  # relative to PHOTO_ARCHIVE_DIR
+    size = models.PositiveBigIntegerField(default=0)
+    photo_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["location", "month"], name="archive_location_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.photo_count} photo(s))"
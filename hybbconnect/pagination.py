@@ -0,0 +1,137 @@
+# pagination.py — keyset (cursor) pagination
+#
+# Pages are fetched with "WHERE (sort_key, id) < (last_key, last_id) LIMIT n"
+# instead of OFFSET + COUNT, so page 1000 costs the same as page 1 when the
+# (sort_key, id) pair is indexed.
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """Paginate ``queryset`` on a (sort field, id) pair.
+
+    ``ordering`` is e.g. ``("-created_at", "-id")``; both keys must sort in the
+    same direction and the last one must be unique. A key may also be an
+    annotation of ``queryset`` (``search_rank`` from search.py).
+    """
+
+    def __init__(self, queryset, ordering=("-created_at", "-id"), per_page=50):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+
+        self.descending = ordering[0].startswith("-")
+        self.fields = [name.lstrip("-") for name in ordering]
+
+    # -----------------------------------------
+    # Cursor encoding
+    # -----------------------------------------
+    def _encode(self, obj, direction):
+        values = [getattr(obj, name) for name in self.fields]
+        payload = {
+            "d": direction,
+            "v": [v.isoformat() if hasattr(v, "isoformat") else v for v in values],
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def _field(self, name):
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return self.queryset.query.annotations[name].output_field
+
+    def _decode(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            direction = payload["d"]
+            raw_values = payload["v"]
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, raw_values)
+            ]
+        except Exception:
+            return None, None
+
+        if direction not in ("next", "prev") or len(values) != len(self.fields):
+            return None, None
+        return direction, values
+
+    # -----------------------------------------
+    # Page fetch
+    # -----------------------------------------
+    def _after(self, values, forward):
+        """Q for rows strictly after ``values`` in the requested direction."""
+        lookup = "lt" if self.descending == forward else "gt"
+
+        # (a < x) OR (a = x AND b < y) ...; the leading "a <= x" is redundant
+        # but gives the planner an index range to scan.
+        chain = Q()
+        for i, name in enumerate(self.fields):
+            step = Q(**{f"{name}__{lookup}": values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_name: prev_value})
+            chain |= step
+        return Q(**{f"{self.fields[0]}__{lookup}e": values[0]}) & chain
+
+    def get_page(self, cursor=None):
+        direction, values = self._decode(cursor) if cursor else (None, None)
+        forward = direction != "prev"
+
+        if forward:
+            queryset = self.queryset.order_by(*self.ordering)
+        else:
+            reversed_ordering = [
+                name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering
+            ]
+            queryset = self.queryset.order_by(*reversed_ordering)
+
+        if values is not None:
+            queryset = queryset.filter(self._after(values, forward))
+
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if not forward:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage([])
+
+        has_next = has_more if forward else True
+        has_previous = values is not None if forward else has_more
+
+        return CursorPage(
+            rows,
+            next_cursor=self._encode(rows[-1], "next") if has_next else None,
+            previous_cursor=self._encode(rows[0], "prev") if has_previous else None,
+        )
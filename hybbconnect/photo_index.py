@@ -0,0 +1,113 @@
+# photo_index.py — denormalised index behind the order photo gallery filters
+#
+# Every OrderPhoto has one OrderPhotoIndex row holding its upload date,
+# normalised order id, uploader names and location code / name. The gallery
+# filters then become range scans on those columns:
+#
+#   date_after / date_before   uploaded_on BETWEEN …      (no __date function)
+#   order_id, username, …      key >= 'abc' AND key < 'abc\U0010ffff'
+#
+# so typing in a filter box is a prefix match ("A12" finds "A12-345"), not a
+# substring match. signals.py keeps the rows current; `python manage.py
+# rebuild_photo_index` recomputes them all.
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OrderPhoto, OrderPhotoIndex
+
+# Written / read as a single row per photo
+INDEXED_PHOTO_FIELDS = {"order_id", "uploaded_by", "uploaded_at", "location"}
+INDEXED_USER_FIELDS = {"username", "first_name", "last_name", "employee_id"}
+
+INDEX_VALUE_FIELDS = [
+    field.name for field in OrderPhotoIndex._meta.concrete_fields if not field.primary_key
+]
+
+SEPARATORS_RE = re.compile(r"[\s\-_/#.]+")
+
+# Sorts after every other character; key < prefix + KEY_END ends the range
+KEY_END = "\U0010ffff"
+
+
+# -----------------------------------------
+# Normalised keys
+# -----------------------------------------
+def normalize(value):
+    """Lower-cased text with spaces, dashes, slashes, dots and # removed."""
+    return SEPARATORS_RE.sub("", str(value or "")).casefold()
+
+
+def prefix_q(field, value):
+    """Q for rows whose ``field`` key starts with ``value`` (normalised)."""
+    key = normalize(value)
+    return Q(**{f"{field}__gte": key, f"{field}__lt": key + KEY_END})
+
+
+# -----------------------------------------
+# Index rows
+# -----------------------------------------
+def index_entry(photo):
+    """The OrderPhotoIndex row for ``photo`` (unsaved)."""
+    user = photo.uploaded_by
+    location = photo.location
+    return OrderPhotoIndex(
+        photo_id=photo.pk,
+        uploaded_at=photo.uploaded_at,
+        uploaded_on=timezone.localdate(photo.uploaded_at),
+        location_id=photo.location_id,
+        order_key=normalize(photo.order_id)[:50],
+        username_key=normalize(user and user.username)[:150],
+        first_name_key=normalize(user and user.first_name)[:150],
+        last_name_key=normalize(user and user.last_name)[:150],
+        location_code_key=normalize(location and location.code)[:50],
+        location_name_key=normalize(location and location.name)[:100],
+        uploader_name=user.get_full_name() if user else "",
+        uploader_employee_id=user.employee_id if user else "",
+        location_name=location.name if location else "",
+    )
+
+
+def index_photos(photos):
+    """Create or update the index rows of ``photos`` (instances with the
+    uploader and location loaded, or cheaply loadable)."""
+    entries = [index_entry(photo) for photo in photos]
+    OrderPhotoIndex.objects.bulk_create(
+        entries,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["photo"],
+        update_fields=INDEX_VALUE_FIELDS,
+    )
+    return len(entries)
+
+
+def refresh_photo_index(queryset, batch_size=500):
+    """Recompute the index rows of every photo in ``queryset``."""
+    photos = queryset.select_related("uploaded_by", "location").order_by("pk")
+    done = 0
+    batch = []
+    for photo in photos.iterator(chunk_size=batch_size):
+        batch.append(photo)
+        if len(batch) == batch_size:
+            done += index_photos(batch)
+            batch = []
+    return done + index_photos(batch)
+
+
+def analyze_photo_index():
+    """Refresh the planner statistics, which decide between the location /
+    date index and a filter's key index."""
+    if connection.vendor in ("sqlite", "postgresql"):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {OrderPhotoIndex._meta.db_table}")
+
+
+def rebuild_photo_index():
+    """Index every photo; returns the number of rows written."""
+    indexed = refresh_photo_index(OrderPhoto.objects.all())
+    analyze_photo_index()
+    return indexed
@@ -0,0 +1,85 @@
+# renditions.py — resized copies of uploaded order photos
+#
+# Phone cameras upload multi-MB JPEGs with the rotation left in EXIF. On
+# upload (signals.py, pre_save) the original is replaced by one rendition:
+# rotated upright, EXIF (GPS, device data) dropped, longest side capped at
+# PHOTO_MAX_SIDE and re-encoded as WebP (JPEG if Pillow lacks WebP). A
+# THUMBNAIL_SIDE thumbnail is stored next to it for the galleries and the
+# admin. `python manage.py build_photo_renditions` does the same for photos
+# uploaded before this existed.
+
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+PHOTO_MAX_SIDE = 1600
+PHOTO_QUALITY = 82
+
+THUMBNAIL_SIDE = 320
+THUMBNAIL_QUALITY = 70
+
+RENDITION_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+RENDITION_EXTENSION = {"WEBP": "webp", "JPEG": "jpg"}[RENDITION_FORMAT]
+
+# What Pillow raises for files it cannot decode
+RENDITION_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+
+# -----------------------------------------
+# Image work (no database access, safe in a process pool)
+# -----------------------------------------
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    # No exif= / icc_profile= given, so neither is written
+    image.save(buffer, RENDITION_FORMAT, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def render_image(source):
+    """Encode ``source`` (a path or binary file) as a photo rendition.
+
+    Returns ``(photo bytes, (width, height), thumbnail bytes)``.
+    """
+    with Image.open(source) as original:
+        # JPEGs are decoded at the smallest DCT scale still >= the cap,
+        # which is most of the saving on 12 MP camera images
+        original.draft("RGB", (PHOTO_MAX_SIDE, PHOTO_MAX_SIDE))
+        image = ImageOps.exif_transpose(original)
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    image.thumbnail((PHOTO_MAX_SIDE, PHOTO_MAX_SIDE), Image.Resampling.LANCZOS)
+    photo = _encode(image, PHOTO_QUALITY)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIDE, THUMBNAIL_SIDE), Image.Resampling.LANCZOS)
+    return photo, image.size, _encode(thumbnail, THUMBNAIL_QUALITY)
+
+
+# -----------------------------------------
+# OrderPhoto
+# -----------------------------------------
+def store_renditions(photo, data, size, thumbnail):
+    """Point ``photo`` at freshly stored rendition files (model not saved).
+
+    Files it replaces are left in storage; once no row refers to them,
+    gc_photo_storage removes them (see blobs.py).
+    """
+    stem = os.path.splitext(os.path.basename(photo.photo.name))[0]
+    filename = f"{stem}.{RENDITION_EXTENSION}"
+
+    photo.photo.save(filename, ContentFile(data), save=False)
+    photo.thumbnail.save(filename, ContentFile(thumbnail), save=False)
+    photo.width, photo.height = size
+
+
+def render_order_photo(photo):
+    """Replace a newly uploaded ``photo.photo`` with its rendition and add the
+    thumbnail. Called from pre_save, before the upload is written."""
+    upload = photo.photo
+    upload.open("rb")
+    data, size, thumbnail = render_image(upload)
+    store_renditions(photo, data, size, thumbnail)
@@ -0,0 +1,137 @@
+# reports.py — database-side report querysets
+
+from datetime import timedelta
+
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Concat, Now, TruncDate
+
+from .models import OrderPhoto, OrderPhotoIndex, Ticket
+from .photo_index import prefix_q
+
+SLA_HOURS = 48
+
+
+def ticket_report_queryset(status=None, assigned_to=None, location=None):
+    """Tickets with every derived report column computed as SQL annotations.
+
+    Annotations (``None`` where the source timestamp is missing):
+      - ``pending_duration``:  created date → closed date (or today)
+      - ``confirm_duration``:  created date → staff confirmation date
+      - ``time_to_resolve``:   closed_at - created_at
+      - ``sla_breach``:        resolved in more than ``SLA_HOURS`` hours
+      - ``reassigned_info``:   "Reassigned to <username>" or ""
+
+    Durations come back as ``timedelta``; use ``.days`` for day counts.
+    """
+    tickets = Ticket.objects.select_related(
+        "employee", "location", "assigned_owner", "reassigned_to"
+    ).order_by("-created_at", "-id")
+
+    if status:
+        tickets = tickets.filter(status=status)
+
+    if assigned_to:
+        tickets = tickets.filter(assigned_owner_id=assigned_to)
+
+    if location:
+        tickets = tickets.filter(location__name=location)
+
+    return tickets.annotate(
+        pending_duration=ExpressionWrapper(
+            TruncDate(Coalesce("closed_at", Now())) - TruncDate("created_at"),
+            output_field=DurationField(),
+        ),
+        confirm_duration=ExpressionWrapper(
+            TruncDate("staff_confirmed_at") - TruncDate("created_at"),
+            output_field=DurationField(),
+        ),
+        time_to_resolve=ExpressionWrapper(
+            F("closed_at") - F("created_at"), output_field=DurationField()
+        ),
+        sla_breach=Case(
+            When(
+                closed_at__gt=F("created_at") + timedelta(hours=SLA_HOURS),
+                then=Value(True),
+            ),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        reassigned_info=Case(
+            When(
+                reassigned_to__isnull=False,
+                then=Concat(Value("Reassigned to "), F("reassigned_to__username")),
+            ),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+    )
+
+
+PHOTO_FILTER_FIELDS = (
+    "date_after", "date_before", "order_id", "username", "full_name", "location",
+)
+
+
+def photo_index_queryset(locations, filters):
+    """OrderPhotoIndex rows in ``locations`` narrowed by the gallery filter
+    inputs, newest first.
+
+    ``filters`` is any mapping with the keys in ``PHOTO_FILTER_FIELDS``
+    (``request.GET`` or the params stored on an export job). Text filters are
+    prefix matches on the normalised keys (see photo_index.py).
+    """
+    rows = OrderPhotoIndex.objects.filter(location__in=locations).order_by(
+        "-uploaded_at", "-photo_id"
+    )
+
+    date_after = filters.get("date_after")
+    date_before = filters.get("date_before")
+    order_id = filters.get("order_id")
+    username = filters.get("username")
+    full_name = filters.get("full_name")
+    location = filters.get("location")
+
+    # DATE FILTERS (a plain range on the stored upload date)
+    if date_after:
+        rows = rows.filter(uploaded_on__gte=date_after)
+
+    if date_before:
+        rows = rows.filter(uploaded_on__lte=date_before)
+
+    # ORDER ID
+    if order_id:
+        rows = rows.filter(prefix_q("order_key", order_id))
+
+    # USERNAME
+    if username:
+        rows = rows.filter(prefix_q("username_key", username))
+
+    # FULL NAME
+    if full_name:
+        rows = rows.filter(
+            prefix_q("first_name_key", full_name) | prefix_q("last_name_key", full_name)
+        )
+
+    # LOCATION (code or name)
+    if location:
+        rows = rows.filter(
+            prefix_q("location_code_key", location) | prefix_q("location_name_key", location)
+        )
+
+    return rows
+
+
+def order_photo_queryset(locations, filters):
+    """The OrderPhotos matched by ``photo_index_queryset()``, newest first."""
+    rows = photo_index_queryset(locations, filters)
+    return OrderPhoto.objects.filter(pk__in=rows.values("photo_id")).order_by("-uploaded_at")
@@ -0,0 +1,175 @@
+# rollups.py — pre-aggregated ticket statistics
+#
+# Every ticket contributes one to exactly one TicketStatsRollup bucket. signals.py
+# moves that contribution whenever a ticket is created, changes bucket or is
+# deleted; `python manage.py rebuild_ticket_stats` recomputes the table.
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Ticket, TicketStatsRollup
+from .reports import SLA_HOURS
+
+
+BUCKET_FIELDS = {
+    "created_at", "closed_at", "location_id", "concern_category", "assigned_owner_id", "status",
+}
+
+# Marker for instances loaded with .only()/.defer(): the bucket is read from
+# the database in pre_save instead of touching deferred fields on every load.
+UNKNOWN_BUCKET = object()
+
+
+def ticket_bucket(ticket):
+    """The rollup bucket a ticket currently counts towards (None if unsaved)."""
+    if BUCKET_FIELDS & ticket.get_deferred_fields():
+        return UNKNOWN_BUCKET
+
+    if ticket.created_at is None:
+        return None
+
+    breached = bool(
+        ticket.closed_at
+        and ticket.closed_at - ticket.created_at > timedelta(hours=SLA_HOURS)
+    )
+    return (
+        timezone.localdate(ticket.created_at),
+        ticket.location_id,
+        ticket.concern_category or "",
+        ticket.assigned_owner_id,
+        ticket.status,
+        breached,
+    )
+
+
+def stored_bucket(ticket_id):
+    """Bucket of the row as currently stored in the database."""
+    ticket = Ticket.objects.filter(pk=ticket_id).only(*BUCKET_FIELDS).first()
+    return ticket_bucket(ticket) if ticket else None
+
+
+def apply_bucket(bucket, delta):
+    """Add ``delta`` tickets to ``bucket``."""
+    if bucket is None:
+        return
+
+    date, location_id, category, owner_id, status, breached = bucket
+    lookup = {
+        "date": date,
+        "location_id": location_id,
+        "concern_category": category,
+        "assigned_owner_id": owner_id,
+        "status": status,
+    }
+    changes = {
+        "count": F("count") + delta,
+        "sla_breached": F("sla_breached") + (delta if breached else 0),
+    }
+
+    if TicketStatsRollup.objects.filter(**lookup).update(**changes) or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            TicketStatsRollup.objects.create(
+                **lookup, count=delta, sla_breached=delta if breached else 0
+            )
+    except IntegrityError:
+        # Another writer created the bucket first
+        TicketStatsRollup.objects.filter(**lookup).update(**changes)
+
+
+def move_ticket(old_bucket, new_bucket):
+    if old_bucket == new_bucket:
+        return
+    apply_bucket(old_bucket, -1)
+    apply_bucket(new_bucket, 1)
+
+
+def move_tickets(moves):
+    """move_ticket() for many (old_bucket, new_bucket) pairs, one write per
+    bucket whose count actually changes."""
+    deltas = Counter()
+    for old_bucket, new_bucket in moves:
+        if old_bucket != new_bucket:
+            deltas[old_bucket] -= 1
+            deltas[new_bucket] += 1
+    for bucket, delta in deltas.items():
+        if delta:
+            apply_bucket(bucket, delta)
+
+
+def detach_tickets(tickets, **changes):
+    """Move ``tickets`` to the buckets they fall in once ``changes`` (e.g.
+    ``location_id=None``) are applied behind the signals' back, as the
+    SET_NULL of a deleted Location or owner is."""
+    moves = []
+    for ticket in tickets.only(*BUCKET_FIELDS).iterator():
+        old = ticket_bucket(ticket)
+        for field, value in changes.items():
+            setattr(ticket, field, value)
+        moves.append((old, ticket_bucket(ticket)))
+    move_tickets(moves)
+
+
+def rebuild_ticket_stats():
+    """Recompute the whole rollup table from the ticket table."""
+    breached = Q(closed_at__gt=F("created_at") + timedelta(hours=SLA_HOURS))
+
+    rows = (
+        Ticket.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "location_id", "concern_category", "assigned_owner_id", "status")
+        .annotate(n=Count("id"), n_breached=Count("id", filter=breached))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        TicketStatsRollup.objects.all().delete()
+
+        # NULL and "" categories share a bucket
+        merged = {}
+        for row in rows.iterator():
+            key = (
+                row["day"],
+                row["location_id"],
+                row["concern_category"] or "",
+                row["assigned_owner_id"],
+                row["status"],
+            )
+            count, n_breached = merged.get(key, (0, 0))
+            merged[key] = (count + row["n"], n_breached + row["n_breached"])
+
+        TicketStatsRollup.objects.bulk_create(
+            [
+                TicketStatsRollup(
+                    date=day,
+                    location_id=location_id,
+                    concern_category=category,
+                    assigned_owner_id=owner_id,
+                    status=status,
+                    count=count,
+                    sla_breached=n_breached,
+                )
+                for (day, location_id, category, owner_id, status), (count, n_breached)
+                in merged.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(merged)
+
+
+def ticket_trend(days=14, **filters):
+    """Daily raised / breached counts for the last ``days`` days."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        TicketStatsRollup.objects.filter(date__gte=since, **filters)
+        .values("date")
+        .annotate(raised=Sum("count"), breached=Sum("sla_breached"))
+        .order_by("date")
+    )
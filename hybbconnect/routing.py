@@ -0,0 +1,273 @@
+# routing.py — pick the owner for a new ticket
+#
+# Owners come from RoutingRules (edited in the admin). The rules for a ticket's
+# category are tried highest priority first, location-specific before
+# catch-all; within a rule, candidates share tickets by weight (smooth
+# weighted round-robin) and a candidate with max_open_tickets open is skipped.
+# When no rule yields an owner the ticket goes to the active owner with the
+# fewest open tickets.
+#
+# Rules are compiled into an in-process index, rebuilt when a rule, candidate
+# or CustomUser changes: signals.py bumps a version in the cache, which every
+# worker process checks before routing (see CACHES in settings.py).
+# Open-ticket counts live in OwnerWorkload, kept in step by signals.py, so
+# routing reads one row per candidate owner instead of counting every ticket
+# ever assigned.
+
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Coalesce
+
+from .metrics import CLOSED_STATUSES
+from .models import CustomUser, OwnerWorkload, RoutingRule, RoutingRuleCandidate, Ticket
+
+ROUTING_VERSION_CACHE_KEY = "hybbconnect:routing_version"
+
+ROUTING_TABLE_TTL = 5 * 60
+
+
+def normalize_category(category):
+    return (category or "").strip().lower()
+
+
+# -----------------------------------------
+# Compiled rule index
+# -----------------------------------------
+class CompiledRule:
+    def __init__(self, location_id, candidates):
+        self.location_id = location_id
+        # (owner_id, weight, max_open_tickets)
+        self.candidates = candidates
+        self.current = defaultdict(int)
+
+    def pick(self, workloads):
+        """Next owner by smooth weighted round-robin among candidates under
+        their limit; ``workloads`` maps owner id -> open tickets.
+        """
+        available = [
+            (owner_id, weight)
+            for owner_id, weight, limit in self.candidates
+            if limit is None or workloads.get(owner_id, 0) < limit
+        ]
+        if not available:
+            return None
+
+        total = 0
+        for owner_id, weight in available:
+            self.current[owner_id] += weight
+            total += weight
+        chosen = max(available, key=lambda candidate: self.current[candidate[0]])[0]
+        self.current[chosen] -= total
+        return chosen
+
+
+class RoutingTable:
+    def __init__(self):
+        self.owners = {
+            owner.id: owner for owner in CustomUser.objects.filter(role="owner", is_active=True)
+        }
+
+        candidates = defaultdict(list)
+        for rule_id, owner_id, weight, limit in (
+            RoutingRuleCandidate.objects.filter(rule__is_active=True, weight__gt=0)
+            .order_by("id")
+            .values_list("rule_id", "owner_id", "weight", "max_open_tickets")
+        ):
+            if owner_id in self.owners:
+                candidates[rule_id].append((owner_id, weight, limit))
+
+        # category -> rules, best first
+        self.rules = defaultdict(list)
+        rules = RoutingRule.objects.filter(is_active=True).values_list(
+            "id", "category", "location_id", "priority"
+        )
+        for rule_id, category, location_id, priority in sorted(
+            rules, key=lambda rule: (-rule[3], rule[2] is None, rule[0])
+        ):
+            if candidates[rule_id]:
+                self.rules[normalize_category(category)].append(
+                    CompiledRule(location_id, candidates[rule_id])
+                )
+
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+        self.version = cache.get(ROUTING_VERSION_CACHE_KEY, 0)
+
+    def is_current(self):
+        return (
+            time.monotonic() - self.built_at < ROUTING_TABLE_TTL
+            and cache.get(ROUTING_VERSION_CACHE_KEY, 0) == self.version
+        )
+
+    def matching_rules(self, category, location_id=None):
+        return [
+            rule
+            for rule in self.rules.get(normalize_category(category), ())
+            if rule.location_id is None or rule.location_id == location_id
+        ]
+
+    def route(self, category, location_id, workloads):
+        """Owner id chosen by the rules, or None."""
+        with self.lock:
+            for rule in self.matching_rules(category, location_id):
+                owner_id = rule.pick(workloads)
+                if owner_id is not None:
+                    return owner_id
+        return None
+
+
+_table = None
+
+
+def routing_table():
+    global _table
+    if _table is None or not _table.is_current():
+        _table = RoutingTable()
+    return _table
+
+
+def link_seeded_owners(employee_ids):
+    """Make the owners among ``employee_ids`` candidates of the rules seeded
+    for them before they existed (RoutingRule.seed_owner_employee_id).
+    Returns the number of rules linked."""
+    owners = dict(
+        CustomUser.objects.filter(role="owner", employee_id__in=set(employee_ids) - {""})
+        .values_list("employee_id", "id")
+    )
+    if not owners:
+        return 0
+
+    rules = list(RoutingRule.objects.filter(seed_owner_employee_id__in=owners.keys()))
+    if not rules:
+        return 0
+
+    with transaction.atomic():
+        RoutingRuleCandidate.objects.bulk_create(
+            [
+                RoutingRuleCandidate(rule=rule, owner_id=owners[rule.seed_owner_employee_id])
+                for rule in rules
+            ],
+            ignore_conflicts=True,
+        )
+        # Linked once: an admin may remove the candidate again later
+        RoutingRule.objects.filter(pk__in=[rule.pk for rule in rules]).update(
+            seed_owner_employee_id=""
+        )
+    # bulk_create sends no post_save
+    invalidate_routing_table()
+    return len(rules)
+
+
+def invalidate_routing_table():
+    global _table
+    _table = None
+    try:
+        cache.incr(ROUTING_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(ROUTING_VERSION_CACHE_KEY, 1, None)
+
+
+# -----------------------------------------
+# Owner selection
+# -----------------------------------------
+def rule_owner(category, location_id=None):
+    """Owner picked by the routing rules for ``category``, or None."""
+    table = routing_table()
+    rules = table.matching_rules(category, location_id)
+    if not rules:
+        return None
+
+    owner_ids = {owner_id for rule in rules for owner_id, _, _ in rule.candidates}
+    workloads = dict(
+        OwnerWorkload.objects.filter(owner_id__in=owner_ids).values_list("owner_id", "open_tickets")
+    )
+    owner_id = table.route(category, location_id, workloads)
+    return table.owners.get(owner_id)
+
+
+def least_loaded_owner():
+    """Active owner with the fewest open tickets (ties: lowest id)."""
+    return (
+        CustomUser.objects.filter(role="owner", is_active=True)
+        .annotate(open_tickets=Coalesce("workload__open_tickets", 0))
+        .order_by("open_tickets", "id")
+        .first()
+    )
+
+
+def route_ticket(category, location_id=None):
+    """Owner a new ticket in ``category`` raised at ``location_id`` should be
+    assigned to, or None when there are no owners at all.
+    """
+    return rule_owner(category, location_id) or least_loaded_owner()
+
+
+# -----------------------------------------
+# Open-ticket counters
+# -----------------------------------------
+def _open_owner(bucket):
+    # bucket is a rollups.ticket_bucket() tuple: (..., owner_id, status, breached)
+    if bucket is None or bucket[4] in CLOSED_STATUSES:
+        return None
+    return bucket[3]
+
+
+def apply_workload(owner_id, delta):
+    if owner_id is None:
+        return
+    if OwnerWorkload.objects.filter(owner_id=owner_id).update(
+        open_tickets=F("open_tickets") + delta
+    ) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            OwnerWorkload.objects.create(owner_id=owner_id, open_tickets=delta)
+    except IntegrityError:
+        # Another writer created the row first
+        OwnerWorkload.objects.filter(owner_id=owner_id).update(
+            open_tickets=F("open_tickets") + delta
+        )
+
+
+def move_workload(old_bucket, new_bucket):
+    old_owner, new_owner = _open_owner(old_bucket), _open_owner(new_bucket)
+    if old_owner == new_owner:
+        return
+    apply_workload(old_owner, -1)
+    apply_workload(new_owner, 1)
+
+
+def move_workloads(moves):
+    """move_workload() for many (old_bucket, new_bucket) pairs, one write per
+    owner whose count actually changes."""
+    deltas = Counter()
+    for old_bucket, new_bucket in moves:
+        old_owner, new_owner = _open_owner(old_bucket), _open_owner(new_bucket)
+        if old_owner != new_owner:
+            deltas[old_owner] -= 1
+            deltas[new_owner] += 1
+    for owner_id, delta in deltas.items():
+        if delta:
+            apply_workload(owner_id, delta)
+
+
+def rebuild_owner_workload():
+    """Recompute every owner's open-ticket count from the ticket table."""
+    counts = list(
+        Ticket.objects.filter(assigned_owner__isnull=False)
+        .exclude(status__in=CLOSED_STATUSES)
+        .values("assigned_owner_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        OwnerWorkload.objects.all().delete()
+        OwnerWorkload.objects.bulk_create(
+            [OwnerWorkload(owner_id=row["assigned_owner_id"], open_tickets=row["n"]) for row in counts]
+        )
+    return len(counts)
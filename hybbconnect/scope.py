@@ -0,0 +1,158 @@
+# scope.py — which locations a user may see
+#
+# A user's AccessScope (location ids + codes) is resolved once and kept per
+# user in process memory, so views and forms filter by a precomputed id set
+# instead of querying the cluster manager profile / M2M on every use:
+#
+#   kitchen staff, kitchen manager   their own location
+#   cluster manager                  the locations on their profile
+#   admin, owner                     every location (unrestricted)
+#
+# AccessScopeMiddleware puts the scope on request.scope; elsewhere use
+# get_scope(user). signals.py bumps a version in the cache when a user, a
+# cluster manager profile (or its locations) or a location changes; a kept
+# scope is used while its versions still match, the way routing.py checks its
+# table (see CACHES in settings.py). A request costs one cache read.
+
+import time
+
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .models import CustomUser, Location
+
+SCOPE_GENERATION_CACHE_KEY = "hybbconnect:scope_generation"
+SCOPE_VERSION_CACHE_KEY = "hybbconnect:scope_version:{}"
+SCOPE_TTL = 5 * 60
+
+UNRESTRICTED_ROLES = ("admin", "owner")
+OWN_LOCATION_ROLES = ("kitchen_staff", "kitchen_manager")
+
+
+class AccessScope:
+    def __init__(self, role, location_ids=(), location_codes=(), unrestricted=False):
+        self.role = role
+        self.location_ids = frozenset(location_ids)
+        self.location_codes = frozenset(location_codes)
+        self.unrestricted = unrestricted
+
+    def allows(self, location_id):
+        return self.unrestricted or location_id in self.location_ids
+
+    def restrict(self, queryset, field="location"):
+        """``queryset`` limited to rows whose ``field`` FK is in scope."""
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(**{f"{field}_id__in": self.location_ids})
+
+    def restrict_codes(self, queryset, field="location"):
+        """Same as restrict() for a column holding location codes (KitchenLog)."""
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(**{f"{field}__in": self.location_codes})
+
+    def locations(self):
+        if self.unrestricted:
+            return Location.objects.all()
+        return Location.objects.filter(id__in=self.location_ids)
+
+    def users(self, *roles):
+        # Lists of users show their location, so it is joined up front
+        return self.restrict(CustomUser.objects.filter(role__in=roles)).select_related("location")
+
+    def staff(self):
+        """Kitchen staff in scope."""
+        return self.users("kitchen_staff")
+
+
+# -----------------------------------------
+# Resolution + cache
+# -----------------------------------------
+def _resolve(user):
+    role = user.role
+
+    if role in UNRESTRICTED_ROLES:
+        rows = Location.objects.values_list("id", "code")
+    elif role == "cluster_manager":
+        rows = Location.objects.filter(cluster_managers__user=user).values_list("id", "code")
+    elif role in OWN_LOCATION_ROLES and user.location_id:
+        rows = Location.objects.filter(id=user.location_id).values_list("id", "code")
+    else:
+        rows = []
+
+    rows = list(rows)
+    return AccessScope(
+        role,
+        [location_id for location_id, _ in rows],
+        [code for _, code in rows],
+        unrestricted=role in UNRESTRICTED_ROLES,
+    )
+
+
+# user id -> (versions, built_at, scope), per process
+_scopes = {}
+
+
+def _versions(user_id):
+    """(all-scopes generation, this user's version), in one cache read."""
+    key = SCOPE_VERSION_CACHE_KEY.format(user_id)
+    versions = cache.get_many([SCOPE_GENERATION_CACHE_KEY, key])
+    return versions.get(SCOPE_GENERATION_CACHE_KEY, 0), versions.get(key, 0)
+
+
+def get_scope(user):
+    """The user's AccessScope, from the per-instance memo, the process memo,
+    or the DB."""
+    if not getattr(user, "is_authenticated", False):
+        return AccessScope(role=None)
+
+    scope = getattr(user, "_access_scope", None)
+    if scope is not None:
+        return scope
+
+    versions = _versions(user.pk)
+    kept = _scopes.get(user.pk)
+    # A kept scope is only trusted for the role it was built for
+    if (
+        kept is not None
+        and kept[0] == versions
+        and time.monotonic() - kept[1] < SCOPE_TTL
+        and kept[2].role == user.role
+    ):
+        scope = kept[2]
+    else:
+        scope = _resolve(user)
+        _scopes[user.pk] = (versions, time.monotonic(), scope)
+
+    user._access_scope = scope
+    return scope
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_scope(user_id):
+    _scopes.pop(user_id, None)
+    _bump(SCOPE_VERSION_CACHE_KEY.format(user_id))
+
+
+def invalidate_all_scopes():
+    _scopes.clear()
+    _bump(SCOPE_GENERATION_CACHE_KEY)
+
+
+class AccessScopeMiddleware:
+    """Sets ``request.scope`` (resolved on first use). Goes after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.scope = SimpleLazyObject(lambda: get_scope(request.user))
+        return self.get_response(request)
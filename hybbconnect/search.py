@@ -0,0 +1,269 @@
+# search.py — full-text search over kitchen logs and tickets
+#
+# Each KitchenLog / Ticket carries a denormalised `search_document` (own columns
+# plus the staff / employee / location names it is usually searched by), filled
+# on save by signals.py. The document is indexed per database:
+#
+#   SQLite      FTS5 external-content table kept in sync by triggers
+#   PostgreSQL  GIN index on to_tsvector('simple', search_document)
+#   other       plain icontains on the single column (no joins)
+#
+# search() hides the difference: every word is a prefix match and all words
+# must match. ranked=True orders best match first (bm25 / ts_rank; every match
+# ranks the same on the fallback). Tables and indexes are created by
+# migration 0013.
+
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import KitchenLog, Ticket
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Model -> FTS5 table (SQLite) / GIN index (PostgreSQL) created by migration 0013
+SEARCH_TABLES = {
+    KitchenLog: "hybbconnect_kitchenlog_fts",
+    Ticket: "hybbconnect_ticket_fts",
+}
+
+
+# -----------------------------------------
+# Documents
+# -----------------------------------------
+def _join(*parts):
+    return " ".join(str(part) for part in parts if part)
+
+
+def kitchen_log_document(log):
+    staff = log.staff
+    return _join(
+        log.emp_id,
+        log.emp_name,
+        staff and staff.employee_id,
+        staff and staff.username,
+        staff and staff.first_name,
+        staff and staff.last_name,
+        log.location,
+        log.category,
+    )
+
+
+def ticket_document(ticket):
+    employee = ticket.employee
+    return _join(
+        ticket.ticket_number,
+        ticket.employee_code,
+        ticket.name,
+        employee.username,
+        employee.employee_id,
+        ticket.location and ticket.location.name,
+        ticket.concern,
+    )
+
+
+# Ticket fields ticket_document() reads; writes touching none of them can
+# keep the stored document
+TICKET_DOCUMENT_FIELDS = {
+    "ticket_number", "employee_code", "name", "employee", "location", "concern",
+}
+
+
+# Model -> (document builder, relations it reads)
+DOCUMENT_BUILDERS = {
+    KitchenLog: (kitchen_log_document, ("staff",)),
+    Ticket: (ticket_document, ("employee", "location")),
+}
+
+
+def refresh_search_documents(queryset, batch_size=500):
+    """Recompute ``search_document`` for every row of ``queryset``.
+
+    Only rows whose document changed are written. Returns the number written.
+    """
+    build, related = DOCUMENT_BUILDERS[queryset.model]
+    changed = []
+    written = 0
+
+    for obj in queryset.select_related(*related).iterator(chunk_size=batch_size):
+        document = build(obj)
+        if document != obj.search_document:
+            obj.search_document = document
+            changed.append(obj)
+
+        if len(changed) >= batch_size:
+            queryset.model.objects.bulk_update(changed, ["search_document"])
+            written += len(changed)
+            changed = []
+
+    if changed:
+        queryset.model.objects.bulk_update(changed, ["search_document"])
+        written += len(changed)
+    return written
+
+
+# -----------------------------------------
+# Index DDL (used by migration 0013 and rebuild_search_index)
+# -----------------------------------------
+def _sqlite_ddl(table, fts):
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"search_document, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, search_document) VALUES (new.id, new.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF search_document ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); "
+        f"INSERT INTO {fts}(rowid, search_document) VALUES (new.id, new.search_document); END",
+    ]
+
+
+def install_search_index(connection):
+    """Create the FTS tables + triggers (SQLite) or GIN indexes (PostgreSQL).
+
+    Safe to re-run: SQLite drops triggers when Django rebuilds a table for an
+    AlterField, and `manage.py rebuild_search_index` puts them back.
+    """
+    with connection.cursor() as cursor:
+        for model, fts in SEARCH_TABLES.items():
+            table = model._meta.db_table
+
+            if connection.vendor == "sqlite":
+                try:
+                    for statement in _sqlite_ddl(table, fts):
+                        cursor.execute(statement)
+                except OperationalError:
+                    # SQLite built without FTS5: search() falls back to icontains
+                    return
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {fts} ON {table} "
+                    f"USING GIN (to_tsvector('simple', search_document))"
+                )
+
+    _fts_tables.pop(connection.alias, None)
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        for fts in SEARCH_TABLES.values():
+            if connection.vendor == "sqlite":
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+                cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+            elif connection.vendor == "postgresql":
+                cursor.execute(f"DROP INDEX IF EXISTS {fts}")
+
+    _fts_tables.pop(connection.alias, None)
+
+
+# -----------------------------------------
+# Backend detection
+# -----------------------------------------
+_fts_tables = {}
+
+
+def _backend(model, alias):
+    connection = connections[alias]
+
+    if connection.vendor == "postgresql":
+        return "postgresql"
+
+    if connection.vendor == "sqlite":
+        # FTS5 may be missing from the SQLite build; the migration then skips it
+        if alias not in _fts_tables:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                _fts_tables[alias] = {row[0] for row in cursor.fetchall()}
+        if SEARCH_TABLES[model] in _fts_tables[alias]:
+            return "sqlite"
+
+    return "fallback"
+
+
+# -----------------------------------------
+# Query
+# -----------------------------------------
+def search_terms(text):
+    # \w+ only, so terms never carry FTS5 / tsquery operators or quotes
+    return WORD_RE.findall(text or "")
+
+
+def search(queryset, text, ranked=False):
+    """Filter ``queryset`` to rows whose document matches every word of ``text``
+    as a prefix.
+
+    With ``ranked=True`` the rows are annotated with ``search_rank`` and ordered
+    best match first.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    model = queryset.model
+    backend = _backend(model, queryset.db)
+    table = model._meta.db_table
+
+    if backend == "sqlite":
+        fts = SEARCH_TABLES[model]
+        match = " ".join(f'"{term}"*' for term in terms)
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [match])
+        )
+        if ranked:
+            # bm25 is smaller for better matches
+            rank = RawSQL(
+                f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = "{table}"."id"',
+                [match],
+                output_field=FloatField(),
+            )
+            queryset = queryset.annotate(search_rank=rank).order_by(
+                "-search_rank", "-id"
+            )
+        return queryset
+
+    if backend == "postgresql":
+        vector = f"""to_tsvector('simple', "{table}"."search_document")"""
+        query = " & ".join(f"{term}:*" for term in terms)
+        queryset = queryset.filter(
+            RawSQL(
+                f"{vector} @@ to_tsquery('simple', %s)",
+                [query],
+                output_field=BooleanField(),
+            )
+        )
+        if ranked:
+            rank = RawSQL(
+                f"ts_rank({vector}, to_tsquery('simple', %s))",
+                [query],
+                output_field=FloatField(),
+            )
+            queryset = queryset.annotate(search_rank=rank).order_by(
+                "-search_rank", "-id"
+            )
+        return queryset
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    if ranked:
+        queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by(
+            "-search_rank", "-id"
+        )
+    return queryset
+
+
+def rebuild_search_index():
+    """Recompute every document, then recreate and rebuild the search index."""
+    written = {
+        model._meta.label: refresh_search_documents(model.objects.all())
+        for model in SEARCH_TABLES
+    }
+    install_search_index(connections["default"])
+    return written
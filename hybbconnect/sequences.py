@@ -0,0 +1,116 @@
+# sequences.py — atomic number allocation (ticket numbers)
+
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import NumberSequence
+
+TICKET_SEQUENCE = "ticket"
+
+
+def _reserve(name, count):
+    """Bump the counter row by ``count`` and return the last value reserved.
+
+    The UPDATE takes the row (SQLite: database) write lock, so the follow-up
+    read inside the same transaction always sees our own increment.
+    """
+    with transaction.atomic():
+        updated = NumberSequence.objects.filter(name=name).update(
+            last_value=F("last_value") + count
+        )
+        if not updated:
+            NumberSequence.objects.get_or_create(name=name)
+            NumberSequence.objects.filter(name=name).update(
+                last_value=F("last_value") + count
+            )
+        return NumberSequence.objects.filter(name=name).values_list(
+            "last_value", flat=True
+        ).get()
+
+
+def next_value(name):
+    """Reserve the next value of sequence ``name`` in the caller's transaction."""
+    return _reserve(name, 1)
+
+
+class SequenceAllocator:
+    """Hands out values from a named sequence.
+
+    With ``block_size=1`` (default) every value is reserved in the caller's
+    transaction, so numbers are gap-free. Larger blocks reserve a range per
+    thread and serve it from memory; unused values are lost when the process
+    exits, trading gaps for fewer writes to the counter row.
+
+    A block reserved inside a transaction only exists once that transaction
+    commits. Until then it is served to that transaction alone, and it is
+    thrown away if the transaction (or the savepoint it was reserved in)
+    rolls back, since the counter row rolled back with it and another
+    process may reserve the same range.
+    """
+
+    def __init__(self, name, block_size=1):
+        self.name = name
+        self.block_size = max(int(block_size), 1)
+        # Per thread, so a block is only ever used on the connection that
+        # reserved it
+        self._block = threading.local()
+
+    def _block_state(self):
+        block = self._block
+        if not hasattr(block, "next"):
+            block.next, block.last, block.pending = 0, -1, None
+        return block
+
+    def next_value(self):
+        if self.block_size == 1:
+            return _reserve(self.name, 1)
+
+        block = self._block_state()
+        connection = transaction.get_connection()
+
+        # Django drops on_commit callbacks of rolled-back transactions and
+        # savepoints; if ours is gone the reservation never happened
+        if block.pending is not None and not any(
+            func is block.pending for _, func, _ in connection.run_on_commit
+        ):
+            block.next, block.last, block.pending = 0, -1, None
+
+        if block.next > block.last:
+            block.last = _reserve(self.name, self.block_size)
+            block.next = block.last - self.block_size + 1
+            block.pending = None
+            if connection.in_atomic_block:
+
+                def confirm():
+                    if block.pending is confirm:
+                        block.pending = None
+
+                block.pending = confirm
+                transaction.on_commit(confirm)
+
+        value = block.next
+        block.next += 1
+        return value
+
+
+_ticket_allocator = None
+
+
+def format_ticket_number(value):
+    prefix = getattr(settings, "TICKET_NUMBER_PREFIX", "TIK")
+    width = getattr(settings, "TICKET_NUMBER_WIDTH", 5)
+    return f"{prefix}-{value:0{width}d}"
+
+
+def next_ticket_number():
+    """Return the next formatted ticket number, e.g. ``TIK-00042``."""
+    global _ticket_allocator
+    if _ticket_allocator is None:
+        _ticket_allocator = SequenceAllocator(
+            TICKET_SEQUENCE,
+            block_size=getattr(settings, "TICKET_NUMBER_BLOCK_SIZE", 1),
+        )
+    return format_ticket_number(_ticket_allocator.next_value())
@@ -0,0 +1,332 @@
+# signals.py — keep caches and derived data in step with model writes
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .blobs import move_refs, photo_file_names, stored_photo_file_names
+from .jobs import bump_export_version
+from .metrics import invalidate_admin_metrics
+from .models import (
+    ClusterManagerProfile,
+    CustomUser,
+    KitchenLog,
+    Location,
+    OrderPhoto,
+    OrderPhotoIndex,
+    RoutingRule,
+    RoutingRuleCandidate,
+    StaffPerformance,
+    StaffTimeUpdate,
+    Ticket,
+)
+from .photo_index import (
+    INDEXED_PHOTO_FIELDS,
+    INDEXED_USER_FIELDS,
+    index_photos,
+    refresh_photo_index,
+)
+from .renditions import RENDITION_ERRORS, render_order_photo
+from .rollups import (
+    UNKNOWN_BUCKET,
+    apply_bucket,
+    detach_tickets,
+    move_ticket,
+    stored_bucket,
+    ticket_bucket,
+)
+from .routing import apply_workload, invalidate_routing_table, link_seeded_owners, move_workload
+from .scope import invalidate_all_scopes, invalidate_scope
+from .search import kitchen_log_document, refresh_search_documents, ticket_document
+from .staff_data import invalidate_staff_data, link_legacy_logs
+from .ticket_actions import invalidate_reassign_candidates
+
+
+# ---------------------------------------------------------
+# Admin dashboard counters
+# ---------------------------------------------------------
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_admin_metrics(sender, **kwargs):
+    invalidate_admin_metrics()
+
+
+# ---------------------------------------------------------
+# Ticket statistics rollup + owner open-ticket counts
+# ---------------------------------------------------------
+@receiver(post_init, sender=Ticket)
+def remember_ticket_bucket(sender, instance, **kwargs):
+    instance._rollup_bucket = ticket_bucket(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+@receiver(pre_delete, sender=Ticket)
+def resolve_ticket_bucket(sender, instance, **kwargs):
+    if instance._rollup_bucket is UNKNOWN_BUCKET:
+        instance._rollup_bucket = stored_bucket(instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def update_ticket_rollup(sender, instance, created, **kwargs):
+    old = None if created else instance._rollup_bucket
+    new = ticket_bucket(instance)
+    if new is UNKNOWN_BUCKET:
+        new = stored_bucket(instance.pk)
+    move_ticket(old, new)
+    move_workload(old, new)
+    instance._rollup_bucket = new
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket_from_rollup(sender, instance, **kwargs):
+    apply_bucket(instance._rollup_bucket, -1)
+    move_workload(instance._rollup_bucket, None)
+
+
+# Ticket.location / assigned_owner are nulled by a queryset update, without
+# signals; the rollup rows of the deleted object go with it (CASCADE), so
+# the surviving tickets are moved to their NULL buckets first
+@receiver(pre_delete, sender=Location)
+def detach_location_tickets(sender, instance, **kwargs):
+    detach_tickets(Ticket.objects.filter(location=instance), location_id=None)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def detach_owner_tickets(sender, instance, **kwargs):
+    # The user's own tickets are deleted with them and leave via post_delete
+    detach_tickets(
+        Ticket.objects.filter(assigned_owner=instance).exclude(employee=instance),
+        assigned_owner_id=None,
+    )
+
+
+# ---------------------------------------------------------
+# Ticket routing table
+# ---------------------------------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_save, sender=RoutingRule)
+@receiver(post_delete, sender=RoutingRule)
+@receiver(post_save, sender=RoutingRuleCandidate)
+@receiver(post_delete, sender=RoutingRuleCandidate)
+def reset_routing_table(sender, update_fields=None, **kwargs):
+    # Logins save last_login only, which routing does not read
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_routing_table()
+
+
+@receiver(post_save, sender=CustomUser)
+def link_new_owner_rules(sender, instance, update_fields=None, **kwargs):
+    # Also when an existing user becomes an owner
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    if instance.role == "owner":
+        link_seeded_owners([instance.employee_id])
+
+
+# ---------------------------------------------------------
+# Owner dashboard reassign list
+# ---------------------------------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_reassign_candidates(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_reassign_candidates()
+
+
+# ---------------------------------------------------------
+# Staff dashboard data (a user's own performance, logs, tickets)
+# ---------------------------------------------------------
+# Model -> field holding the user whose cached data a row belongs to
+STAFF_DATA_USER_FIELDS = {
+    StaffPerformance: "employee_id",
+    KitchenLog: "staff_id",
+    Ticket: "employee_id",
+}
+
+
+@receiver(pre_save, sender=KitchenLog)
+def link_kitchen_log_staff(sender, instance, **kwargs):
+    # Runs before fill_kitchen_log_document so the document has the names
+    if instance.staff_id is None and instance.emp_id:
+        instance.staff = CustomUser.objects.filter(employee_id=instance.emp_id).first()
+
+
+@receiver(post_save, sender=CustomUser)
+def link_new_user_logs(sender, instance, created, **kwargs):
+    if created:
+        link_legacy_logs([instance.employee_id])
+
+
+@receiver(post_save, sender=StaffPerformance)
+@receiver(post_delete, sender=StaffPerformance)
+@receiver(post_save, sender=KitchenLog)
+@receiver(post_delete, sender=KitchenLog)
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def reset_staff_data(sender, instance, **kwargs):
+    invalidate_staff_data(getattr(instance, STAFF_DATA_USER_FIELDS[sender]))
+
+
+# ---------------------------------------------------------
+# Search documents
+# ---------------------------------------------------------
+SEARCHED_USER_FIELDS = {"username", "first_name", "last_name", "employee_id"}
+
+
+@receiver(pre_save, sender=KitchenLog)
+def fill_kitchen_log_document(sender, instance, **kwargs):
+    instance.search_document = kitchen_log_document(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+def fill_ticket_document(sender, instance, **kwargs):
+    instance.search_document = ticket_document(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_user_documents(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login only; skip anything that cannot change a document
+    if created or (update_fields is not None and not SEARCHED_USER_FIELDS & set(update_fields)):
+        return
+    refresh_search_documents(Ticket.objects.filter(employee=instance))
+    refresh_search_documents(KitchenLog.objects.filter(staff=instance))
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_documents(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(Ticket.objects.filter(location=instance))
+
+
+# ---------------------------------------------------------
+# Order photo renditions + stored file reference counts
+# ---------------------------------------------------------
+@receiver(pre_save, sender=OrderPhoto)
+def render_uploaded_photo(sender, instance, **kwargs):
+    # Only a fresh upload is uncommitted; stored photos keep their files
+    if instance.photo and not instance.photo._committed:
+        try:
+            render_order_photo(instance)
+        except RENDITION_ERRORS:
+            # Pillow cannot decode it (truncated, corrupt, too large): keep
+            # the upload as it is, without renditions, rather than fail the
+            # save; the gallery links it without a thumbnail
+            pass
+
+
+@receiver(post_init, sender=OrderPhoto)
+def remember_photo_files(sender, instance, **kwargs):
+    instance._stored_files = photo_file_names(instance)
+
+
+@receiver(pre_save, sender=OrderPhoto)
+@receiver(pre_delete, sender=OrderPhoto)
+def resolve_photo_files(sender, instance, **kwargs):
+    if instance._stored_files is None:
+        instance._stored_files = stored_photo_file_names(instance.pk)
+
+
+@receiver(post_save, sender=OrderPhoto)
+def count_photo_files(sender, instance, created, **kwargs):
+    names = photo_file_names(instance)
+    if names is None:
+        names = stored_photo_file_names(instance.pk)
+    move_refs(() if created else instance._stored_files, names)
+    instance._stored_files = names
+
+
+@receiver(post_delete, sender=OrderPhoto)
+def release_photo_files(sender, instance, **kwargs):
+    move_refs(instance._stored_files, ())
+
+
+# ---------------------------------------------------------
+# Order photo gallery index
+# ---------------------------------------------------------
+@receiver(post_save, sender=OrderPhoto)
+def index_order_photo(sender, instance, update_fields=None, **kwargs):
+    # Rendition backfills only touch the files
+    if update_fields is not None and not INDEXED_PHOTO_FIELDS & set(update_fields):
+        return
+    index_photos([instance])
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_user_photo_index(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not INDEXED_USER_FIELDS & set(update_fields)):
+        return
+    refresh_photo_index(OrderPhoto.objects.filter(uploaded_by=instance))
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_photo_index(sender, instance, created, **kwargs):
+    if not created:
+        refresh_photo_index(OrderPhoto.objects.filter(location=instance))
+
+
+@receiver(pre_delete, sender=CustomUser)
+def unindex_deleted_uploader(sender, instance, **kwargs):
+    # The photos' uploaded_by is nulled by a queryset update, without signals
+    OrderPhotoIndex.objects.filter(photo__uploaded_by=instance).update(
+        username_key="", first_name_key="", last_name_key="",
+        uploader_name="", uploader_employee_id="",
+    )
+
+
+@receiver(pre_delete, sender=Location)
+def unindex_deleted_location(sender, instance, **kwargs):
+    OrderPhotoIndex.objects.filter(location=instance).update(
+        location_code_key="", location_name_key="", location_name="",
+    )
+
+
+# ---------------------------------------------------------
+# Export cache versions (see jobs.export_data_version)
+# ---------------------------------------------------------
+@receiver(post_save, sender=OrderPhoto)
+@receiver(post_delete, sender=OrderPhoto)
+def bump_photo_export_version(sender, **kwargs):
+    bump_export_version("order_photos")
+
+
+@receiver(post_save, sender=StaffTimeUpdate)
+@receiver(post_delete, sender=StaffTimeUpdate)
+def bump_staff_update_export_version(sender, **kwargs):
+    bump_export_version("staff_time_updates")
+
+
+# ---------------------------------------------------------
+# Access scopes (visible locations per user)
+# ---------------------------------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_user_scope(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_scope(instance.pk)
+
+
+@receiver(post_save, sender=ClusterManagerProfile)
+@receiver(post_delete, sender=ClusterManagerProfile)
+def reset_cluster_manager_scope(sender, instance, **kwargs):
+    invalidate_scope(instance.user_id)
+
+
+@receiver(m2m_changed, sender=ClusterManagerProfile.locations.through)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def reset_all_scopes(sender, **kwargs):
+    # Profile <-> location links can change from either side; rare enough
+    # to simply drop every cached scope
+    invalidate_all_scopes()
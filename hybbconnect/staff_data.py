@@ -0,0 +1,105 @@
+# staff_data.py — a kitchen staff member's own records
+#
+# The staff dashboard, "My tickets" and "My logs" read a user's latest
+# performance months, kitchen logs and tickets, each capped and fetched as
+# plain rows with only the columns those pages show. Each page loads only the
+# sections it displays. Sections are cached per user (see CACHES in
+# settings.py); signals.py drops them when one of the user's performance
+# rows, logs or tickets is saved or deleted, and the bulk writers (importers,
+# ticket_actions) drop them for the users they touch.
+#
+# Logs are matched on the staff FK alone. Legacy rows that only carried an
+# emp_id were linked by migration 0019; new ones are linked when saved
+# (signals.py) or when their user is created (link_legacy_logs).
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .models import CustomUser, KitchenLog, StaffPerformance, Ticket
+from .search import refresh_search_documents
+
+STAFF_DATA_TTL = 5 * 60
+
+PERFORMANCE_FIELDS = (
+    "id", "month", "bau_status", "rating", "incentive", "ot_sacoff_amount",
+    "referral_bonus", "dsat_deduction", "wrong_order_deduction",
+    "mrd_deduction_staff", "other_deduction", "earning_total", "deduction_total",
+)
+LOG_FIELDS = (
+    "id", "created_at", "log_date", "category", "remarks", "is_acknowledged",
+    "acknowledged_at",
+)
+TICKET_FIELDS = (
+    "id", "ticket_number", "concern", "concern_category", "status",
+    "staff_confirmed", "created_at",
+)
+
+# section -> (model, user field, columns, ordering, row limit)
+STAFF_DATA_SECTIONS = {
+    "performance": (StaffPerformance, "employee", PERFORMANCE_FIELDS, ("-id",), 12),
+    "logs": (KitchenLog, "staff", LOG_FIELDS, ("-created_at", "-id"), 100),
+    "tickets": (Ticket, "employee", TICKET_FIELDS, ("-created_at", "-id"), 100),
+}
+
+
+def _cache_key(user_id, section):
+    return f"hybbconnect:staff_data:{section}:{user_id}"
+
+
+def load_staff_section(user, section):
+    """``(rows, more)``: the latest rows of one section for ``user``, and
+    whether older ones were cut off."""
+    model, user_field, fields, ordering, limit = STAFF_DATA_SECTIONS[section]
+    # One extra row tells the page whether older records were cut off
+    rows = list(
+        model.objects.filter(**{user_field: user}).order_by(*ordering).values(*fields)[: limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def get_staff_data(user, *sections):
+    """``{section: rows, "more_<section>": bool}`` for the given sections."""
+    keys = {section: _cache_key(user.pk, section) for section in sections}
+    cached = cache.get_many(keys.values())
+
+    data, missing = {}, {}
+    for section, key in keys.items():
+        value = cached.get(key)
+        if value is None:
+            value = missing[key] = load_staff_section(user, section)
+        data[section], data[f"more_{section}"] = value
+    if missing:
+        cache.set_many(missing, STAFF_DATA_TTL)
+    return data
+
+
+def invalidate_staff_data(*user_ids):
+    cache.delete_many([
+        _cache_key(user_id, section)
+        for user_id in set(user_ids) if user_id is not None
+        for section in STAFF_DATA_SECTIONS
+    ])
+
+
+# -----------------------------------------
+# Legacy logs (emp_id only)
+# -----------------------------------------
+def link_legacy_logs(employee_ids):
+    """Point unlinked KitchenLogs whose emp_id is one of ``employee_ids`` at the
+    user with that employee id. Returns the number of logs linked."""
+    employee_ids = [employee_id for employee_id in employee_ids if employee_id]
+    if not employee_ids:
+        return 0
+
+    linked = KitchenLog.objects.filter(staff__isnull=True, emp_id__in=employee_ids).update(
+        staff_id=Subquery(
+            CustomUser.objects.filter(employee_id=OuterRef("emp_id")).values("id")[:1]
+        )
+    )
+    if linked:
+        # update() skips pre_save; the documents now include the staff names
+        refresh_search_documents(KitchenLog.objects.filter(staff__employee_id__in=employee_ids))
+        invalidate_staff_data(
+            *CustomUser.objects.filter(employee_id__in=employee_ids).values_list("id", flat=True)
+        )
+    return linked
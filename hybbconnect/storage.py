@@ -0,0 +1,130 @@
+# storage.py — content-addressed file storage for order photos, and private
+# storage for job files
+#
+# Files are named by the SHA-256 of their bytes and sharded two levels deep
+# under the field's upload_to directory:
+#
+#   order_photos/IMG_1234.jpg  ->  order_photos/3f/a9/3fa9…c2.webp
+#
+# so no directory grows past a few hundred entries and saving bytes that are
+# already stored returns the existing name instead of writing a copy. Files
+# are never deleted on save or delete; blobs.py counts the rows referring to
+# each file and `manage.py gc_photo_storage` removes the unreferenced ones.
+# Photos stored before hashing keep their flat names until `manage.py
+# migrate_photo_storage` moves them.
+#
+# Import uploads (payroll, user passwords) and export files go to
+# PrivateStorage instead: outside MEDIA_ROOT, under random names.
+#
+# This module is imported by models.py, so it must not import models.
+
+import hashlib
+import os
+import re
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import cached_property
+
+HASH_NAME_RE = re.compile(r"(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.\w+)?$")
+
+
+class _AlreadyStored(Exception):
+    pass
+
+
+def file_digest(content):
+    """SHA-256 hex digest of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def name_digest(name):
+    """The digest a content-addressed ``name`` claims, or None for other names."""
+    match = HASH_NAME_RE.search(name)
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], f"{digest}{extension}")
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.hashed_name(name, file_digest(content))
+        if self.exists(name):
+            return name
+
+        try:
+            return self._save(name, content)
+        except _AlreadyStored:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Only reached from _save() when another process wrote the same
+        # name (hence the same bytes) between exists() and the write
+        raise _AlreadyStored(name)
+
+
+_photo_storage = ContentAddressedStorage()
+
+
+def photo_storage():
+    """Storage for OrderPhoto files; migrations refer to this callable."""
+    return _photo_storage
+
+
+# -----------------------------------------
+# Private files (import uploads, export files)
+# -----------------------------------------
+class PrivateStorage(FileSystemStorage):
+    """Files kept outside MEDIA_ROOT, under PRIVATE_MEDIA_ROOT, and never
+    served from MEDIA_URL. They are only read by the job workers and
+    handed out by views that check who is asking."""
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(
+            self._location,
+            getattr(settings, "PRIVATE_MEDIA_ROOT", os.path.join(settings.BASE_DIR, "private_media")),
+        )
+
+    @cached_property
+    def base_url(self):
+        return None  # url() raises instead of pointing at a public path
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        if setting == "PRIVATE_MEDIA_ROOT":
+            setting = "MEDIA_ROOT"
+        elif setting == "MEDIA_ROOT":
+            return
+        super()._clear_cached_properties(setting, **kwargs)
+
+
+_private_storage = PrivateStorage()
+
+
+def private_storage():
+    """Storage for ImportJob / ExportJob files; migrations refer to this callable."""
+    return _private_storage
+
+
+def random_file_name(directory, filename):
+    """``directory/<random hex><extension of filename>``: nothing of the
+    uploader's file name, and nothing a caller could guess."""
+    extension = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
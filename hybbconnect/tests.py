@@ -1,3 +1,1342 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from PIL import Image
+
+from .archives import (
+    MANIFEST_NAME,
+    archive_old_photos,
+    member_name,
+    open_original,
+    stream_photo_zip,
+)
+from .blobs import PHOTO_STORAGE
+from .exports import TICKET_EXPORT_HEADER, export_response, ticket_export_rows
+from .importers import (
+    SALARY_COLUMNS,
+    STAFF_PERFORMANCE_COLUMNS,
+    STAFF_PERFORMANCE_NUMBERS,
+    USER_REQUIRED_COLUMNS,
+    SalaryImport,
+    StaffPerformanceImport,
+    UserImport,
+)
+from .ingest import ingest
+from .jobs import (
+    import_heartbeat,
+    request_import,
+    requeue_stale_imports,
+    run_export_job,
+    run_import_job,
+)
+from .metrics import get_admin_metrics, invalidate_admin_metrics
+from .models import (
+    ClusterManagerProfile,
+    CustomUser,
+    ExportJob,
+    ImportJob,
+    KitchenLog,
+    Location,
+    OrderPhoto,
+    OwnerWorkload,
+    RoutingRule,
+    SalarySlip,
+    StaffPerformance,
+    StaffTimeUpdate,
+    StoredBlob,
+    Ticket,
+    TicketStatsRollup,
+)
+from .pagination import CursorPaginator
+from .reports import photo_index_queryset, ticket_report_queryset
+from .rollups import rebuild_ticket_stats
+from .scope import get_scope
+from .search import search
+from .sequences import SequenceAllocator, _reserve
+from .staff_data import (
+    STAFF_DATA_SECTIONS,
+    get_staff_data,
+    invalidate_staff_data,
+    link_legacy_logs,
+)
+from .uploads import UploadError, create_sessions, part_path, session_lock, write_chunk
+
+
+# -----------------------------------------
+# Ticket number allocation (sequences.py)
+# -----------------------------------------
+class SequenceAllocatorTests(TransactionTestCase):
+    THREADS = 8
+    PER_THREAD = 50
+
+    def _allocate_concurrently(self, allocator):
+        values, errors = [], []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(self.PER_THREAD):
+                    with transaction.atomic():
+                        value = allocator.next_value()
+                    with lock:
+                        values.append(value)
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        return values
+
+    def test_concurrent_allocation_is_unique_and_gap_free(self):
+        values = self._allocate_concurrently(SequenceAllocator("load-single"))
+
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(sorted(values), list(range(1, total + 1)))
+
+    def test_concurrent_block_allocation_is_unique(self):
+        values = self._allocate_concurrently(SequenceAllocator("load-block", block_size=7))
+
+        self.assertEqual(len(values), len(set(values)))
+
+    def test_block_is_served_within_its_transaction(self):
+        allocator = SequenceAllocator("block-tx", block_size=10)
+
+        with transaction.atomic():
+            first = allocator.next_value()
+            second = allocator.next_value()
+        third = allocator.next_value()
+
+        self.assertEqual([second, third], [first + 1, first + 2])
+
+    def test_rolled_back_block_is_discarded(self):
+        allocator = SequenceAllocator("block-rollback", block_size=10)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                allocator.next_value()
+                raise RuntimeError("insert failed")
+
+        # Another process now reserves the range the rolled-back block held
+        other_last = _reserve("block-rollback", 10)
+
+        self.assertGreater(allocator.next_value(), other_last)
+
+
+class TicketNumberLoadTests(TransactionTestCase):
+    """Parallel ``Ticket`` creates through ``Ticket.save``.
+
+    The floor is deliberately low so the test holds on a slow CI box;
+    raise ``TICKET_LOAD_MIN_RATE`` to check a production-sized machine.
+    """
+
+    THREADS = 8
+    TICKETS = 2000
+    MIN_ROWS_PER_SECOND = float(os.environ.get("TICKET_LOAD_MIN_RATE", 50))
+
+    def test_parallel_creates_are_unique_gap_free_and_fast(self):
+        staff = CustomUser.objects.create(username="staff", employee_id="E1", role="kitchen_staff")
+        per_thread = self.TICKETS // self.THREADS
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(per_thread):
+                    Ticket.objects.create(employee=staff, concern="Load", description="-")
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        self.assertEqual(errors, [])
+        numbers = sorted(
+            int(number.rsplit("-", 1)[1])
+            for number in Ticket.objects.values_list("ticket_number", flat=True)
+        )
+        self.assertEqual(numbers, list(range(1, self.TICKETS + 1)))
+        self.assertGreaterEqual(self.TICKETS / elapsed, self.MIN_ROWS_PER_SECOND)
+
+
+# -----------------------------------------
+# Ticket report columns (reports.py)
+# -----------------------------------------
+class TicketReportTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create(
+            username="staff", employee_id="E1", role="kitchen_staff"
+        )
+        self.other_owner = CustomUser.objects.create(
+            username="bob", employee_id="E2", role="owner"
+        )
+
+    def ticket(self, created_at, **fields):
+        ticket = Ticket.objects.create(employee=self.staff, concern="Gas", description="-")
+        # created_at is auto_now_add
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=created_at, **fields)
+        return ticket
+
+    def test_closed_ticket_columns(self):
+        created = timezone.make_aware(datetime(2026, 1, 1, 10, 0))
+        ticket = self.ticket(
+            created,
+            status="Closed",
+            closed_at=created + timedelta(hours=50),
+            staff_confirmed_at=timezone.make_aware(datetime(2026, 1, 4, 9, 0)),
+            reassigned_to=self.other_owner,
+        )
+
+        row = ticket_report_queryset().get(pk=ticket.pk)
+
+        self.assertEqual(row.pending_duration.days, 2)
+        self.assertEqual(row.confirm_duration.days, 3)
+        self.assertEqual(row.time_to_resolve, timedelta(hours=50))
+        self.assertTrue(row.sla_breach)
+        self.assertEqual(row.reassigned_info, "Reassigned to bob")
+
+    def test_open_ticket_columns(self):
+        created = timezone.localtime().replace(hour=12) - timedelta(days=5)
+        ticket = self.ticket(created)
+
+        row = ticket_report_queryset().get(pk=ticket.pk)
+
+        self.assertEqual(row.pending_duration.days, 5)
+        self.assertIsNone(row.confirm_duration)
+        self.assertIsNone(row.time_to_resolve)
+        self.assertFalse(row.sla_breach)
+        self.assertEqual(row.reassigned_info, "")
+
+    def test_filters(self):
+        now = timezone.now()
+        closed = self.ticket(now, status="Closed", assigned_owner=self.other_owner)
+        self.ticket(now, status="Pending")
+
+        self.assertEqual(list(ticket_report_queryset(status="Closed")), [closed])
+        self.assertEqual(
+            list(ticket_report_queryset(assigned_to=self.other_owner.pk)), [closed]
+        )
+
+
+# -----------------------------------------
+# Streaming exports (exports.py)
+# -----------------------------------------
+class TicketExportTests(TestCase):
+    TICKETS = 7
+
+    def setUp(self):
+        staff = CustomUser.objects.create(username="staff", employee_id="E1", role="kitchen_staff")
+        for i in range(self.TICKETS):
+            Ticket.objects.create(employee=staff, concern=f"Concern {i}", description="a,b\nc")
+        self.expected = list(
+            ticket_report_queryset().values_list("ticket_number", flat=True)
+        )
+
+    def export(self, fmt):
+        # Several iterator chunks, to cross their boundaries
+        with mock.patch("hybbconnect.exports.EXPORT_CHUNK_SIZE", 3):
+            response = export_response(
+                fmt, "tickets", TICKET_EXPORT_HEADER, ticket_export_rows(ticket_report_queryset())
+            )
+            return b"".join(response.streaming_content)
+
+    def test_csv_has_one_row_per_ticket(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv").decode())))
+
+        self.assertEqual(rows[0], TICKET_EXPORT_HEADER)
+        self.assertEqual([row[1] for row in rows[1:]], self.expected)
+        self.assertEqual({row[9] for row in rows[1:]}, {"a,b\nc"})
+
+    def test_xlsx_matches_csv(self):
+        csv_rows = list(csv.reader(io.StringIO(self.export("csv").decode())))
+        sheet = load_workbook(io.BytesIO(self.export("xlsx")), read_only=True).active
+        xlsx_rows = [
+            ["" if value is None else str(value) for value in row]
+            for row in sheet.iter_rows(values_only=True)
+        ]
+
+        self.assertEqual(xlsx_rows, csv_rows)
+
+
+# -----------------------------------------
+# Admin dashboard counters (metrics.py)
+# -----------------------------------------
+class AdminMetricsTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create(
+            username="staff", employee_id="E1", role="kitchen_staff", is_active=False
+        )
+        for status in ("Pending", "Pending", "Resolved", "Closed"):
+            Ticket.objects.create(employee=self.staff, concern="Gas", description="-", status=status)
+        invalidate_admin_metrics()
+
+    def test_counts_match_tickets(self):
+        metrics = get_admin_metrics()
+
+        self.assertEqual(metrics["total_tickets"], 4)
+        self.assertEqual(metrics["open_tickets"], 2)
+        self.assertEqual(metrics["pending_tickets"], 2)
+        self.assertEqual(metrics["resolved_tickets"], 1)
+        self.assertEqual(metrics["inactive_users"], 1)
+        self.assertEqual(
+            {row["status"]: row["count"] for row in metrics["tickets_by_status"]}["Closed"], 1
+        )
+
+    def test_cached_until_a_ticket_changes(self):
+        get_admin_metrics()
+        with self.assertNumQueries(0):
+            get_admin_metrics()
+
+        Ticket.objects.create(employee=self.staff, concern="Gas", description="-")
+
+        self.assertEqual(get_admin_metrics()["open_tickets"], 3)
+
+
+# -----------------------------------------
+# Ticket statistics rollup (rollups.py)
+# -----------------------------------------
+class TicketStatsRollupTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(code="L1", name="Kitchen 1")
+        self.owner = CustomUser.objects.create(username="owner", employee_id="E1", role="owner")
+        self.staff = CustomUser.objects.create(
+            username="staff", employee_id="E2", role="kitchen_staff"
+        )
+
+    def raise_ticket(self, **fields):
+        return Ticket.objects.create(
+            employee=self.staff, concern="Gas leak", description="-", **fields
+        )
+
+    def buckets(self):
+        return sorted(
+            TicketStatsRollup.objects.filter(count__gt=0).values_list(
+                "location_id", "assigned_owner_id", "status", "count"
+            )
+        )
+
+    def assertMatchesRebuild(self):
+        live = self.buckets()
+        rebuild_ticket_stats()
+        self.assertEqual(live, self.buckets())
+
+    def test_null_keys_share_one_bucket(self):
+        self.raise_ticket()
+        self.raise_ticket()
+
+        self.assertEqual(TicketStatsRollup.objects.count(), 1)
+        self.assertMatchesRebuild()
+
+    def test_deleted_location_tickets_stay_counted(self):
+        self.raise_ticket(location=self.location)
+        self.raise_ticket()
+
+        self.location.delete()
+
+        self.assertEqual(self.buckets(), [(None, None, "Pending", 2)])
+        self.assertMatchesRebuild()
+
+    def test_deleted_owner_tickets_stay_counted(self):
+        self.raise_ticket(assigned_owner=self.owner, status="Assigned")
+        self.raise_ticket(status="Assigned")
+
+        self.owner.delete()
+
+        self.assertEqual(self.buckets(), [(None, None, "Assigned", 2)])
+        self.assertMatchesRebuild()
+
+    def test_confirmed_ticket_is_closed(self):
+        manager = CustomUser.objects.create(
+            username="cm", employee_id="E3", role="cluster_manager"
+        )
+        ClusterManagerProfile.objects.create(user=manager).locations.add(self.location)
+        ticket = self.raise_ticket(
+            location=self.location, assigned_owner=self.owner, status="Assigned"
+        )
+        self.assertEqual(OwnerWorkload.objects.get(owner=self.owner).open_tickets, 1)
+
+        self.client.force_login(manager)
+        self.client.get(reverse("confirm_cluster_ticket", args=[ticket.id]))
+
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, "Confirmed")
+        self.assertIsNotNone(ticket.closed_at)
+        self.assertEqual(OwnerWorkload.objects.get(owner=self.owner).open_tickets, 0)
+        self.assertMatchesRebuild()
+
+
+# -----------------------------------------
+# Staff member's own records (staff_data.py)
+# -----------------------------------------
+class StaffDataTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create(
+            username="staff", employee_id="E1", role="kitchen_staff"
+        )
+        invalidate_staff_data(self.staff.pk)
+
+    def ticket(self):
+        return Ticket.objects.create(employee=self.staff, concern="Gas", description="-")
+
+    def test_only_requested_sections_are_loaded(self):
+        ticket = self.ticket()
+
+        with self.assertNumQueries(1):
+            data = get_staff_data(self.staff, "tickets")
+
+        self.assertEqual(set(data), {"tickets", "more_tickets"})
+        self.assertEqual(data["tickets"][0]["ticket_number"], ticket.ticket_number)
+        self.assertFalse(data["more_tickets"])
+
+    def test_cached_rows_are_dropped_when_a_record_is_saved(self):
+        first = self.ticket()
+        get_staff_data(self.staff, "tickets", "logs")
+
+        with self.assertNumQueries(0):
+            get_staff_data(self.staff, "tickets", "logs")
+
+        second = self.ticket()
+        KitchenLog.objects.create(staff=self.staff, emp_id="E1", emp_name="Staff", location="L1")
+        data = get_staff_data(self.staff, "tickets", "logs")
+
+        self.assertEqual([row["id"] for row in data["tickets"]], [second.id, first.id])
+        self.assertEqual(len(data["logs"]), 1)
+
+    def test_older_rows_are_cut_off(self):
+        limit = STAFF_DATA_SECTIONS["performance"][-1]
+        StaffPerformance.objects.bulk_create(
+            StaffPerformance(employee=self.staff, month=f"M{n}", bau_status="Active", rating=4)
+            for n in range(limit + 1)
+        )
+
+        data = get_staff_data(self.staff, "performance")
+
+        self.assertEqual(len(data["performance"]), limit)
+        self.assertEqual(data["performance"][0]["month"], f"M{limit}")
+        self.assertTrue(data["more_performance"])
+
+    def test_linked_legacy_logs_reach_cached_rows(self):
+        get_staff_data(self.staff, "logs")
+        KitchenLog.objects.bulk_create(
+            [KitchenLog(emp_id="E1", emp_name="Staff", location="L1")]
+        )
+
+        self.assertEqual(link_legacy_logs(["E1"]), 1)
+        self.assertEqual(len(get_staff_data(self.staff, "logs")["logs"]), 1)
+
+
+# -----------------------------------------
+# Owner dashboard (ticket_actions.py)
+# -----------------------------------------
+# The project's TEMPLATES only find hybbconnect/Templates on a case-insensitive
+# file system (as "templates" app directories)
+@override_settings(
+    TEMPLATES=[
+        {**settings.TEMPLATES[0], "DIRS": [settings.BASE_DIR / "hybbconnect" / "Templates"]}
+    ]
+)
+class OwnerDashboardTests(TestCase):
+    def test_open_count_matches_closed_statuses(self):
+        owner = CustomUser.objects.create(username="owner", employee_id="E1", role="owner")
+        staff = CustomUser.objects.create(username="staff", employee_id="E2", role="kitchen_staff")
+        for status in ("Assigned", "Resolved", "Confirmed", "Closed", "Rejected"):
+            Ticket.objects.create(
+                employee=staff, concern=status, description="-",
+                assigned_owner=owner, status=status,
+            )
+
+        self.client.force_login(owner)
+        context = self.client.get(reverse("owner_dashboard")).context
+
+        self.assertEqual([t.status for t in context["open_tickets"]], ["Assigned"])
+        self.assertEqual(
+            sorted(t.status for t in context["tickets"]), ["Assigned", "Resolved"]
+        )
+        self.assertEqual(
+            len(context["open_tickets"]), OwnerWorkload.objects.get(owner=owner).open_tickets
+        )
+
+
+# -----------------------------------------
+# Cluster dashboard panels (views.py)
+# -----------------------------------------
+@override_settings(
+    TEMPLATES=[
+        {**settings.TEMPLATES[0], "DIRS": [settings.BASE_DIR / "hybbconnect" / "Templates"]}
+    ]
+)
+class ClusterDashboardTests(TestCase):
+    IN_SCOPE = 25  # more than one panel page
+
+    def setUp(self):
+        kitchen1 = Location.objects.create(code="L1", name="Kitchen 1")
+        kitchen2 = Location.objects.create(code="L2", name="Kitchen 2")
+        self.manager = CustomUser.objects.create(
+            username="cm", employee_id="E1", role="cluster_manager"
+        )
+        ClusterManagerProfile.objects.create(user=self.manager).locations.add(kitchen1)
+
+        for location, tickets in ((kitchen1, self.IN_SCOPE), (kitchen2, 3)):
+            staff = CustomUser.objects.create(
+                username=f"staff-{location.code}", employee_id=f"S-{location.code}",
+                role="kitchen_staff", location=location,
+            )
+            for n in range(tickets):
+                Ticket.objects.create(
+                    employee=staff, location=location, concern="Gas", description="-",
+                    status="Closed" if n % 5 == 0 else "Pending",
+                )
+            KitchenLog.objects.create(
+                staff=staff, emp_id=staff.employee_id, emp_name="Staff", location=location.code
+            )
+
+        self.client.force_login(self.manager)
+
+    def panel(self, name, cursor=None):
+        url = reverse("cluster_dashboard_panel", args=[name])
+        return self.client.get(url, {"cursor": cursor} if cursor else {})
+
+    def test_summary_counts_only_the_cluster(self):
+        context = self.client.get(reverse("cluster_dashboard")).context
+
+        self.assertEqual(context["people"], {"kitchen_managers": 0, "kitchen_staff": 1})
+        self.assertEqual(context["ticket_counts"], {"total": self.IN_SCOPE, "open": 20})
+        self.assertEqual(context["recent_logs"], 1)
+
+    def test_tickets_panel_pages_through_the_cluster(self):
+        first = self.panel("tickets").context["page"]
+        second = self.panel("tickets", first.next_cursor).context["page"]
+
+        tickets = list(first) + list(second)
+        self.assertEqual([len(first), len(second)], [20, self.IN_SCOPE - 20])
+        self.assertFalse(second.has_next)
+        self.assertEqual({t.location.code for t in tickets}, {"L1"})
+        self.assertEqual(len({t.id for t in tickets}), self.IN_SCOPE)
+
+    def test_logs_panel_is_scoped_by_location_code(self):
+        page = self.panel("kitchen_logs").context["page"]
+
+        self.assertEqual([log.location for log in page], ["L1"])
+
+    def test_unknown_panel_is_not_found(self):
+        self.assertEqual(self.panel("salaries").status_code, 404)
+
+    def test_other_roles_are_turned_away(self):
+        self.client.force_login(CustomUser.objects.get(username="staff-L1"))
+
+        self.assertEqual(self.panel("tickets").status_code, 302)
+
+
+# -----------------------------------------
+# Dashboard query plans (indexes in models.py)
+# -----------------------------------------
+class DashboardQueryPlanTests(TestCase):
+    ROWS = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(code="L1", name="Kitchen 1")
+        cls.owner = CustomUser.objects.create(username="owner", employee_id="E1", role="owner")
+        cls.staff = CustomUser.objects.create(
+            username="staff", employee_id="E2", role="kitchen_staff", location=cls.location
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                employee=cls.staff,
+                assigned_owner=cls.owner,
+                location=cls.location,
+                concern="Gas leak",
+                description="-",
+            )
+            for _ in range(cls.ROWS)
+        )
+        KitchenLog.objects.bulk_create(
+            KitchenLog(staff=cls.staff, emp_id=f"E{n}", emp_name="Staff", location="L1")
+            for n in range(cls.ROWS)
+        )
+        OrderPhoto.objects.bulk_create(
+            OrderPhoto(order_id=f"ORD{n}", uploaded_by=cls.staff, location=cls.location)
+            for n in range(cls.ROWS)
+        )
+        StaffTimeUpdate.objects.bulk_create(
+            StaffTimeUpdate(staff=cls.staff, update_type="TO", ot_hours=1)
+            for _ in range(cls.ROWS)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_dashboard_querysets_use_their_index(self):
+        cases = [
+            (Ticket.objects.filter(assigned_owner=self.owner), "ticket_owner_created_idx"),
+            (Ticket.objects.filter(employee=self.staff), "ticket_employee_created_idx"),
+            (Ticket.objects.filter(reassigned_to=self.owner), "ticket_reassign_created_idx"),
+            (Ticket.objects.filter(location=self.location), "ticket_location_created_idx"),
+            (KitchenLog.objects.filter(location="L1"), "klog_location_created_idx"),
+            (KitchenLog.objects.filter(staff=self.staff), "klog_staff_created_idx"),
+        ]
+        for queryset, index_name in cases:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset.order_by("-created_at"), index_name)
+
+        self.assertUsesIndex(KitchenLog.objects.filter(emp_id="E2"), "klog_emp_id_idx")
+        self.assertUsesIndex(
+            OrderPhoto.objects.filter(location=self.location).order_by("-uploaded_at"),
+            "photo_location_uploaded_idx",
+        )
+        self.assertUsesIndex(
+            StaffTimeUpdate.objects.filter(staff=self.staff).order_by("-updated_at"),
+            "stafftime_staff_updated_idx",
+        )
+
+
+# -----------------------------------------
+# Keyset pagination (pagination.py)
+# -----------------------------------------
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        staff = CustomUser.objects.create(username="staff", employee_id="E1", role="kitchen_staff")
+        now = timezone.now()
+        for i in range(6):
+            Ticket.objects.create(employee=staff, concern=f"Concern {i}", description="-")
+        # Pairs share a timestamp, so pages must break ties on id
+        for i, ticket in enumerate(Ticket.objects.order_by("id")):
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=now - timedelta(hours=i // 2))
+        self.expected = list(Ticket.objects.order_by("-created_at", "-id"))
+
+    def paginator(self, per_page):
+        return CursorPaginator(Ticket.objects.all(), ("-created_at", "-id"), per_page)
+
+    def walk(self, per_page):
+        paginator = self.paginator(per_page)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return pages
+
+    def test_pages_cover_every_row_once(self):
+        for per_page in (1, 3, 4, 6, 10):
+            with self.subTest(per_page=per_page):
+                pages = self.walk(per_page)
+                self.assertEqual([t for page in pages for t in page], self.expected)
+                self.assertTrue(all(len(page) for page in pages))
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        pages = self.walk(3)
+
+        self.assertEqual(len(pages), 2)
+        self.assertFalse(pages[-1].has_next)
+        self.assertFalse(pages[0].has_previous)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        paginator = self.paginator(4)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+
+        back = paginator.get_page(second.previous_cursor)
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_bad_cursor_starts_over(self):
+        page = self.paginator(4).get_page("not-a-cursor")
+
+        self.assertEqual(list(page), self.expected[:4])
+
+    def test_empty_queryset(self):
+        page = CursorPaginator(Ticket.objects.none(), ("-created_at", "-id"), 4).get_page()
+
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_other_pages)
+
+
+# -----------------------------------------
+# Full-text search (search.py)
+# -----------------------------------------
+class RankedSearchTests(TestCase):
+    def setUp(self):
+        # Oldest first; the more often "ravi" appears the better the match
+        self.best = KitchenLog.objects.create(emp_name="Ravi Ravi Ravi", category="Grooming")
+        self.good = KitchenLog.objects.create(emp_name="Ravi Ravi", category="Grooming")
+        self.weak = KitchenLog.objects.create(
+            emp_name="Ravi Shankar Prasad Verma", category="Reporting Issue"
+        )
+        KitchenLog.objects.create(emp_name="Suresh", category="Grooming")
+
+    def test_best_match_first(self):
+        logs = search(KitchenLog.objects.all(), "rav", ranked=True)
+
+        self.assertEqual(list(logs), [self.best, self.good, self.weak])
+
+    def test_ranked_results_page_by_rank(self):
+        paginator = CursorPaginator(
+            search(KitchenLog.objects.all(), "ravi", ranked=True), ("-search_rank", "-id"), 2
+        )
+
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        back = paginator.get_page(second.previous_cursor)
+
+        self.assertEqual(list(first), [self.best, self.good])
+        self.assertEqual(list(second), [self.weak])
+        self.assertFalse(second.has_next)
+        self.assertEqual(list(back), list(first))
+
+    def test_admin_lists_best_match_first(self):
+        admin_user = CustomUser.objects.create_superuser(
+            username="root", email="root@example.com", password="-", employee_id="E0"
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.get(
+            reverse("admin:hybbconnect_kitchenlog_changelist"), {"q": "ravi"}
+        )
+
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.best, self.good, self.weak]
+        )
+
+
+# -----------------------------------------
+# Bulk imports (importers.py)
+# -----------------------------------------
+class UserImportTests(TestCase):
+    def setUp(self):
+        Location.objects.create(code="L1", name="Kitchen 1")
+        CustomUser.objects.create(username="taken", employee_id="E0", role="kitchen_staff")
+
+    def test_rows_are_created_skipped_or_reported(self):
+        rows = [
+            ["E1", "asha", "kitchen_staff", "L1", "secret1"],  # line 2
+            ["E2", "taken", "kitchen_staff", "L1", "secret2"],
+            ["E0", "ravi", "kitchen_staff", "L1", "secret3"],
+            ["E3", "meena", "kitchen_staff", "L1", ""],
+            ["E4", "john", "chef", "L1", "secret4"],
+            ["E5", "kiran", "owner", "L9", "secret5"],
+            ["E1", "asha", "kitchen_staff", "L1", "secret1"],  # repeat of line 2
+        ]
+        lines = [",".join(USER_REQUIRED_COLUMNS)] + [",".join(row) for row in rows]
+        upload = SimpleUploadedFile("users.csv", "\n".join(lines).encode())
+
+        report = ingest(upload, UserImport(workers=1), chunk_rows=3)
+
+        self.assertEqual(report.counts, {"created": 1, "skipped": 3, "error": 3})
+        self.assertEqual(
+            [(row["line"], row["status"], row["message"]) for row in report.problems],
+            [
+                (3, "skipped", "Username exists"),
+                (4, "skipped", "Employee ID exists: E0"),
+                (5, "error", "Missing or empty field: password"),
+                (6, "error", "Unknown role: chef"),
+                (7, "error", "Location not found: L9"),
+                (8, "skipped", "Username exists"),
+            ],
+        )
+        user = CustomUser.objects.get(username="asha")
+        self.assertEqual(user.location.code, "L1")
+        self.assertTrue(user.check_password("secret1"))
+        self.assertEqual(CustomUser.objects.count(), 2)
+
+
+class RepeatedRowImportTests(TestCase):
+    CHUNK_ROWS = 2
+
+    def setUp(self):
+        self.staff = CustomUser.objects.create(
+            username="staff", employee_id="E1", role="kitchen_staff"
+        )
+
+    def run_import(self, importer, columns, rows):
+        lines = [",".join(columns)] + [
+            ",".join(str(row.get(column, "")) for column in columns) for row in rows
+        ]
+        file = io.BytesIO("\n".join(lines).encode())
+        file.name = "upload.csv"
+        return ingest(file, importer, chunk_rows=self.CHUNK_ROWS)
+
+    def test_staff_performance_repeat_in_later_chunk(self):
+        rows = [
+            {"employee_id": "E1", "month": "Jan", "rating": 3},
+            {"employee_id": "E1", "month": "Feb", "rating": 4},
+            {"employee_id": "E1", "month": "Jan", "rating": 5},
+        ]
+        report = self.run_import(StaffPerformanceImport(), STAFF_PERFORMANCE_COLUMNS, rows)
+
+        self.assertEqual(report.counts, {"created": 2, "skipped": 1})
+        self.assertEqual(
+            [(row["line"], row["message"]) for row in report.problems],
+            [(2, "Repeated later in the file")],
+        )
+        self.assertEqual(StaffPerformance.objects.get(month="Jan").rating, 5)
+
+    def test_salary_repeat_in_later_chunk_is_diffed_against_stored_slip(self):
+        SalarySlip.objects.create(
+            employee=self.staff, month="Jan", year=2026, present_days=0, lop_days=0, net_pay=100
+        )
+        rows = [
+            {"employee_id": "E1", "month": "Jan", "year": 2026, "net_pay": 150},
+            {"employee_id": "E1", "month": "Feb", "year": 2026, "net_pay": 100},
+            {"employee_id": "E1", "month": "Jan", "year": 2026, "net_pay": 100},
+        ]
+        importer = SalaryImport(apply=True)
+        report = self.run_import(importer, SALARY_COLUMNS, rows)
+
+        self.assertEqual(report.counts, {"skipped": 1, "new": 1, "unchanged": 1})
+        self.assertEqual(importer.pending, 1)
+        # The first row was written with its chunk; the repeat restores the slip
+        self.assertEqual(SalarySlip.objects.get(month="Jan").net_pay, 100)
+
+
+# -----------------------------------------
+# Chunked file reading (ingest.py)
+# -----------------------------------------
+class IngestTests(TestCase):
+    # Display headers, normalised by the reader; rating is the first number
+    COLUMNS = ["Employee ID", "Month", "BAU Status"] + STAFF_PERFORMANCE_NUMBERS
+
+    def setUp(self):
+        for n in range(1, 4):
+            CustomUser.objects.create(
+                username=f"staff{n}", employee_id=f"E{n}", role="kitchen_staff"
+            )
+
+    def rows(self, rating):
+        rows = [[f"E{n}", month, "Active", rating] for n in range(1, 4) for month in ("Jan", "Feb")]
+        rows += [["E9", "Jan", "Active", rating], ["E1", "Mar", "Active", "high"]]
+        return [row + [0] * (len(STAFF_PERFORMANCE_NUMBERS) - 1) for row in rows]
+
+    def csv_file(self, rows, columns=COLUMNS):
+        lines = [",".join(columns)] + [",".join(map(str, row)) for row in rows]
+        return SimpleUploadedFile("performance.csv", "\n".join(lines).encode())
+
+    def xlsx_file(self, rows):
+        workbook = Workbook()
+        workbook.active.append(self.COLUMNS)
+        for row in rows:
+            workbook.active.append(row)
+        content = io.BytesIO()
+        workbook.save(content)
+        return SimpleUploadedFile("performance.xlsx", content.getvalue())
+
+    def stored(self):
+        return sorted(
+            StaffPerformance.objects.values_list("employee__employee_id", "month", "rating")
+        )
+
+    def test_result_does_not_depend_on_chunk_size_or_format(self):
+        results = []
+        for make_file in (self.csv_file, self.xlsx_file):
+            for chunk_rows in (1, 3, 100):
+                with self.subTest(file=make_file.__name__, chunk_rows=chunk_rows):
+                    StaffPerformance.objects.all().delete()
+                    report = ingest(
+                        make_file(self.rows(4)), StaffPerformanceImport(), chunk_rows=chunk_rows
+                    )
+                    results.append((report.counts, report.problems, self.stored()))
+
+        counts, problems, stored = results[0]
+        self.assertEqual(counts, {"created": 6, "skipped": 1, "error": 1})
+        self.assertEqual(
+            [(row["line"], row["status"]) for row in problems], [(8, "skipped"), (9, "error")]
+        )
+        self.assertEqual(len(stored), 6)
+        self.assertEqual(results, [results[0]] * len(results))
+
+    def test_reimport_updates_existing_rows(self):
+        ingest(self.csv_file(self.rows(3)), StaffPerformanceImport(), chunk_rows=4)
+
+        report = ingest(self.csv_file(self.rows(5)), StaffPerformanceImport(), chunk_rows=4)
+
+        self.assertEqual(report.counts, {"updated": 6, "skipped": 1, "error": 1})
+        self.assertEqual(StaffPerformance.objects.count(), 6)
+        self.assertEqual(set(StaffPerformance.objects.values_list("rating", flat=True)), {5})
+
+    def test_resume_skips_rows_already_committed(self):
+        progress = []
+        ingest(
+            self.csv_file(self.rows(4)), StaffPerformanceImport(), chunk_rows=3,
+            progress=progress.append, commit_every_chunk=True,
+        )
+        self.assertEqual(progress, [3, 6, 8])
+
+        StaffPerformance.objects.all().delete()
+        report = ingest(self.csv_file(self.rows(4)), StaffPerformanceImport(), chunk_rows=3,
+                        start_row=3)
+
+        self.assertEqual(report.counts, {"created": 3, "skipped": 1, "error": 1})
+        self.assertEqual(
+            self.stored(),
+            [("E2", "Feb", 4), ("E3", "Feb", 4), ("E3", "Jan", 4)],
+        )
+
+    def test_missing_columns_are_rejected(self):
+        columns = [column for column in self.COLUMNS if column != "BAU Status"]
+        upload = self.csv_file([row[:2] + row[3:] for row in self.rows(4)], columns=columns)
+
+        with self.assertRaisesMessage(ValueError, "Missing columns: bau_status"):
+            ingest(upload, StaffPerformanceImport())
+        self.assertFalse(StaffPerformance.objects.exists())
+
+
+# -----------------------------------------
+# Import job heartbeat (jobs.py)
+# -----------------------------------------
+class ImportHeartbeatTests(TransactionTestCase):
+    @override_settings(IMPORT_HEARTBEAT_SECONDS=0.05, IMPORT_JOB_STALE_SECONDS=60)
+    def test_long_running_job_is_not_requeued(self):
+        job = ImportJob.objects.create(kind="users", file="imports/jobs/users.csv")
+        # Queued long ago, then claimed: claiming leaves updated_at alone
+        ImportJob.objects.filter(pk=job.pk).update(
+            status="running", updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with import_heartbeat(job):
+            time.sleep(0.2)  # a slow count / chunk
+
+        self.assertEqual(requeue_stale_imports(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+
+# -----------------------------------------
+# Order photo renditions (signals.py)
+# -----------------------------------------
+class CorruptPhotoUploadTests(TestCase):
+    def test_undecodable_photo_is_kept_without_renditions(self):
+        # A JPEG header and nothing after it
+        upload = SimpleUploadedFile("broken.jpg", b"\xff\xd8\xff\xe0" + b"\0" * 64)
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            photo = OrderPhoto.objects.create(order_id="ORD1", photo=upload)
+
+            self.assertTrue(photo.photo.name.endswith(".jpg"))
+            self.assertFalse(photo.thumbnail)
+
+
+# -----------------------------------------
+# Photo file references (blobs.py, gc_photo_storage)
+# -----------------------------------------
+class PhotoBlobTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        content = io.BytesIO()
+        Image.new("RGB", (64, 48), "orange").save(content, "JPEG")
+        self.jpeg = content.getvalue()
+
+    def upload(self, order_id):
+        return OrderPhoto.objects.create(
+            order_id=order_id, photo=SimpleUploadedFile("IMG_0001.jpg", self.jpeg)
+        )
+
+    def gc(self, *args):
+        call_command("gc_photo_storage", *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_identical_uploads_share_one_counted_file(self):
+        first = self.upload("ORD1")
+        second = self.upload("ORD2")
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertEqual(StoredBlob.objects.get(name=first.photo.name).refs, 2)
+        self.assertEqual(StoredBlob.objects.get(name=first.thumbnail.name).refs, 2)
+
+        first.delete()
+        self.assertEqual(StoredBlob.objects.get(name=second.photo.name).refs, 1)
+
+    def test_unreferenced_file_is_collected_after_the_grace_period(self):
+        photos = [self.upload("ORD1"), self.upload("ORD2")]
+        name = photos[0].photo.name
+
+        photos[0].delete()
+        self.gc("--delete", "--grace-hours", "0")
+        self.assertTrue(PHOTO_STORAGE.exists(name))
+
+        photos[1].delete()
+        self.assertEqual(StoredBlob.objects.get(name=name).refs, 0)
+
+        self.gc("--delete")  # still within the default grace period
+        self.gc("--grace-hours", "0")  # a dry run
+        self.assertTrue(PHOTO_STORAGE.exists(name))
+
+        self.gc("--delete", "--grace-hours", "0")
+        self.assertFalse(PHOTO_STORAGE.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+
+class MigratePhotoStorageTests(TestCase):
+    def test_flat_originals_are_hashed_deduplicated_and_counted(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            os.makedirs(os.path.join(media, "order_photos"))
+            for name in ("IMG_1.jpg", "IMG_2.jpg"):
+                with open(os.path.join(media, "order_photos", name), "wb") as f:
+                    f.write(b"same bytes")
+            first = OrderPhoto.objects.create(order_id="ORD1", photo="order_photos/IMG_1.jpg")
+            second = OrderPhoto.objects.create(order_id="ORD2", photo="order_photos/IMG_2.jpg")
+
+            call_command("migrate_photo_storage", stdout=io.StringIO())
+
+            first.refresh_from_db()
+            second.refresh_from_db()
+            self.assertRegex(first.photo.name, r"^order_photos/../../[0-9a-f]{64}\.jpg$")
+            self.assertEqual(first.photo.name, second.photo.name)
+            self.assertEqual(first.photo.read(), b"same bytes")
+            self.assertEqual(StoredBlob.objects.get(name=first.photo.name).refs, 2)
+            self.assertFalse(
+                StoredBlob.objects.filter(name__startswith="order_photos/IMG_", refs__gt=0).exists()
+            )
+            first.photo.close()
+
+
+# -----------------------------------------
+# Order photo gallery filters (reports.py, photo_index.py)
+# -----------------------------------------
+class PhotoIndexFilterTests(TestCase):
+    def setUp(self):
+        self.andheri = Location.objects.create(code="MUM-01", name="Andheri West")
+        self.bandra = Location.objects.create(code="MUM-02", name="Bandra")
+        self.asha = CustomUser.objects.create(
+            username="asha.k", first_name="Asha", last_name="Kulkarni",
+            employee_id="E1", role="kitchen_staff",
+        )
+        self.ravi = CustomUser.objects.create(
+            username="ravi", first_name="Ravi", last_name="Ashok",
+            employee_id="E2", role="kitchen_staff",
+        )
+        uploaded_at = timezone.make_aware(datetime(2026, 3, 10, 1, 30))
+        self.photos = {
+            order_id: OrderPhoto.objects.create(
+                order_id=order_id, uploaded_by=user, location=location,
+                uploaded_at=uploaded_at + timedelta(days=days),
+            )
+            for order_id, user, location, days in (
+                ("A12-345", self.asha, self.andheri, 0),
+                ("a12/999", self.ravi, self.andheri, 1),
+                ("B-A12", self.asha, self.andheri, 2),
+                ("A12-777", self.asha, self.bandra, 3),
+            )
+        }
+
+    def matches(self, locations=None, **filters):
+        locations = locations or [self.andheri.id, self.bandra.id]
+        rows = photo_index_queryset(locations, filters)
+        return sorted(row.photo.order_id for row in rows.select_related("photo"))
+
+    def test_order_id_is_a_normalised_prefix_match(self):
+        self.assertEqual(self.matches(order_id="A12"), ["A12-345", "A12-777", "a12/999"])
+        self.assertEqual(self.matches(order_id=" a12 34"), ["A12-345"])
+        self.assertEqual(self.matches(order_id="345"), [])
+
+    def test_names_match_username_first_or_last_name(self):
+        self.assertEqual(self.matches(username="Asha K"), ["A12-345", "A12-777", "B-A12"])
+        self.assertEqual(self.matches(full_name="ash"), ["A12-345", "A12-777", "B-A12", "a12/999"])
+        self.assertEqual(self.matches(full_name="kul"), ["A12-345", "A12-777", "B-A12"])
+
+    def test_location_matches_code_or_name(self):
+        self.assertEqual(self.matches(location="mum02"), ["A12-777"])
+        self.assertEqual(self.matches(location="andheri"), ["A12-345", "B-A12", "a12/999"])
+
+    def test_filters_stay_within_the_given_locations(self):
+        self.assertEqual(
+            self.matches([self.andheri.id], order_id="A12"), ["A12-345", "a12/999"]
+        )
+
+    def test_dates_are_local_upload_dates(self):
+        # 01:30 on 10 March in TIME_ZONE is still 9 March in UTC
+        self.assertEqual(
+            self.matches(date_after="2026-03-10", date_before="2026-03-11"),
+            ["A12-345", "a12/999"],
+        )
+
+    def test_rename_reaches_the_index(self):
+        self.asha.username = "asha.p"
+        self.asha.save()
+        self.bandra.name = "Powai"
+        self.bandra.save()
+
+        self.assertEqual(self.matches(username="ashap"), ["A12-345", "A12-777", "B-A12"])
+        self.assertEqual(self.matches(location="powai"), ["A12-777"])
+
+
+# -----------------------------------------
+# Photo archive tier (archives.py)
+# -----------------------------------------
+class PhotoArchiveTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media.name,
+            PHOTO_ARCHIVE_DIR=os.path.join(media.name, "photo_archives"),
+            PHOTO_ARCHIVE_AFTER_DAYS=180,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.location = Location.objects.create(code="L1", name="Kitchen 1")
+        old = timezone.now() - timedelta(days=400)
+        self.originals, self.extensions = {}, {}
+        self.old = [self.photo(f"ORD{n}", color, old) for n, color in enumerate(("red", "blue"))]
+        self.recent = self.photo("ORD9", "green", timezone.now())
+
+    def photo(self, order_id, color, uploaded_at):
+        content = io.BytesIO()
+        Image.new("RGB", (64, 48), color).save(content, "JPEG")
+        photo = OrderPhoto.objects.create(
+            order_id=order_id, location=self.location, uploaded_at=uploaded_at,
+            photo=SimpleUploadedFile(f"{order_id}.jpg", content.getvalue()),
+        )
+        # The stored original (uploads may be re-encoded), as archived
+        self.originals[photo.pk] = self.read(photo)
+        self.extensions[photo.pk] = os.path.splitext(photo.photo.name)[1]
+        return photo
+
+    def read(self, photo):
+        with open_original(photo) as source:
+            return source.read()
+
+    def test_archived_originals_read_back_byte_for_byte(self):
+        live_names = [photo.photo.name for photo in self.old]
+
+        results = list(archive_old_photos())
+
+        self.assertEqual(len(results), 1)
+        archive, missing = results[0]
+        self.assertEqual((archive.photo_count, missing), (2, []))
+        for photo in self.old:
+            photo.refresh_from_db()
+            self.assertFalse(photo.photo)
+            self.assertTrue(photo.thumbnail)
+            self.assertEqual(self.read(photo), self.originals[photo.pk])
+        # The originals are released for gc_photo_storage
+        self.assertEqual(
+            set(StoredBlob.objects.filter(name__in=live_names).values_list("refs", flat=True)),
+            {0},
+        )
+
+        self.recent.refresh_from_db()
+        self.assertIsNone(self.recent.archive_id)
+        self.assertEqual(self.read(self.recent), self.originals[self.recent.pk])
+
+    def test_download_zip_mixes_live_and_archived_originals(self):
+        list(archive_old_photos())
+        photos = OrderPhoto.objects.select_related("uploaded_by", "location", "archive")
+
+        content = b"".join(stream_photo_zip(photos.order_by("id")))
+
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            for photo in photos:
+                name = member_name(photo, self.extensions[photo.pk])
+                self.assertEqual(zf.read(name), self.originals[photo.pk])
+            manifest = list(csv.reader(io.StringIO(zf.read(MANIFEST_NAME).decode())))
+        self.assertEqual(len(manifest), 1 + len(self.originals))
+
+    def test_unreadable_original_stays_live(self):
+        lost = self.old[0]
+        PHOTO_STORAGE.delete(lost.photo.name)
+
+        archive, missing = next(archive_old_photos())
+
+        self.assertEqual((archive.photo_count, missing), (1, [lost]))
+        lost.refresh_from_db()
+        self.assertIsNone(lost.archive_id)
+        self.assertTrue(lost.photo)
+
+
+# -----------------------------------------
+# Resumable photo uploads (uploads.py)
+# -----------------------------------------
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.part_dir = tempfile.TemporaryDirectory()
+        self.enterContext(override_settings(UPLOAD_SESSION_DIR=self.part_dir.name))
+        self.addCleanup(self.part_dir.cleanup)
+        user = CustomUser.objects.create(username="staff", employee_id="E1", role="kitchen_staff")
+        (self.session,) = create_sessions(
+            user, [{"order_id": "ORD1", "filename": "a.jpg", "size": 10}]
+        )
+
+    def put(self, offset, data, length=None):
+        return write_chunk(
+            self.session, offset, io.BytesIO(data), len(data) if length is None else length
+        )
+
+    def test_resume_from_reported_offset(self):
+        self.put(0, b"01234")
+
+        # A retry of the first chunk is refused with the offset to resume from
+        with self.assertRaises(UploadError) as refused:
+            self.put(0, b"01234")
+        self.assertEqual((refused.exception.status, refused.exception.offset), (409, 5))
+
+        self.put(5, b"56789")
+
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.is_complete)
+        with open(part_path(self.session), "rb") as part:
+            self.assertEqual(part.read(), b"0123456789")
+
+    def test_dropped_connection_keeps_what_arrived(self):
+        # Client announced 5 bytes and went away after 3
+        self.assertEqual(self.put(0, b"012", length=5), 3)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.received, 3)
+
+    def test_chunk_waits_for_the_one_in_progress(self):
+        with session_lock(self.session):
+            with self.assertRaises(UploadError) as busy:
+                self.put(0, b"01234")
+        self.assertEqual(busy.exception.status, 503)
+
+        self.put(0, b"01234")
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.received, 5)
+
+
+# -----------------------------------------
+# Routing rules seeded before their owner existed (routing.py)
+# -----------------------------------------
+class SeededRoutingRuleTests(TestCase):
+    def test_owner_created_later_becomes_candidate(self):
+        rule = RoutingRule.objects.create(category="Payroll", seed_owner_employee_id="E99")
+
+        owner = CustomUser.objects.create(username="payroll", employee_id="E99", role="owner")
+
+        rule.refresh_from_db()
+        self.assertEqual([c.owner for c in rule.candidates.all()], [owner])
+        self.assertEqual(rule.seed_owner_employee_id, "")
+
+
+# -----------------------------------------
+# Access scopes (scope.py)
+# -----------------------------------------
+class AccessScopeTests(TestCase):
+    def setUp(self):
+        self.kitchen1 = Location.objects.create(code="L1", name="Kitchen 1")
+        self.kitchen2 = Location.objects.create(code="L2", name="Kitchen 2")
+        self.manager = CustomUser.objects.create(
+            username="cm", employee_id="E1", role="cluster_manager"
+        )
+        self.profile = ClusterManagerProfile.objects.create(user=self.manager)
+        self.profile.locations.add(self.kitchen1)
+
+    def scope(self):
+        # A fresh instance, as each request loads its own user
+        return get_scope(CustomUser.objects.get(pk=self.manager.pk))
+
+    def test_kept_scope_needs_no_query(self):
+        user = CustomUser.objects.get(pk=self.manager.pk)
+        get_scope(CustomUser.objects.get(pk=self.manager.pk))
+
+        with self.assertNumQueries(0):
+            scope = get_scope(user)
+        self.assertEqual(scope.location_ids, {self.kitchen1.id})
+
+    def test_location_change_reaches_kept_scope(self):
+        self.assertEqual(self.scope().location_codes, {"L1"})
+
+        self.profile.locations.add(self.kitchen2)
+
+        self.assertEqual(self.scope().location_codes, {"L1", "L2"})
+
+    def test_role_change_reaches_kept_scope(self):
+        self.assertFalse(self.scope().unrestricted)
+
+        self.manager.role = "admin"
+        self.manager.save()
+
+        self.assertTrue(self.scope().unrestricted)
+
+
+# -----------------------------------------
+# Job files (jobs.py, storage.PrivateStorage)
+# -----------------------------------------
+class JobFileTests(TransactionTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        private = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(private.cleanup)
+        self.media, self.private = media.name, private.name
+        settings = override_settings(MEDIA_ROOT=self.media, PRIVATE_MEDIA_ROOT=self.private)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def assertPrivate(self, field, directory):
+        self.assertRegex(field.name, rf"^{directory}/[0-9a-f]{{32}}\.\w+$")
+        self.assertTrue(field.path.startswith(self.private))
+        with self.assertRaises(ValueError):
+            field.url
+        self.assertEqual(os.listdir(self.media), [])
+
+    def test_import_upload_is_private_and_deleted_when_done(self):
+        upload = SimpleUploadedFile(
+            "payroll march.csv", ",".join(STAFF_PERFORMANCE_COLUMNS).encode() + b"\n"
+        )
+        job = request_import("staff_performance", upload)
+        self.assertPrivate(job.file, "imports")
+        path = job.file.path
+
+        job.status = "running"
+        job = run_import_job(job)
+
+        self.assertEqual((job.status, job.error), ("done", ""))
+        self.assertEqual(job.file.name, "")
+        self.assertFalse(os.path.exists(path))
+
+    def test_salary_preview_keeps_its_file_for_the_confirmed_import(self):
+        upload = SimpleUploadedFile("salary.csv", ",".join(SALARY_COLUMNS).encode() + b"\n")
+        preview = run_import_job(request_import("salary", upload))
+        self.assertEqual((preview.status, preview.error), ("done", ""))
+        self.assertTrue(os.path.exists(preview.file.path))
+        path = preview.file.path
+
+        run_import_job(request_import("salary", options={"apply": True}, source=preview))
+
+        preview.refresh_from_db()
+        self.assertEqual(preview.file.name, "")
+        self.assertFalse(os.path.exists(path))
+
+    def test_export_file_is_private(self):
+        job = run_export_job(ExportJob.objects.create(kind="tickets", cache_key="k"))
+
+        self.assertEqual(job.status, "done")
+        self.assertPrivate(job.file, "exports")
@@ -0,0 +1,131 @@
+# ticket_actions.py — owner actions over many tickets at once
+#
+# The owner dashboard resolves / closes / reassigns / rejects a selection of
+# tickets with one bulk_update in one transaction. bulk_update does not send
+# the Ticket save signals, so save_tickets() does by hand what signals.py does
+# per save: move rollup buckets and owner workloads (one write per bucket or
+# owner that changes, not per ticket), refresh search documents when a field
+# they read changed, and drop the cached admin metrics and staff data.
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .metrics import CLOSED_STATUSES, invalidate_admin_metrics
+from .models import CustomUser, Ticket
+from .rollups import UNKNOWN_BUCKET, move_tickets, stored_bucket, ticket_bucket
+from .routing import move_workloads
+from .search import TICKET_DOCUMENT_FIELDS, ticket_document
+from .staff_data import invalidate_staff_data
+
+# Closed statuses (metrics.CLOSED_STATUSES) an owner still acts on: a resolved
+# ticket waits for the owner to close it once the staff member confirms
+AWAITING_CLOSE_STATUSES = ("Resolved",)
+
+REASSIGN_ROLES = ("owner", "cluster_manager")
+REASSIGN_CANDIDATES_CACHE_KEY = "hybbconnect:reassign_candidates"
+REASSIGN_CANDIDATES_TTL = 10 * 60
+
+# Action -> Ticket fields it writes
+OWNER_ACTION_FIELDS = {
+    "resolve": ("status",),
+    "close": ("status", "closed_at", "owner_closer_remarks"),
+    "reassign": ("status", "assigned_owner", "reassigned_to"),
+    "reject": ("status",),
+}
+
+
+# -----------------------------------------
+# Reads
+# -----------------------------------------
+def actionable_owner_tickets(owner):
+    """Tickets ``owner`` can still act on (open or awaiting close), newest
+    first, with what the dashboard shows of them."""
+    return (
+        Ticket.objects.filter(assigned_owner=owner)
+        .filter(~Q(status__in=CLOSED_STATUSES) | Q(status__in=AWAITING_CLOSE_STATUSES))
+        .select_related("employee", "location", "assigned_owner")
+        .order_by("-created_at")
+    )
+
+
+def reassign_candidates():
+    """Owners and cluster managers a ticket can be handed to (cached)."""
+    candidates = cache.get(REASSIGN_CANDIDATES_CACHE_KEY)
+    if candidates is None:
+        candidates = list(
+            CustomUser.objects.filter(role__in=REASSIGN_ROLES)
+            .only("id", "username", "role")
+            .order_by("username")
+        )
+        cache.set(REASSIGN_CANDIDATES_CACHE_KEY, candidates, REASSIGN_CANDIDATES_TTL)
+    return candidates
+
+
+def invalidate_reassign_candidates():
+    cache.delete(REASSIGN_CANDIDATES_CACHE_KEY)
+
+
+# -----------------------------------------
+# Writes
+# -----------------------------------------
+def save_tickets(tickets, fields, batch_size=500):
+    """Write ``fields`` of every ticket in ``tickets`` with bulk_update.
+
+    ``tickets`` should be loaded with employee and location (see
+    actionable_owner_tickets) when ``fields`` touch the search document.
+    """
+    fields = set(fields) | {"updated_at"}
+    refresh_document = bool(fields & TICKET_DOCUMENT_FIELDS)
+    now = timezone.now()
+
+    old_buckets = []
+    for ticket in tickets:
+        old = ticket._rollup_bucket
+        old_buckets.append(stored_bucket(ticket.pk) if old is UNKNOWN_BUCKET else old)
+        ticket.updated_at = now
+        if refresh_document:
+            ticket.search_document = ticket_document(ticket)
+
+    if refresh_document:
+        fields.add("search_document")
+
+    with transaction.atomic():
+        Ticket.objects.bulk_update(tickets, sorted(fields), batch_size=batch_size)
+
+        moves = []
+        for ticket, old in zip(tickets, old_buckets):
+            new = ticket_bucket(ticket)
+            if new is UNKNOWN_BUCKET:
+                new = stored_bucket(ticket.pk)
+            moves.append((old, new))
+            ticket._rollup_bucket = new
+
+        move_tickets(moves)
+        move_workloads(moves)
+
+    invalidate_admin_metrics()
+    invalidate_staff_data(*(ticket.employee_id for ticket in tickets))
+    return len(tickets)
+
+
+def apply_owner_action(action, tickets, new_owner=None, closer_remarks=""):
+    """Apply one OWNER_ACTION_FIELDS action to ``tickets`` and save them."""
+    now = timezone.now()
+
+    for ticket in tickets:
+        if action == "resolve":
+            ticket.status = "Resolved"
+        elif action == "close":
+            ticket.status = "Closed"
+            ticket.closed_at = now
+            ticket.owner_closer_remarks = closer_remarks or "Closed by owner"
+        elif action == "reassign":
+            ticket.assigned_owner = new_owner
+            ticket.reassigned_to = new_owner
+            ticket.status = "Reassigned"
+        elif action == "reject":
+            ticket.status = "Rejected"
+
+    return save_tickets(tickets, OWNER_ACTION_FIELDS[action])
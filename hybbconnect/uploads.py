@@ -0,0 +1,261 @@
+# uploads.py — resumable, chunked order photo uploads
+#
+# On weak kitchen Wi-Fi the upload page sends photos in pieces instead of one
+# multipart POST:
+#
+#   POST api/photo-uploads/            declare a batch of photos -> UploadSessions
+#   PUT  api/photo-uploads/<id>/       one chunk at the Upload-Offset header
+#   GET  api/photo-uploads/<id>/       bytes received so far, to resume from
+#   POST api/photo-uploads/finalize/   complete sessions -> OrderPhotos
+#
+# Chunks are streamed from the request into a part file under
+# UPLOAD_SESSION_DIR, so no chunk or photo is held in memory whole. Whatever
+# reached the disk before a dropped connection counts, and the client carries
+# on from the reported offset. A lock file per session keeps a retried PUT
+# from writing while the one it retries is still running. finalize_sessions() checks each file with
+# Pillow, renders it (renditions.py) and creates the photos with one
+# bulk_create. expire_upload_sessions() clears sessions idle for longer than
+# UPLOAD_SESSION_TTL_SECONDS.
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .blobs import move_refs, photo_file_names
+from .models import OrderPhoto, UploadSession
+from .photo_index import index_photos
+from .renditions import RENDITION_ERRORS, render_image, store_renditions
+
+UPLOAD_MAX_BYTES = 25 * 1024 * 1024
+UPLOAD_CHUNK_MAX_BYTES = 2 * 1024 * 1024
+UPLOAD_BATCH_MAX = 20
+
+# Read size when copying a chunk from the request to disk
+COPY_BUFFER_BYTES = 64 * 1024
+
+# A chunk lock older than this belongs to a worker that died mid-write
+UPLOAD_LOCK_STALE_SECONDS = 10 * 60
+
+
+class UploadError(Exception):
+    """A rejected upload request; ``status`` is the HTTP status to answer with
+    and ``offset`` the position the client should resume from, if known."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _session_dir():
+    return getattr(
+        settings,
+        "UPLOAD_SESSION_DIR",
+        os.path.join(tempfile.gettempdir(), "hybbconnect_uploads"),
+    )
+
+
+def part_path(session):
+    return os.path.join(_session_dir(), f"{session.pk}.part")
+
+
+def _remove_part(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def _try_lock(path):
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+@contextmanager
+def session_lock(session):
+    """Hold ``session``'s lock file while a chunk is checked and written.
+
+    A client that times out retries the same offset while the first PUT may
+    still be running; without the lock both would pass the offset check and
+    interleave their writes. The loser gets a 503, which the upload page
+    retries after a pause, resuming from the offset it then asks for.
+    """
+    os.makedirs(_session_dir(), exist_ok=True)
+    path = os.path.join(_session_dir(), f"{session.pk}.lock")
+
+    if not _try_lock(path):
+        try:
+            stale = time.time() - os.path.getmtime(path) > UPLOAD_LOCK_STALE_SECONDS
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if not (stale and _try_lock(path)):
+            raise UploadError("Another chunk of this upload is still being written.", 503)
+
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# -----------------------------------------
+# Init
+# -----------------------------------------
+def create_sessions(user, photos, location=None):
+    """One UploadSession per ``{"order_id", "filename", "size"}`` in ``photos``."""
+    if not isinstance(photos, list) or not 1 <= len(photos) <= UPLOAD_BATCH_MAX:
+        raise UploadError(f"Send between 1 and {UPLOAD_BATCH_MAX} photos.")
+
+    sessions = []
+    for photo in photos:
+        try:
+            order_id = str(photo["order_id"]).strip()
+            filename = os.path.basename(str(photo["filename"]))[:255]
+            size = int(photo["size"])
+        except (KeyError, TypeError, ValueError):
+            raise UploadError("Each photo needs order_id, filename and size.")
+
+        if not order_id or len(order_id) > 50:
+            raise UploadError("Order ID must be 1-50 characters.")
+        if not 0 < size <= UPLOAD_MAX_BYTES:
+            raise UploadError(f"{filename}: photos must be under {UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+
+        sessions.append(
+            UploadSession(
+                user=user, order_id=order_id, location=location, filename=filename or "photo", size=size
+            )
+        )
+
+    return UploadSession.objects.bulk_create(sessions)
+
+
+# -----------------------------------------
+# Chunks
+# -----------------------------------------
+def write_chunk(session, offset, stream, length):
+    """Copy ``length`` bytes from ``stream`` into the part file at ``offset``.
+
+    Returns the bytes written, which is less than ``length`` when the client
+    went away mid-chunk; the session then resumes after what was written.
+    """
+    if length > UPLOAD_CHUNK_MAX_BYTES:
+        raise UploadError(f"Chunks must be at most {UPLOAD_CHUNK_MAX_BYTES} bytes.", 413)
+
+    with session_lock(session):
+        # As left by the last PUT that held the lock
+        session.refresh_from_db(fields=["received", "photo"])
+        return _write_chunk(session, offset, stream, length)
+
+
+def _write_chunk(session, offset, stream, length):
+    if session.photo_id:
+        raise UploadError("This upload is already finished.", 409)
+    if offset != session.received:
+        raise UploadError("Offset does not match the bytes received.", 409, session.received)
+    if offset + length > session.size:
+        raise UploadError("Chunk goes past the declared size.", 400, session.received)
+
+    path = part_path(session)
+    written = 0
+
+    with open(path, "r+b" if os.path.exists(path) else "wb") as part:
+        part.seek(offset)
+        # Bytes past the offset come from an attempt that was never recorded
+        part.truncate()
+        while written < length:
+            try:
+                block = stream.read(min(COPY_BUFFER_BYTES, length - written))
+            except OSError:
+                break
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+
+    session.received = offset + written
+    session.save(update_fields=["received", "updated_at"])
+    return written
+
+
+# -----------------------------------------
+# Finalize
+# -----------------------------------------
+def finalize_sessions(user, session_ids):
+    """Turn ``user``'s complete sessions among ``session_ids`` into OrderPhotos.
+
+    Returns ``(photos by session id, errors by session id)``.
+    """
+    sessions = UploadSession.objects.filter(
+        pk__in=session_ids, user=user, photo__isnull=True
+    ).select_related("location")
+    errors = {}
+    finished = []
+
+    for session in sessions:
+        if not session.is_complete:
+            errors[str(session.pk)] = f"Only {session.received} of {session.size} bytes received."
+            continue
+
+        path = part_path(session)
+        try:
+            with Image.open(path) as image:
+                image.verify()
+            rendition = render_image(path)
+        except RENDITION_ERRORS:
+            errors[str(session.pk)] = f"{session.filename} is not a valid image."
+            continue
+
+        photo = OrderPhoto(
+            order_id=session.order_id,
+            photo=session.filename,
+            uploaded_by=user,
+            location=session.location,
+        )
+        store_renditions(photo, *rendition)
+        finished.append((session, photo))
+
+    with transaction.atomic():
+        OrderPhoto.objects.bulk_create([photo for _, photo in finished])
+        # bulk_create sends no post_save, which counts the stored files and
+        # indexes the photo
+        index_photos(photo for _, photo in finished)
+        for session, photo in finished:
+            move_refs((), photo_file_names(photo))
+            session.photo = photo
+        UploadSession.objects.bulk_update([session for session, _ in finished], ["photo"])
+
+    for session, _ in finished:
+        _remove_part(session)
+
+    return {str(session.pk): photo for session, photo in finished}, errors
+
+
+# -----------------------------------------
+# Cleanup
+# -----------------------------------------
+def expire_upload_sessions():
+    """Delete sessions (and part files) idle longer than the TTL."""
+    ttl = getattr(settings, "UPLOAD_SESSION_TTL_SECONDS", 24 * 60 * 60)
+    expired = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=ttl))
+
+    for session in expired.filter(photo__isnull=True).only("id").iterator():
+        _remove_part(session)
+    deleted, _ = expired.delete()
+    return deleted
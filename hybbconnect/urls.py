@@ -15,6 +15,7 @@ urlpatterns = [
     path('staff_dashboard/', views.staff_dashboard, name='staff_dashboard'),
     path('manager_dashboard/', views.manager_dashboard, name='manager_dashboard'),
     path('cluster_dashboard/', views.cluster_dashboard, name='cluster_dashboard'),
+    path('cluster_dashboard/panels/<str:panel>/', views.cluster_dashboard_panel, name='cluster_dashboard_panel'),
     path('owner_dashboard/', views.owner_dashboard, name='owner_dashboard'),
     path('admin_dashboard/', views.admin_dashboard, name='admin_dashboard'),
 
@@ -74,6 +75,11 @@ urlpatterns = [
     path("upload-order-photo/", views.upload_order_photo, name="upload_order_photo"),
     path("view-order-photos/", views.view_order_photos, name="view_order_photos"),
     path("filter-order-photos/", views.filter_order_photos, name="filter_order_photos"),
+    path("order-photos/zip/", views.download_order_photos_zip, name="download_order_photos_zip"),
+    path("order-photos/<int:photo_id>/original/", views.order_photo_original, name="order_photo_original"),
+    path("api/photo-uploads/", views.photo_upload_sessions, name="photo_upload_sessions"),
+    path("api/photo-uploads/finalize/", views.finalize_photo_uploads, name="finalize_photo_uploads"),
+    path("api/photo-uploads/<uuid:session_id>/", views.photo_upload_session, name="photo_upload_session"),
 
     # urls.py
     path("cluster/update-staff-time/", views.update_staff_time, name="update_staff_time"),
@@ -81,6 +87,18 @@ urlpatterns = [
     path("cluster/ot-sac-list/", views.cluster_ot_sac_list, name="cluster_ot_sac_list"),
     path('export/staff-updates/', views.export_staff_updates_csv, name='export_staff_updates_csv'),
 
+    # ------------------------
+    # Background Exports
+    # ------------------------
+    path("export/jobs/<str:kind>/request/", views.request_export_job, name="request_export_job"),
+    path("export/jobs/<int:job_id>/", views.export_job_status, name="export_job_status"),
+    path("export/jobs/<int:job_id>/download/", views.export_job_download, name="export_job_download"),
+
+    # ------------------------
+    # Background Imports (admin bulk uploads)
+    # ------------------------
+    path("import/jobs/<int:job_id>/", views.import_job_status, name="import_job_status"),
+
 
 
 
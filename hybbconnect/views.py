@@ -22,7 +22,8 @@ from django.contrib.auth.decorators import user_passes_test
 from django.db.models import Q
 import csv
 from django.http import HttpResponse, HttpResponseForbidden
-from django.core.paginator import Paginator
+from .pagination import CursorPaginator
+from .search import search, search_terms
 from datetime import timedelta
 import csv
 from django.db.models import Count
@@ -33,7 +34,24 @@ from .models import CustomUser, Ticket
 from django.shortcuts import render, redirect
 from .forms import KitchenPlayerForm, IConnectForm
 from .models import Ticket
-from .utils import get_owner_for_category  # import helper if you moved it to utils
+from .routing import route_ticket
+from .archives import content_type, iter_original, open_original, stream_photo_zip
+from .scope import get_scope
+from .uploads import (
+    UPLOAD_BATCH_MAX,
+    UPLOAD_CHUNK_MAX_BYTES,
+    UploadError,
+    create_sessions,
+    finalize_sessions,
+    write_chunk,
+)
+from .staff_data import get_staff_data
+from .ticket_actions import (
+    OWNER_ACTION_FIELDS,
+    actionable_owner_tickets,
+    apply_owner_action,
+    reassign_candidates,
+)
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from .models import SalarySlip
@@ -44,37 +62,42 @@ from django.http import HttpResponse
 from django.db.models import Q
 import csv
 from .forms import OrderPhotoForm
-from .models import OrderPhoto, Location
+from .models import OrderPhoto, OrderPhotoIndex, Location
+from .reports import (
+    PHOTO_FILTER_FIELDS,
+    order_photo_queryset,
+    photo_index_queryset,
+    ticket_report_queryset,
+)
+from .jobs import EXPORT_SOURCES, request_export
+from .models import ExportJob, ImportJob, UploadSession
+from .metrics import CLOSED_STATUSES, get_admin_metrics
+from .models import TicketStatsRollup
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.core.exceptions import ValidationError
+import json
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from .exports import (
+    EXPORT_FORMATS,
+    PHOTO_EXPORT_HEADER,
+    STAFF_UPDATE_EXPORT_HEADER,
+    TICKET_EXPORT_HEADER,
+    export_response,
+    photo_export_rows,
+    staff_update_export_rows,
+    ticket_export_rows,
+)
 from datetime import datetime
 
-# -----------------------------------------
-# ✅ Correct Category → Owner Mapping
-# -----------------------------------------
-CATEGORY_OWNER_MAP = {
-    # IConnectForm categories
-    "Training Related": "E010",
-    "Critical Intervention - Cletus": "E011",
-    "MIS Related": "E012",
-    "HR Related": "E013",
-    "Leave Request": "E013",
-    "PF Related Issue": "E013",
-    "Bank Account Issue": "E013",
-    "Request a call Back": "E013",
-    "Quality Related": "E014",
-
-    # KitchenPlayerForm categories
-    "Salary Message not received": "E013",
-    "Salary Not Received": "E013",
-    "Shift Manager / Kitchen Manager Issue": "E013",
-    "Accommodation Issue": "E013",
-    "Salary is incorrect": "E013",
-    "Request - Salary Advance": "E013",
-    "Co-Worker Issue": "E013",
-    "Request a call Back": "E013",
-    "PF Related Issues": "E013",
-}
-
-
 # --------------------------
 # ✅ Role Helper Functions
 # --------------------------
@@ -175,24 +198,10 @@ def dashboard(request):
 @login_required
 @user_passes_test(is_kitchen_staff)
 def staff_dashboard(request):
-    """Staff see their own performance, logs, and tickets."""
-    performance_data = StaffPerformance.objects.filter(employee=request.user)
+    """Staff see their own performance; logs and tickets have their own pages."""
+    data = get_staff_data(request.user, "performance")
 
-    # ✅ Fetch logs linked by employee_id OR staff relation
-    logs = KitchenLog.objects.filter(
-        Q(emp_id=request.user.employee_id) | Q(staff=request.user)
-    ).order_by("-created_at")
-
-    # ✅ Fetch all tickets raised by this staff
-    my_tickets = Ticket.objects.filter(employee=request.user).order_by("-created_at")
-
-    context = {
-        "performance_data": performance_data,
-        "logs": logs,
-        "my_tickets": my_tickets,
-        "user_location": request.user.location,
-    }
-    return render(request, "staff_dashboard.html", context)
+    return render(request, "staff_dashboard.html", {"performance_data": data["performance"]})
 
 
 
@@ -248,10 +257,11 @@ def acknowledge_log(request, log_id):
 @login_required
 @user_passes_test(is_kitchen_staff)
 def my_tickets_view(request):
-    my_tickets = Ticket.objects.filter(employee=request.user).order_by('-id')
+    data = get_staff_data(request.user, "tickets")
 
     return render(request, "my_tickets.html", {
-        "my_tickets": my_tickets
+        "my_tickets": data["tickets"],
+        "more_tickets": data["more_tickets"],
     })
 
 
@@ -260,12 +270,11 @@ def my_tickets_view(request):
 @login_required
 @user_passes_test(is_kitchen_staff)
 def my_logs_view(request):
-    logs = KitchenLog.objects.filter(
-        Q(emp_id=request.user.employee_id) | Q(staff=request.user)
-    ).order_by('-created_at')
+    data = get_staff_data(request.user, "logs")
 
     return render(request, "my_logs.html", {
-        "logs": logs
+        "logs": data["logs"],
+        "more_logs": data["more_logs"],
     })
 
 
@@ -325,56 +334,6 @@ def resolve_ticket(request, ticket_id):
     return redirect("manager_dashboard")
 
 
-# --------------------------
-# ✅ Cluster Manager Dashboard
-# --------------------------
-from django.db.models import Q
-
-@login_required
-@user_passes_test(lambda u: u.role == "cluster_manager")
-def cluster_dashboard(request):
-    user = request.user
-
-    # ✅ Assigned locations for this cluster manager
-    assigned_locations = []
-    if hasattr(user, "cluster_manager_profile"):
-        assigned_locations = user.cluster_manager_profile.locations.all()
-
-    # ✅ Kitchen Managers in those locations
-    kitchen_managers = CustomUser.objects.filter(
-        role="kitchen_manager",
-        location__in=assigned_locations
-    )
-
-    # ✅ Kitchen Staff in those locations
-    kitchen_staff = CustomUser.objects.filter(
-        role="kitchen_staff",
-        location__in=assigned_locations
-    )
-
-    # ✅ iConnect Tickets (from kitchen managers under this cluster OR raised by the cluster manager)
-    tickets = Ticket.objects.filter(
-        Q(location__in=assigned_locations) | Q(raised_by=user)
-    ).order_by("-created_at")
-
-    # ✅ Recent kitchen logs
-    kitchen_logs = KitchenLog.objects.filter(
-        location__in=[loc.code for loc in assigned_locations]
-    ).order_by("-created_at")[:10]
-
-    # ✅ OT / SAC OFF Updates ONLY for staff in allocated locations
-    updates = StaffTimeUpdate.objects.filter(
-        staff__location__in=assigned_locations
-    ).select_related("staff", "staff__location").order_by("-updated_at")
-
-
-    return render(request, "cluster_dashboard.html", {
-        "assigned_locations": assigned_locations,
-        "kitchen_managers": kitchen_managers,
-        "kitchen_staff": kitchen_staff,
-        "kitchen_logs": kitchen_logs,
-        "tickets": tickets,
-    })
 # --------------------------
 # ✅ Owner Dashboard (Upgraded + Auto Close Support)
 # --------------------------
@@ -382,103 +341,90 @@ def cluster_dashboard(request):
 @login_required
 @user_passes_test(is_owner)
 def owner_dashboard(request):
-    tickets = Ticket.objects.filter(
-        assigned_owner=request.user
-    ).order_by("-created_at")
-
     if request.method == "POST":
         action = request.POST.get("action")
-        ticket_id = request.POST.get("ticket_id")
-        remarks = request.POST.get("remarks", "").strip()
+        # Bulk form posts ticket_ids; the per-ticket modals post ticket_id
+        ticket_ids = [
+            value for value in
+            request.POST.getlist("ticket_ids") or request.POST.getlist("ticket_id")
+            if value.isdigit()
+        ]
         reject_reason = request.POST.get("reject_reason", "").strip()
         closer_remarks = request.POST.get("closer_remarks", "").strip()
+        new_owner = None
 
-        if not ticket_id:
+        if not ticket_ids:
             messages.error(request, "Invalid ticket ID.")
             return redirect("owner_dashboard")
 
-        ticket = get_object_or_404(Ticket, id=ticket_id)
-
-        # ----------------------------------
-        # 🔵 1) Owner Resolves Ticket
-        # ----------------------------------
-        if action == "resolve":
-            ticket.status = "Resolved"
-            ticket.resolved_by = request.user
-            ticket.owner_remarks = remarks or "Awaiting staff confirmation"
-            ticket.save()
-
-            messages.success(
-                request,
-                f"✅ Ticket #{ticket.ticket_number} marked as resolved — awaiting staff confirmation."
-            )
-
-        # ----------------------------------
-        # 🟠 2) Owner Adds Closer Remarks + Closes Ticket
-        # ----------------------------------
-        elif action == "close":
-            ticket.status = "Closed"
-            ticket.closed_dt = timezone.now()
-            ticket.owner_closer_remarks = closer_remarks or "Closed by owner"
-            ticket.save()
+        if action not in OWNER_ACTION_FIELDS:
+            messages.error(request, "Invalid action.")
+            return redirect("owner_dashboard")
 
-            messages.success(
-                request,
-                f"🔒 Ticket #{ticket.ticket_number} closed successfully."
+        if action == "reassign":
+            new_owner_id = request.POST.get("new_owner")
+            new_owner = next(
+                (user for user in reassign_candidates() if str(user.id) == new_owner_id),
+                None,
             )
+            if new_owner is None:
+                messages.error(request, "Please select a valid user to reassign.")
+                return redirect("owner_dashboard")
 
-        # ----------------------------------
-        # 🔁 3) Reassign Ticket
-        # ----------------------------------
-        elif action == "reassign":
-            new_owner_id = request.POST.get("new_owner")
+        if action == "reject" and not reject_reason:
+            messages.error(request, "Please provide a reason for rejection.")
+            return redirect("owner_dashboard")
 
-            if new_owner_id:
-                new_owner = get_object_or_404(CustomUser, id=new_owner_id)
+        selected = list(actionable_owner_tickets(request.user).filter(id__in=ticket_ids))
+        if not selected:
+            messages.error(request, "No open tickets of yours were selected.")
+            return redirect("owner_dashboard")
 
-                ticket.assigned_owner = new_owner
-                ticket.reassigned_to = new_owner
-                ticket.status = "Reassigned"
-                ticket.save()
+        apply_owner_action(action, selected, new_owner=new_owner, closer_remarks=closer_remarks)
 
-                messages.success(
-                    request,
-                    f"🔁 Ticket #{ticket.ticket_number} reassigned to {new_owner.username}."
-                )
-            else:
-                messages.error(request, "Please select a valid user to reassign.")
+        label = (
+            f"Ticket #{selected[0].ticket_number}" if len(selected) == 1
+            else f"{len(selected)} tickets"
+        )
+        skipped = len(ticket_ids) - len(selected)
 
         # ----------------------------------
-        # ❌ 4) Reject Ticket
+        # 🔵 Resolve / 🟠 Close / 🔁 Reassign / ❌ Reject
         # ----------------------------------
-        elif action == "reject":
-            if not reject_reason:
-                messages.error(request, "Please provide a reason for rejection.")
-            else:
-                ticket.status = "Rejected"
-                ticket.rejection_reason = reject_reason
-                ticket.rejected_by = request.user
-                ticket.save()
-
-                messages.warning(
-                    request,
-                    f"❌ Ticket #{ticket.ticket_number} rejected."
-                )
-
+        if action == "resolve":
+            messages.success(
+                request,
+                f"✅ {label} marked as resolved — awaiting staff confirmation."
+            )
+        elif action == "close":
+            messages.success(request, f"🔒 {label} closed successfully.")
+        elif action == "reassign":
+            messages.success(request, f"🔁 {label} reassigned to {new_owner.username}.")
         else:
-            messages.error(request, "Invalid action.")
+            messages.warning(request, f"❌ {label} rejected.")
+
+        if skipped:
+            messages.info(request, f"{skipped} selected ticket(s) were already closed or not yours.")
 
         return redirect("owner_dashboard")
 
-    # Dropdown for reassign
-    reassign_options = CustomUser.objects.filter(role__in=["owner", "cluster_manager"])
+    # One query for every ticket still to act on, bucketed in a single pass
+    tickets = list(actionable_owner_tickets(request.user))
+    open_tickets, reassigned_tickets, resolved_tickets = [], [], []
+    for ticket in tickets:
+        if ticket.status not in CLOSED_STATUSES:
+            open_tickets.append(ticket)
+        if ticket.reassigned_to_id:
+            reassigned_tickets.append(ticket)
+        if ticket.status == "Resolved":
+            resolved_tickets.append(ticket)
 
     context = {
         "tickets": tickets,
-        "reassign_options": reassign_options,
-        "assigned_tickets": tickets.filter(assigned_owner__isnull=False),
-        "reassigned_tickets": tickets.filter(reassigned_to__isnull=False),
-        "resolved_tickets": tickets.filter(status="Resolved"),
+        "reassign_options": reassign_candidates(),
+        "open_tickets": open_tickets,
+        "reassigned_tickets": reassigned_tickets,
+        "resolved_tickets": resolved_tickets,
     }
 
     return render(request, "owner_dashboard.html", context)
@@ -559,15 +505,9 @@ def confirm_resolution(request, ticket_id):
 def admin_dashboard(request):
 
     # -----------------------------------
-    # SUMMARY METRICS
+    # SUMMARY METRICS (cached, see metrics.py)
     # -----------------------------------
-    total_users = CustomUser.objects.count()
-    active_users = CustomUser.objects.filter(is_active=True).count()
-    inactive_users = CustomUser.objects.filter(is_active=False).count()
-
-    total_tickets = Ticket.objects.count()
-    pending_tickets = Ticket.objects.filter(status="Pending").count()
-    resolved_tickets = Ticket.objects.filter(status="Resolved").count()
+    metrics = get_admin_metrics()
 
     # -----------------------------------
     # BASE QUERYSET
@@ -616,40 +556,21 @@ def admin_dashboard(request):
     if location:
         tickets = tickets.filter(location=location)
 
-    # -----------------------------------
-    # FILTER DROPDOWNS
-    # -----------------------------------
-    locations = Ticket.objects.values_list("location", flat=True).distinct()
-    categories = Ticket.objects.values_list("concern", flat=True).distinct()
-
     # -------------------------------------------------------
     # OT / SAC OFF UPDATES (SHOW ALL FOR ADMIN)
     # -------------------------------------------------------
-    updates = StaffTimeUpdate.objects.select_related(
-        "staff", "staff__location"
-    ).order_by("-updated_at")
-
     staff_time_updates = StaffTimeUpdate.objects.select_related("staff", "updated_by").order_by("-updated_at")
 
     # -----------------------------------
     # CONTEXT
     # -----------------------------------
     context = {
-        "total_users": total_users,
-        "active_users": active_users,
-        "inactive_users": inactive_users,
-
-        "total_tickets": total_tickets,
-        "pending_tickets": pending_tickets,
-        "resolved_tickets": resolved_tickets,
+        **metrics,
 
         "tickets": tickets,
         "recent_tickets": recent_tickets,
         "users": users,
 
-        "locations": locations,
-        "categories": categories,
-
         "selected_status": status,
         "selected_assigned_to": assigned_to_raw,
         "selected_location": location,
@@ -673,19 +594,8 @@ def raise_staff_log(request):
     # Pass user to form for filtering
     form = KitchenLogForm(request.POST or None, user=user)
 
-    # 🟢 Staff filtering (for dropdowns if needed)
-    if user.role == "kitchen_manager" and user.location:
-        # ✅ Existing behavior — unchanged
-        staff_list = CustomUser.objects.filter(role="kitchen_staff", location=user.location)
-
-    elif user.role == "cluster_manager" and hasattr(user, "cluster_manager_profile"):
-        # ✅ Cluster Manager: show all staff from assigned locations
-        assigned_locations = user.cluster_manager_profile.locations.all()
-        staff_list = CustomUser.objects.filter(role="kitchen_staff", location__in=assigned_locations)
-
-    else:
-        # Fallback
-        staff_list = CustomUser.objects.filter(role="kitchen_staff")
+    # 🟢 Staff filtering (KM: own location, CM: assigned locations)
+    staff_list = request.scope.staff()
 
     # 🟢 Handle form submission
     if request.method == "POST" and form.is_valid():
@@ -746,141 +656,30 @@ def confirm_ticket_closure(request, ticket_id):
 
 def view_all_tickets(request):
 
-    tickets = Ticket.objects.all().order_by("-created_at")
-
-    # ----------------------------------
-    # ⭐ FILTERS
-    # ----------------------------------
-    status = request.GET.get("status")
-    assigned_to = request.GET.get("assigned_to")
-    location = request.GET.get("location")
-
-    if status:
-        tickets = tickets.filter(status=status)
-
-    if assigned_to:
-        tickets = tickets.filter(assigned_owner_id=assigned_to)
-
-    if location:
-        tickets = tickets.filter(location__name=location)
-
     # ----------------------------------
-    # ⭐ Prepare values for HTML table
-    # Add computed fields to each ticket
+    # ⭐ FILTERS + computed columns (all done in SQL)
     # ----------------------------------
-    for t in tickets:
-        # Closed date
-        t.closed_dt = t.closed_at.strftime("%d-%m-%Y %H:%M") if t.closed_at else ""
-
-        # Pending days = created → closed OR today
-        if t.closed_at:
-            t.pending_days = (t.closed_at.date() - t.created_at.date()).days
-        else:
-            t.pending_days = (timezone.now().date() - t.created_at.date()).days
-
-        # Staff confirmation date
-        t.confirm_dt = t.staff_confirmed_at.strftime("%d-%m-%Y %H:%M") if t.staff_confirmed_at else ""
-
-        # Staff confirmation pending days
-        if t.staff_confirmed_at:
-            t.confirm_pending = (t.staff_confirmed_at.date() - t.created_at.date()).days
-        else:
-            t.confirm_pending = ""
-
-        # Employee remarks (if exists)
-        t.employee_remarks = getattr(t, "employee_remarks", "")
-
-        # Owner remarks (if exists)
-        t.owner_remarks = getattr(t, "owner_remarks", "")
-
-        # Rejection remarks (if exists)
-        t.rejection_remarks = getattr(t, "rejection_reason", "")
-
-        # Reassigned info
-        if t.reassigned_to:
-            t.reassigned_info = f"Reassigned to {t.reassigned_to.username}"
-        else:
-            t.reassigned_info = ""
-
-        # Time to resolve (HH:MM:SS)
-        if t.closed_at:
-            t.time_to_resolve = str(t.closed_at - t.created_at)
-        else:
-            t.time_to_resolve = ""
-
-        # SLA breach (>48 hours)
-        if t.closed_at:
-            t.sla_breach = (t.closed_at - t.created_at) > timedelta(hours=48)
-        else:
-            t.sla_breach = False
+    tickets = ticket_report_queryset(
+        status=request.GET.get("status"),
+        assigned_to=request.GET.get("assigned_to"),
+        location=request.GET.get("location"),
+    )
 
     # ----------------------------------
-    # ⭐ CSV DOWNLOAD
+    # ⭐ CSV / XLSX DOWNLOAD (streamed)
     # ----------------------------------
-    if request.GET.get("download") == "csv":
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="tickets.csv"'
-
-        writer = csv.writer(response)
-
-        writer.writerow([
-            "Raised Date",
-            "Ticket Number",
-            "Employee",
-            "Employee Code",
-            "Location",
-            "Concern",
-            "Category",
-            "Status",
-            "Assigned Owner",
-            "Description",
-
-            "Closed Date & Time",
-            "Pending Days",
-            "Staff Confirmation Date",
-            "Staff Confirmation Pending Days",
-            "Employee Remarks",
-            "Owner Remarks",
-            "Rejection Remarks",
-            "Reassigned Info",
-            "Time Taken To Resolve",
-            "SLA Breach"
-        ])
-
-        for t in tickets:
-            writer.writerow([
-                t.created_at.strftime("%d-%m-%Y"),
-                t.ticket_number,
-                t.employee.username if t.employee else "",
-                t.employee.employee_id if t.employee else "",
-                t.location.name if t.location else "",
-                t.concern or "",
-                t.concern_category or "",
-                t.status or "",
-                t.assigned_owner.username if t.assigned_owner else "",
-                t.description or "",
-
-                t.closed_dt,
-                t.pending_days,
-                t.confirm_dt,
-                t.confirm_pending,
-                t.employee_remarks,
-                t.owner_remarks,
-                t.rejection_remarks,
-                t.reassigned_info,
-                t.time_to_resolve,
-                "YES" if t.sla_breach else "NO",
-            ])
-
-        return response
+    download = request.GET.get("download")
+    if download in EXPORT_FORMATS:
+        return export_response(
+            download, "tickets", TICKET_EXPORT_HEADER, ticket_export_rows(tickets)
+        )
 
     # ----------------------------------
-    # ⭐ PAGINATION
+    # ⭐ PAGINATION (keyset on created_at, id)
     # ----------------------------------
-    paginator = Paginator(tickets, 50)
-    page = request.GET.get("page")
-    tickets_page = paginator.get_page(page)
+    tickets_page = CursorPaginator(tickets, ("-created_at", "-id"), 50).get_page(
+        request.GET.get("cursor")
+    )
 
     # Dropdown lists
     owners = CustomUser.objects.filter(role="ticket_owner")
@@ -892,20 +691,6 @@ def view_all_tickets(request):
         "locations": locations,
     })
 
-    # -----------------------------
-    # 📌 Dynamic dropdown values
-    # -----------------------------
-    locations = Ticket.objects.values_list("location", flat=True).distinct()
-    staff_list = CustomUser.objects.filter(role="cluster_manager")
-
-    context = {
-        "tickets": tickets,
-        "locations": locations,
-        "staff_list": staff_list,
-    }
-
-    return render(request, "view_all_tickets.html", context)
-
 
 
 
@@ -925,23 +710,9 @@ def iconnect_form_view(request):
     form = IConnectForm(request.POST or None, user=user)
 
     # ------------------------------------------------------
-    # 🟢 STAFF LIST FILTERING
+    # 🟢 STAFF LIST FILTERING (see scope.py)
     # ------------------------------------------------------
-    if user.role == "kitchen_manager" and user.location:
-        staff_list = CustomUser.objects.filter(
-            role="kitchen_staff",
-            location=user.location
-        )
-
-    elif user.role == "cluster_manager" and hasattr(user, "cluster_manager_profile"):
-        assigned_locations = user.cluster_manager_profile.locations.all()
-        staff_list = CustomUser.objects.filter(
-            role="kitchen_staff",
-            location__in=assigned_locations
-        )
-
-    else:
-        staff_list = CustomUser.objects.filter(role="kitchen_staff")
+    staff_list = request.scope.staff()
 
     # ------------------------------------------------------
     # 🟢 POST BLOCK — SAVE TICKET
@@ -984,15 +755,8 @@ def iconnect_form_view(request):
             or form.cleaned_data.get("concern")
         )
 
-        assigned_owner = get_owner_for_category(category)
-
-        if not assigned_owner:
-            assigned_owner = (
-                CustomUser.objects.filter(role="owner")
-                .annotate(ticket_count=Count("tickets_owned"))
-                .order_by("ticket_count")
-                .first()
-            )
+        # Routing rules, else the least-loaded owner (see routing.py)
+        assigned_owner = route_ticket(category, ticket.location_id)
 
         ticket.assigned_owner = assigned_owner
         ticket.status = "Assigned" if assigned_owner else "Pending"
@@ -1027,25 +791,6 @@ def iconnect_form_view(request):
 
 User = get_user_model()
 
-#✅ Utility
-# --------------------------
-def get_owner_for_category(category):
-    """Return the correct owner User object for the given category using employee_id mapping."""
-    if not category:
-        return None
-
-    category = category.strip().lower()
-
-    for key, emp_id in CATEGORY_OWNER_MAP.items():
-        if key.lower() == category:
-            try:
-                return User.objects.get(employee_id=emp_id, role="owner")
-            except User.DoesNotExist:
-                return None
-
-    return None
-
-
 # --------------------------
 # ✅ Raise Ticket (Kitchen Staff)
 # --------------------------
@@ -1065,19 +810,7 @@ def raise_ticket(request):
 
             category = form.cleaned_data.get("concern")
 
-            owner_emp_id = CATEGORY_OWNER_MAP.get(category)
-            owner = None
-
-            if owner_emp_id:
-                owner = CustomUser.objects.filter(employee_id=owner_emp_id, role="owner").first()
-
-            if not owner:
-                owner = (
-                    CustomUser.objects.filter(role="owner")
-                    .annotate(ticket_count=Count("tickets_owned"))
-                    .order_by("ticket_count")
-                    .first()
-                )
+            owner = route_ticket(category, ticket.location_id)
 
             if owner:
                 ticket.assigned_owner = owner
@@ -1107,18 +840,14 @@ def raise_ticket(request):
 @login_required
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def view_kitchen_managers(request):
-    user = request.user
-    assigned_locations = user.cluster_manager_profile.locations.all()
-    kitchen_managers = CustomUser.objects.filter(role="kitchen_manager", location__in=assigned_locations)
+    kitchen_managers = request.scope.users("kitchen_manager")
     return render(request, "view_kitchen_managers.html", {"kitchen_managers": kitchen_managers})
 
 
 @login_required
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def view_kitchen_staff(request):
-    user = request.user
-    assigned_locations = user.cluster_manager_profile.locations.all()
-    kitchen_staff = CustomUser.objects.filter(role="kitchen_staff", location__in=assigned_locations)
+    kitchen_staff = request.scope.staff()
     return render(request, "view_kitchen_staff.html", {"kitchen_staff": kitchen_staff})
 
 
@@ -1130,90 +859,126 @@ def view_kitchen_logs(request):
     employee_id = request.GET.get("employee_id", "").strip()
 
     # Base queryset
-    kitchen_logs = KitchenLog.objects.all().order_by("-created_at")
+    kitchen_logs = KitchenLog.objects.select_related("staff")
 
     # -----------------------------
-    # 🔍 FILTER: Employee Name
+    # 🔍 FILTER: Employee Name (prefix search, best match first, see search.py)
     # -----------------------------
-    if emp_name:
-        kitchen_logs = kitchen_logs.filter(
-            Q(staff__first_name__icontains=emp_name) |
-            Q(staff__last_name__icontains=emp_name) |
-            Q(staff__username__icontains=emp_name) |
-            Q(emp_name__icontains=emp_name)  # old logs
-        )
+    ranked = bool(search_terms(emp_name))
+    if ranked:
+        kitchen_logs = search(kitchen_logs, emp_name, ranked=True)
+        ordering = ("-search_rank", "-id")
+    else:
+        ordering = ("-created_at", "-id")
 
     # -----------------------------
-    # 🔍 FILTER: Employee ID
+    # 🔍 FILTER: Employee ID (prefix)
     # -----------------------------
     if employee_id:
         kitchen_logs = kitchen_logs.filter(
-            Q(staff__employee_id__icontains=employee_id) |
-            Q(emp_id__icontains=employee_id)  # old logs
+            Q(staff__employee_id__istartswith=employee_id) |
+            Q(emp_id__istartswith=employee_id)  # old logs
         )
 
+    kitchen_logs = CursorPaginator(kitchen_logs, ordering, 50).get_page(
+        request.GET.get("cursor")
+    )
+
     return render(
         request,
         "view_kitchen_logs.html",
-        {"kitchen_logs": kitchen_logs}
+        {"kitchen_logs": kitchen_logs, "ranked": ranked}
     )
 
 
 # --------------------------
-# ✅ Cluster Manager Dashboard (Tickets)
+# ✅ Cluster Manager Dashboard
 # --------------------------
+# The page itself only shows counts (one aggregate per table); the ticket,
+# kitchen log and OT / SAC OFF lists are panels fetched by htmx when they
+# scroll into view, one cursor page at a time.
+
+CLUSTER_PANEL_SIZE = 20
+
+
+def _cluster_tickets_panel(scope):
+    return scope.restrict(Ticket.objects.select_related("location", "assigned_owner")), (
+        "-created_at", "-id"
+    )
+
+
+def _cluster_logs_panel(scope):
+    return scope.restrict_codes(KitchenLog.objects.all()), ("-created_at", "-id")
+
+
+def _cluster_updates_panel(scope):
+    updates = StaffTimeUpdate.objects.select_related("staff", "staff__location")
+    return scope.restrict(updates, field="staff__location"), ("-updated_at", "-id")
+
+
+# panel name -> (queryset + ordering builder, template)
+CLUSTER_PANELS = {
+    "tickets": (_cluster_tickets_panel, "partials/cluster_tickets_panel.html"),
+    "kitchen_logs": (_cluster_logs_panel, "partials/cluster_logs_panel.html"),
+    "staff_updates": (_cluster_updates_panel, "partials/cluster_updates_panel.html"),
+}
+
 
 @login_required
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def cluster_dashboard(request):
-    user = request.user
+    scope = request.scope
+    week_ago = timezone.now() - timedelta(days=7)
 
-    # ✅ Assigned locations for this cluster manager
-    assigned_locations = []
-    if hasattr(user, "cluster_manager_profile"):
-        assigned_locations = user.cluster_manager_profile.locations.all()
+    people = scope.restrict(CustomUser.objects.all()).aggregate(
+        kitchen_managers=Count("id", filter=Q(role="kitchen_manager", is_active=True)),
+        kitchen_staff=Count("id", filter=Q(role="kitchen_staff")),
+    )
 
-    # ✅ Kitchen Managers in those locations
-    kitchen_managers = CustomUser.objects.filter(
-        role="kitchen_manager",
-        location__in=assigned_locations
+    # Ticket counts come from the stats rollup (see rollups.py)
+    tickets = scope.restrict(TicketStatsRollup.objects.all()).aggregate(
+        total=Coalesce(Sum("count"), 0),
+        open=Coalesce(Sum("count", filter=~Q(status__in=CLOSED_STATUSES)), 0),
     )
 
-    # ✅ Kitchen Staff in those locations
-    kitchen_staff = CustomUser.objects.filter(
-        role="kitchen_staff",
-        location__in=assigned_locations
+    logs = scope.restrict_codes(KitchenLog.objects.all()).aggregate(
+        recent=Count("id", filter=Q(created_at__gte=week_ago)),
     )
 
-    # ✅ iConnect Tickets in assigned locations
-    tickets = Ticket.objects.filter(
-        location__in=assigned_locations
-    ).order_by("-created_at")
+    return render(request, "cluster_dashboard.html", {
+        "assigned_locations": scope.locations().order_by("name"),
+        "people": people,
+        "ticket_counts": tickets,
+        "recent_logs": logs["recent"],
+        "panels": CLUSTER_PANELS,
+    })
 
-    # ✅ Recent kitchen logs
-    kitchen_logs = KitchenLog.objects.filter(
-        location__in=[loc.code for loc in assigned_locations]
-    ).order_by("-created_at")[:10]
 
-    context = {
-        "assigned_locations": assigned_locations,
-        "kitchen_managers": kitchen_managers,
-        "kitchen_staff": kitchen_staff,
-        "kitchen_logs": kitchen_logs,
-        "tickets": tickets,  # 👈 Added
-    }
-    return render(request, "cluster_dashboard.html", context)
+@login_required
+@user_passes_test(lambda u: u.role == "cluster_manager")
+def cluster_dashboard_panel(request, panel):
+    if panel not in CLUSTER_PANELS:
+        raise Http404
+    build, template = CLUSTER_PANELS[panel]
+
+    queryset, ordering = build(request.scope)
+    page = CursorPaginator(queryset, ordering, CLUSTER_PANEL_SIZE).get_page(
+        request.GET.get("cursor")
+    )
+    return render(request, template, {
+        "page": page,
+        "panel_url": reverse("cluster_dashboard_panel", args=[panel]),
+        "panel_target": f"#panel-{panel}",
+    })
 
 # ✅ Cluster Manager closes a reassigned ticket
 @login_required
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def close_cluster_ticket(request, ticket_id):
     ticket = get_object_or_404(Ticket, id=ticket_id)
-    user = request.user
 
     # ----- 1️⃣ Permission: Check if ticket location belongs to this cluster manager -----
-    assigned_locations = user.cluster_manager_profile.locations.all()
-    if ticket.location not in assigned_locations:
+    if not request.scope.allows(ticket.location_id):
         messages.error(request, "❌ You cannot modify tickets outside your assigned locations.")
         return redirect("cluster_dashboard")
 
@@ -1248,19 +1013,14 @@ def close_cluster_ticket(request, ticket_id):
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def confirm_cluster_ticket(request, ticket_id):
     ticket = get_object_or_404(Ticket, id=ticket_id)
-    user = request.user
 
-    # ✅ Extract assigned location names
-    assigned_locations = list(user.cluster_manager_profile.locations.values_list("name", flat=True))
-
-    # ✅ Compare using strings
-    if ticket.location not in assigned_locations:
+    # ✅ Ticket must be in one of the assigned locations
+    if not request.scope.allows(ticket.location_id):
         messages.error(request, "❌ You cannot modify tickets outside your assigned locations.")
         return redirect("cluster_dashboard")
 
     ticket.status = "Confirmed"
-    ticket.owner_confirmed_at = timezone.now()
-    ticket.resolved_confirmed = True
+    ticket.closed_at = ticket.closed_at or timezone.now()
     ticket.save()
 
     messages.success(request, f"✅ Ticket {ticket.ticket_number} confirmed successfully.")
@@ -1269,13 +1029,13 @@ def confirm_cluster_ticket(request, ticket_id):
 @login_required
 @user_passes_test(lambda u: u.role == "cluster_manager")
 def view_cluster_tickets(request):
-    user = request.user
-    
-    assigned_locations = user.cluster_manager_profile.locations.all()
+    scope = request.scope
+    assigned_locations = scope.locations()
 
-    tickets = Ticket.objects.filter(
-        location__in=assigned_locations
-    ).order_by("-created_at")
+    tickets = scope.restrict(Ticket.objects.select_related("location"))
+    tickets = CursorPaginator(tickets, ("-created_at", "-id"), 50).get_page(
+        request.GET.get("cursor")
+    )
 
     return render(request, "view_cluster_tickets.html", {
         "tickets": tickets,
@@ -1302,31 +1062,8 @@ def staff_salary_slip(request):
 # 🔥 UNIFIED ROLE → LOCATION LOGIC
 # ----------------------------------------
 def get_user_locations(user):
-    """Return list/queryset of allowed locations based on user role."""
-
-    # 1️⃣ Kitchen Staff
-    if user.role == "kitchen_staff":
-        if hasattr(user, "kitchenstaff_profile"):
-            return [user.kitchenstaff_profile.location]
-        return [user.location] if user.location else []
-
-    # 2️⃣ Kitchen Manager
-    if user.role == "kitchen_manager":
-        if hasattr(user, "kitchen_manager_profile"):
-            return [user.kitchen_manager_profile.location]
-        return [user.location] if user.location else []
-
-    # 3️⃣ Cluster Manager → multiple assigned
-    if user.role == "cluster_manager":
-        if hasattr(user, "cluster_manager_profile"):
-            return user.cluster_manager_profile.locations.all()
-        return []
-
-    # 4️⃣ Admin / Owner → all locations
-    if user.role in ["admin", "owner"]:
-        return Location.objects.all()
-
-    return []
+    """Queryset of locations the user may see, by role (see scope.py)."""
+    return get_scope(user).locations()
 
 
 # ----------------------------------------
@@ -1347,7 +1084,7 @@ def upload_order_photo(request):
 
             # Staff/Manager: auto location
             if user.role in ["kitchen_staff", "kitchen_manager", "cluster_manager"]:
-                photo_obj.location = allowed_locations[0] if allowed_locations else None
+                photo_obj.location = allowed_locations.first()
 
             # Cluster/Admin/Owner: select from form
             else:
@@ -1364,105 +1101,223 @@ def upload_order_photo(request):
 
 
 # ----------------------------------------
-# 📌 FILTER ORDER PHOTOS + CSV EXPORT
+# 📤 Resumable (chunked) photo uploads — see uploads.py
 # ----------------------------------------
+# Roles whose photos always go to their own location (as in upload_order_photo)
+OWN_LOCATION_UPLOAD_ROLES = ("kitchen_staff", "kitchen_manager", "cluster_manager")
+
+
+def upload_session_payload(session):
+    return {
+        "id": str(session.pk),
+        "order_id": session.order_id,
+        "filename": session.filename,
+        "size": session.size,
+        "offset": session.received,
+        "complete": session.is_complete,
+        "photo_id": session.photo_id,
+    }
+
+
+def upload_error_response(error):
+    return JsonResponse({"error": str(error), "offset": error.offset}, status=error.status)
+
 
 @login_required
-def filter_order_photos(request):
-    user = request.user
-    user_locations = get_user_locations(user)
-
-    photos = OrderPhoto.objects.filter(location__in=user_locations).order_by("-uploaded_at")
-
-    # FILTER INPUTS
-    date_after = request.GET.get("date_after")
-    date_before = request.GET.get("date_before")
-    order_id = request.GET.get("order_id")
-    username = request.GET.get("username")
-    full_name = request.GET.get("full_name")
-    location = request.GET.get("location")   # NEW
-
-    # DATE FILTERS
-    if date_after:
-        photos = photos.filter(uploaded_at__date__gte=date_after)
-
-    if date_before:
-        photos = photos.filter(uploaded_at__date__lte=date_before)
-
-    # ORDER ID
-    if order_id:
-        photos = photos.filter(order_id__icontains=order_id)
-
-    # USERNAME
-    if username:
-        photos = photos.filter(uploaded_by__username__icontains=username)
-
-    # FULL NAME
-    if full_name:
-        photos = photos.filter(
-            Q(uploaded_by__first_name__icontains=full_name) |
-            Q(uploaded_by__last_name__icontains=full_name)
-        )
+@require_POST
+def photo_upload_sessions(request):
+    try:
+        payload = json.loads(request.body)
+        photos = payload["photos"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected JSON with a photos list."}, status=400)
 
-    # LOCATION (FULL TEXT SEARCH)
-    if location:
-        photos = photos.filter(location__name__icontains=location)
+    if request.user.role in OWN_LOCATION_UPLOAD_ROLES:
+        location = get_user_locations(request.user).first()
+    else:
+        # Other roles pick the location, as on the upload form
+        location_id = str(payload.get("location") or "")
+        if not location_id:
+            return JsonResponse({"error": "Choose a location."}, status=400)
+        if not (location_id.isdigit() and request.scope.allows(int(location_id))):
+            return JsonResponse({"error": "Location not allowed."}, status=403)
+        location = request.scope.locations().filter(id=location_id).first()
+        if location is None:
+            return JsonResponse({"error": "Location not found."}, status=400)
+
+    try:
+        sessions = create_sessions(request.user, photos, location)
+    except UploadError as error:
+        return upload_error_response(error)
 
-    # CSV EXPORT
-    if request.GET.get("export") == "csv":
-        return export_photos_csv(request, photos)
+    return JsonResponse(
+        {
+            "chunk_size": UPLOAD_CHUNK_MAX_BYTES,
+            "sessions": [upload_session_payload(session) for session in sessions],
+        },
+        status=201,
+    )
+
+
+@login_required
+def photo_upload_session(request, session_id):
+    session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+
+    if request.method == "GET":
+        return JsonResponse(upload_session_payload(session))
+
+    if request.method != "PUT":
+        return HttpResponseNotAllowed(["GET", "PUT"])
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return JsonResponse({"error": "Upload-Offset and Content-Length are required."}, status=400)
+
+    try:
+        # Streams the body to disk; request.body is never read
+        write_chunk(session, offset, request, length)
+    except UploadError as error:
+        return upload_error_response(error)
+
+    return JsonResponse(upload_session_payload(session))
+
+
+@login_required
+@require_POST
+def finalize_photo_uploads(request):
+    try:
+        session_ids = [str(i) for i in json.loads(request.body)["sessions"]][:UPLOAD_BATCH_MAX]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected JSON with a sessions list."}, status=400)
 
+    try:
+        photos, errors = finalize_sessions(request.user, session_ids)
+    except ValidationError:
+        return JsonResponse({"error": "Invalid session id."}, status=400)
+
+    if photos:
+        messages.success(request, f"{len(photos)} photo(s) uploaded successfully!")
+    return JsonResponse(
+        {
+            "photos": {session_id: photo.id for session_id, photo in photos.items()},
+            "errors": errors,
+        }
+    )
+
+
+# ----------------------------------------
+# 📌 FILTER ORDER PHOTOS + CSV EXPORT
+# ----------------------------------------
+
+@login_required
+def filter_order_photos(request):
+    # Literal ids (from the cached scope) instead of a location subquery, so
+    # the planner can pick the filter's own index
+    location_ids = sorted(request.scope.location_ids)
+
+    # CSV / XLSX EXPORT
+    export = request.GET.get("export")
+    if export in EXPORT_FORMATS:
+        return export_photos(request, order_photo_queryset(location_ids, request.GET), export)
+
+    rows = photo_index_queryset(location_ids, request.GET).select_related("photo")
+    photos = CursorPaginator(rows, ("-uploaded_at", "-photo_id"), 50).get_page(
+        request.GET.get("cursor")
+    )
     return render(request, "partials/order_photos_table.html", {"photos": photos})
 
 
 
 
 # ----------------------------------------
-# 📌 UNIFIED CSV EXPORT FUNCTION (UPDATED)
+# 📌 UNIFIED PHOTO EXPORT FUNCTION (CSV / XLSX)
 # ----------------------------------------
 
 
-def export_photos_csv(request, photos_queryset):
+def export_photos(request, photos_queryset, fmt="csv"):
     # Generate today's date in YYYYMMDD format
     today_str = datetime.now().strftime("%Y%m%d%h")
 
     # Build file name like: 20251101_KOT.csv
-    file_name = f"{today_str}_KOT.csv"
+    return export_response(
+        fmt,
+        f"{today_str}_KOT",
+        PHOTO_EXPORT_HEADER,
+        photo_export_rows(photos_queryset, request.build_absolute_uri),
+    )
+
+
+
+# ----------------------------------------
+# 🗜 ORIGINALS (live or archived) + ZIP DOWNLOAD — see archives.py
+# ----------------------------------------
+PHOTO_ZIP_MAX_PHOTOS = 10000
 
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
 
-    writer = csv.writer(response)
-    writer.writerow(["Order ID", "Uploaded By", "Location", "Uploaded At", "Image URL"])
+@login_required
+def order_photo_original(request, photo_id):
+    photo = get_object_or_404(OrderPhoto.objects.select_related("archive"), pk=photo_id)
+    if not request.scope.allows(photo.location_id):
+        return HttpResponseForbidden()
 
-    for p in photos_queryset:
-        writer.writerow([
-            p.order_id,
-            p.uploaded_by.username if p.uploaded_by else "",
-            p.location.name if p.location else "",
-            p.uploaded_at.strftime("%Y-%m-%d %H:%M"),
-            request.build_absolute_uri(p.photo.url) if p.photo else "",
-        ])
+    if photo.photo:
+        return redirect(photo.photo.url)
+
+    try:
+        source = open_original(photo)
+    except OSError:
+        raise Http404("Photo file not found.")
 
+    response = StreamingHttpResponse(
+        iter_original(source), content_type=content_type(photo.archive_member)
+    )
+    response["Content-Length"] = photo.archive_size
+    # Archived bytes never change
+    response["Cache-Control"] = "private, max-age=86400"
     return response
 
 
+@login_required
+def download_order_photos_zip(request):
+    rows = photo_index_queryset(sorted(request.scope.location_ids), request.GET)
+
+    if rows[PHOTO_ZIP_MAX_PHOTOS:PHOTO_ZIP_MAX_PHOTOS + 1].exists():
+        messages.error(
+            request,
+            f"More than {PHOTO_ZIP_MAX_PHOTOS} photos match; narrow the dates or location.",
+        )
+        return redirect("view_order_photos")
+
+    photos = (
+        OrderPhoto.objects.filter(pk__in=rows.values("photo_id"))
+        .select_related("uploaded_by", "location", "archive")
+        .order_by("uploaded_at", "id")
+        .iterator(chunk_size=500)
+    )
+    response = StreamingHttpResponse(stream_photo_zip(photos), content_type="application/zip")
+    response["Content-Disposition"] = (
+        f'attachment; filename="{datetime.now():%Y%m%d}_order_photos.zip"'
+    )
+    return response
+
 
 # ----------------------------------------
 # 📌 VIEW ORDER PHOTOS PAGE
 # ----------------------------------------
 @login_required
 def view_order_photos(request):
-    user = request.user
-    user_locations = get_user_locations(user)
+    scope = request.scope
 
-    if not user_locations:
+    if not scope.location_ids:
         messages.error(request, "No locations assigned to your account.")
         return redirect("dashboard")
 
-    photos = OrderPhoto.objects.filter(
-        location__in=user_locations
-    ).order_by("-uploaded_at")
+    rows = scope.restrict(OrderPhotoIndex.objects.select_related("photo"))
+    photos = CursorPaginator(rows, ("-uploaded_at", "-photo_id"), 50).get_page(
+        request.GET.get("cursor")
+    )
 
     return render(request, "view_order_photos.html", {"photos": photos})
 
@@ -1492,7 +1347,10 @@ def admin_ot_sac_list(request):
     records = StaffTimeUpdate.objects.select_related(
         "staff",        # FIXED
         "updated_by"    # Add this for efficiency
-    ).order_by("-updated_at")
+    )
+    records = CursorPaginator(records, ("-updated_at", "-id"), 50).get_page(
+        request.GET.get("cursor")
+    )
 
     return render(request, "admin_ot_sac_list.html", {"records": records})
 
@@ -1509,7 +1367,10 @@ def cluster_ot_sac_list(request):
     # Fetch only records belonging to staff in the CM's location
     records = StaffTimeUpdate.objects.filter(
         staff__location=user_location
-    ).select_related("staff").order_by("-updated_at")
+    ).select_related("staff")
+    records = CursorPaginator(records, ("-updated_at", "-id"), 50).get_page(
+        request.GET.get("cursor")
+    )
 
     return render(request, "cluster_ot_sac_list.html", {"records": records})
 
@@ -1521,34 +1382,121 @@ from .models import StaffTimeUpdate
 
 @staff_member_required
 def export_staff_updates_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="staff_time_updates.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        "Employee ID",
-        "Employee Name",
-        "Location",
-        "Type",
-        "OT Hours",
-        "OT Date",
-        "SAC OFF Date",
-        "Remarks",
-        "Updated At",
-    ])
-
-    for item in StaffTimeUpdate.objects.all().order_by('-updated_at'):
-
-        writer.writerow([
-            item.staff.employee_id,
-            item.staff.get_full_name(),
-            item.staff.location,
-            item.update_type,
-            item.ot_hours if item.update_type == "TO" else "",
-            item.ot_date if item.update_type == "TO" else "",
-            item.sac_off_date if item.update_type == "SAC_OFF" else "",
-            item.remarks,
-            item.updated_at,
-        ])
+    fmt = request.GET.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        fmt = "csv"
 
-    return response
+    updates = StaffTimeUpdate.objects.order_by("-updated_at")
+
+    return export_response(
+        fmt,
+        "staff_time_updates",
+        STAFF_UPDATE_EXPORT_HEADER,
+        staff_update_export_rows(updates),
+    )
+
+
+# ----------------------------------------
+# 📦 BACKGROUND EXPORT JOBS
+# ----------------------------------------
+EXPORT_JOB_FILTERS = {
+    "tickets": ("status", "assigned_to", "location"),
+    "order_photos": PHOTO_FILTER_FIELDS,
+    "staff_time_updates": (),
+}
+
+
+def can_export(user, kind):
+    if kind == "order_photos":
+        return True
+    if kind == "staff_time_updates":
+        return user.is_staff
+    return user.role == "admin" or user.is_staff
+
+
+def export_job_payload(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "row_count": job.row_count,
+        "error": job.error,
+        "download_url": (
+            reverse("export_job_download", args=[job.id]) if job.status == "done" else None
+        ),
+    }
+
+
+def get_export_job_for(request, job_id):
+    """The job, if it is the user's own (or the user is an admin) and every
+    location it covers is still in the user's scope."""
+    job = get_object_or_404(ExportJob, id=job_id)
+    user = request.user
+    if job.requested_by_id != user.id and user.role != "admin":
+        raise Http404
+    if not can_export(user, job.kind):
+        raise Http404
+    if job.kind == "order_photos" and not request.scope.unrestricted:
+        if not set(job.params.get("location_ids", [])) <= request.scope.location_ids:
+            raise Http404
+    return job
+
+
+@login_required
+@require_POST
+def request_export_job(request, kind):
+    if kind not in EXPORT_SOURCES:
+        raise Http404
+    if not can_export(request.user, kind):
+        return HttpResponseForbidden()
+
+    file_format = request.POST.get("format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        file_format = "csv"
+
+    params = {f: request.POST.get(f, "") for f in EXPORT_JOB_FILTERS[kind]}
+
+    if kind == "order_photos":
+        params["location_ids"] = sorted(request.scope.location_ids)
+        params["base_url"] = request.build_absolute_uri("/")
+
+    job = request_export(kind, file_format, params, user=request.user)
+    return JsonResponse(export_job_payload(job))
+
+
+@login_required
+def export_job_status(request, job_id):
+    job = get_export_job_for(request, job_id)
+    return JsonResponse(export_job_payload(job))
+
+
+@login_required
+def export_job_download(request, job_id):
+    job = get_export_job_for(request, job_id)
+    if job.status != "done" or not job.file:
+        raise Http404
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=f"{job.kind}.{job.file_format}",
+    )
+
+
+# =====================================================================
+# ⏳ Background imports: progress of an admin bulk upload
+# =====================================================================
+
+@staff_member_required
+def import_job_status(request, job_id):
+    job = get_object_or_404(ImportJob, id=job_id)
+    return JsonResponse({
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "rows_total": job.rows_total,
+        "rows_processed": job.rows_processed,
+        "rows_failed": job.rows_failed,
+        "rows_per_second": round(job.rows_per_second, 1),
+        "percent": job.percent,
+        "error": job.error,
+    })
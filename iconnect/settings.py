@@ -53,6 +53,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "hybbconnect.scope.AccessScopeMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,10 +88,46 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds a writer waits for the database lock before "database is
+        # locked". Concurrent ticket creates queue on the sequence row
+        # (hybbconnect/sequences.py); the 5s default is too short under load.
+        "OPTIONS": {"timeout": 20},
+        # Tests run against a file like db.sqlite3 itself. Django's default
+        # test database is a shared-cache in-memory one, whose table locks
+        # fail at once instead of waiting out the timeout above, so the
+        # multi-threaded tests (ticket numbers, import heartbeats) could not
+        # exercise the locking the real database uses.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
 
+# Cache
+# hybbconnect caches derived data in process memory or in this cache: admin
+# metrics, staff dashboard sections, access scopes, the routing table. Two
+# rules hold for all of them:
+#
+# * Invalidation. hybbconnect/signals.py drops or re-versions the entries a
+#   write affects. Other worker processes only see that through a cache they
+#   share, so production (more than one worker process) must set REDIS_URL.
+#   The default LocMemCache is per process: fine for runserver and tests.
+# * Expiry. Writes that bypass signals (queryset.update, raw SQL, imports)
+#   invalidate nothing, so each entry also expires after a few minutes (the
+#   *_TTL constants next to each cache key).
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -149,3 +186,28 @@ LOGOUT_REDIRECT_URL = '/login/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Import uploads and export files; outside MEDIA_ROOT, never served by URL
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, 'private_media')
+
+
+# Ticket numbering (see hybbconnect/sequences.py)
+TICKET_NUMBER_PREFIX = "TIK"
+TICKET_NUMBER_WIDTH = 5
+TICKET_NUMBER_BLOCK_SIZE = 1
+
+# Background exports (see hybbconnect/jobs.py)
+EXPORT_ARTIFACT_TTL_SECONDS = 6 * 60 * 60
+
+# Background imports: a running job touches updated_at this often and is
+# requeued once it has been silent for IMPORT_JOB_STALE_SECONDS
+IMPORT_HEARTBEAT_SECONDS = 60
+IMPORT_JOB_STALE_SECONDS = 10 * 60
+
+# Resumable photo uploads (see hybbconnect/uploads.py)
+UPLOAD_SESSION_DIR = os.path.join(BASE_DIR, 'upload_sessions')
+UPLOAD_SESSION_TTL_SECONDS = 24 * 60 * 60
+
+# Photo archive tiering (see hybbconnect/archives.py)
+PHOTO_ARCHIVE_DIR = os.path.join(BASE_DIR, 'photo_archives')
+PHOTO_ARCHIVE_AFTER_DAYS = 180